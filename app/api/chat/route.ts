@@ -7,8 +7,10 @@ export async function POST(req: Request) {
     console.log('[Next.js Route] Received chat request');
     console.log('[Next.js Route] Python API URL:', PYTHON_API_URL);
     
-    const { messages } = await req.json();
-    console.log('[Next.js Route] Messages:', JSON.stringify(messages).substring(0, 100));
+    // Either { messages } (full history) or { session_id, message } (session mode);
+    // stream_format "ndjson" | "sse" opts into typed events instead of plain text
+    const { messages, session_id, message, stream_format } = await req.json();
+    console.log('[Next.js Route] Payload:', JSON.stringify(messages ?? message).substring(0, 100));
     
     console.log('[Next.js Route] Forwarding to Python API...');
     const response = await fetch(`${PYTHON_API_URL}/api/chat`, {
@@ -16,11 +18,28 @@ export async function POST(req: Request) {
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ messages }),
+      body: JSON.stringify({ messages, session_id, message, stream_format }),
     });
 
     console.log('[Next.js Route] Python API response status:', response.status);
     
+    if (response.status === 503) {
+      // Backend is shedding load: pass the rejection through so clients can back off
+      const errorText = await response.text();
+      console.warn('[Next.js Route] Python API overloaded:', errorText);
+      return new Response(errorText, {
+        status: 503,
+        headers: { 'Retry-After': response.headers.get('Retry-After') ?? '1' },
+      });
+    }
+
+    if (response.status === 404 && session_id) {
+      // Session no longer held by the backend: the client resends full history
+      const errorText = await response.text();
+      console.warn('[Next.js Route] Unknown session:', errorText);
+      return new Response(errorText, { status: 404 });
+    }
+
     if (!response.ok) {
       const errorText = await response.text();
       console.error('[Next.js Route] Python API error:', errorText);
@@ -28,12 +47,14 @@ export async function POST(req: Request) {
     }
 
     console.log('[Next.js Route] Streaming response...');
-    return new Response(response.body, {
-      headers: {
-        'Content-Type': 'text/plain; charset=utf-8',
-        'Transfer-Encoding': 'chunked',
-      },
-    });
+    const headers: Record<string, string> = {
+      'Content-Type': response.headers.get('Content-Type') ?? 'text/plain; charset=utf-8',
+      'Transfer-Encoding': 'chunked',
+    };
+    const sessionId = response.headers.get('X-Session-Id');
+    if (sessionId) headers['X-Session-Id'] = sessionId;
+
+    return new Response(response.body, { headers });
   } catch (error) {
     console.error('[Next.js Route] Error:', error);
     const errorMsg = error instanceof Error ? error.message : String(error);
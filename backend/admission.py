@@ -0,0 +1,133 @@
+"""
+Admission control for the chat endpoint.
+
+Caps the number of agent runs in flight and keeps a bounded FIFO queue of
+waiting requests. Anything beyond the queue, or waiting longer than the
+queue timeout, is rejected immediately so overload shows up as fast 503s
+instead of every request drifting towards the 30s route timeout.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Slot:
+    """An admitted request. Release exactly once; extra calls are no-ops."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._start = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._start)
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded wait queue and queue-time stats."""
+
+    def __init__(self, max_concurrency: int = 32, max_queue: int = 64, queue_timeout: float = 10.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Counters
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self._service_time = 1.0  # EWMA of seconds a slot is held
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely be admitted."""
+        backlog = (self.queued + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    async def acquire(self) -> Slot:
+        """Wait for a slot, or raise Overloaded if the queue is full or times out."""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return self._admit(0.0)
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_full += 1
+            raise Overloaded("queue full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Slot handed over just as the timer fired: accept it
+                return self._admit(time.monotonic() - start)
+            future.cancel()
+            self.rejected_timeout += 1
+            raise Overloaded("queue timeout", self.retry_after())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # We were handed a slot but the caller went away: pass it on
+                self.in_flight -= 1
+                self._wake_next()
+            else:
+                future.cancel()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+        return self._admit(time.monotonic() - start)
+
+    def _admit(self, waited: float) -> Slot:
+        self.admitted += 1
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+        return Slot(self)
+
+    def _release(self, held: float) -> None:
+        self._service_time = 0.8 * self._service_time + 0.2 * held
+        self.in_flight -= 1
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        while self._waiters and self.in_flight < self.max_concurrency:
+            future = self._waiters.popleft()
+            if not future.done():
+                # The slot is transferred to the waiter before it resumes
+                self.in_flight += 1
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "queue_wait_avg_ms": round(1000 * self.queue_wait_total / max(self.admitted, 1), 2),
+            "queue_wait_max_ms": round(1000 * self.queue_wait_max, 2),
+        }
@@ -1,17 +1,32 @@
 import os
-import logging
+import time
 import asyncio
+import hashlib
+import logging
+from contextlib import aclosing
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # LangChain Imports
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain.agents import create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.language_models.chat_models import BaseChatModel
 
 # Local Imports
-from tools import tools
+from tools import tools, TOOL_DEPENDENCIES
+from prefetch import current_session
+from steps import check_dependencies
+from terminal import TERMINAL_TOOLS, TerminalAgentExecutor
+from cache import ResponseCache, conversation_key
+from history import HistoryWindow, estimate_tokens
+from intents import IntentRouter
+from routing import FAST, STRONG, ModelRouter, ModelTier
+from providers import ProviderPool
+from http_pool import llm_http
+from metrics import (REGISTRY, metrics_callback, span, STAGE_SECONDS, AGENT_LIMIT_HITS,
+                     CANCELLED_RUNS, RECLAIMED_SECONDS)
 
 # Load environment variables
 load_dotenv()
@@ -21,9 +36,82 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 _agent_executor = None
+_strong_executor = None
+
+GREETING = "Hello! How can I help you today?"
+ERROR_REPLY = "I encountered a system error. Please try again."
+DEADLINE_REPLY = "Sorry, that is taking longer than it should. Could you send your last message again?"
+
+# Tool-calling rounds per turn before the executor gives up
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "6"))
+# What AgentExecutor answers when it stops early (early_stopping_method="force")
+_STOPPED_OUTPUTS = ("Agent stopped due to max iterations.", "Agent stopped due to iteration limit or time limit.")
+
+# Answers to tool-free turns, keyed on the normalized conversation
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+)
+
+# Keeps the prompt size flat as conversations grow
+history_window = HistoryWindow(
+    budget_tokens=int(os.getenv("HISTORY_TOKEN_BUDGET", "2000")),
+    keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", "4")),
+    summary_tokens=int(os.getenv("HISTORY_SUMMARY_TOKENS", "300")),
+)
+
+# Answers obvious single-tool turns without calling the LLM
+intent_router = IntentRouter(
+    {t.name: t for t in tools},
+    threshold=float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.85")),
+)
+
+# Per-turn choice between the fast model and an optional stronger one
+PROVIDER_NAMES = [n.strip().lower() for n in os.getenv("LLM_PROVIDERS", "gemini").split(",") if n.strip()]
+DEFAULT_MODELS = {"gemini": "gemini-1.5-flash", "groq": "llama-3.3-70b-versatile"}
+
+def tier_model(name: str, tier: str = FAST) -> str:
+    """Model a provider runs for a tier: <PROVIDER>_MODEL, or <PROVIDER>_STRONG_MODEL for the strong tier."""
+    model = os.getenv(f"{name.upper()}_MODEL", DEFAULT_MODELS.get(name, ""))
+    if tier == STRONG:
+        model = os.getenv(f"{name.upper()}_STRONG_MODEL") or model
+    return model
+
+model_router = ModelRouter(
+    fast=ModelTier(FAST, ",".join(tier_model(n) for n in PROVIDER_NAMES),
+                   cost_per_1k=float(os.getenv("LLM_FAST_COST_PER_1K", "0"))),
+    strong=ModelTier(STRONG, ",".join(tier_model(n, STRONG) for n in PROVIDER_NAMES),
+                     cost_per_1k=float(os.getenv("LLM_STRONG_COST_PER_1K", "0")))
+    if any(os.getenv(f"{n.upper()}_STRONG_MODEL") for n in PROVIDER_NAMES) else None,
+    strong_min_chars=int(os.getenv("MODEL_ROUTER_STRONG_CHARS", "600")),
+)
 
-def get_llm():
+REGISTRY.gauge("delta_response_cache_entries", "Entries in the response cache", lambda: len(response_cache))
+REGISTRY.gauge("delta_response_cache_hits", "Response cache hits", lambda: response_cache.hits, kind="counter")
+REGISTRY.gauge("delta_response_cache_misses", "Response cache misses", lambda: response_cache.misses, kind="counter")
+REGISTRY.gauge("delta_history_compactions", "Conversations compacted to fit the token budget",
+               lambda: history_window.compactions, kind="counter")
+REGISTRY.gauge("delta_intent_router_hits", "Turns answered by the intent fast path",
+               lambda: dict(intent_router.hits), labelname="intent", kind="counter")
+REGISTRY.gauge("delta_intent_router_fallbacks", "Recognised intents handed to the agent",
+               lambda: dict(intent_router.fallbacks), labelname="intent", kind="counter")
+REGISTRY.gauge("delta_model_tier_turns", "Agent turns run on each model tier",
+               lambda: dict(model_router.turns), labelname="tier", kind="counter")
+REGISTRY.gauge("delta_model_tier_seconds", "Agent time spent on each model tier",
+               lambda: dict(model_router.seconds), labelname="tier", kind="counter")
+REGISTRY.gauge("delta_model_tier_llm_calls", "LLM calls made on each model tier",
+               lambda: dict(model_router.llm_calls), labelname="tier", kind="counter")
+REGISTRY.gauge("delta_model_tier_tokens", "LLM tokens (input + output, estimated when not reported) per model tier",
+               lambda: {t: model_router.input_tokens[t] + model_router.output_tokens[t] for t in model_router.tiers},
+               labelname="tier", kind="counter")
+REGISTRY.gauge("delta_model_tier_cost_usd", "Estimated LLM cost per model tier",
+               lambda: {t: model_router.cost(t) for t in model_router.tiers}, labelname="tier", kind="counter")
+
+def get_gemini_llm(max_retries: int = 2, tier: str = FAST):
     """Initialize Google Gemini LLM"""
+    # Deferred: the Google SDK is ~1s of imports and unused when Groq is configured
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     api_key = os.getenv("GOOGLE_API_KEY")
     # Fallback to the other key name if specific one not found
     if not api_key:
@@ -35,11 +123,69 @@ def get_llm():
     # Map it for LangChain
     os.environ["GOOGLE_API_KEY"] = api_key
     
-    logger.info("✓ Initializing Gemini 1.5 Flash")
+    model = tier_model("gemini", tier)
+    logger.info(f"✓ Initializing Gemini {model} ({tier} tier)")
     return ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
+        model=model,
         temperature=0.3,
-        max_retries=2
+        max_retries=max_retries
+    )
+
+def get_groq_llm(max_retries: int = 2, tier: str = FAST):
+    """Initialize Groq LLM"""
+    # Deferred: only needed when Groq is part of the provider pool
+    from langchain_groq import ChatGroq
+    
+    if not os.getenv("GROQ_API_KEY"):
+        raise ValueError("GROQ_API_KEY is missing. Check your .env file.")
+    
+    model = tier_model("groq", tier)
+    logger.info(f"✓ Initializing Groq {model} ({tier} tier)")
+    return ChatGroq(
+        model=model,
+        temperature=0.3,
+        max_retries=max_retries,
+        # Shared pool: connection reuse and handshake timing are visible in /health
+        http_async_client=llm_http.client(),
+    )
+
+PROVIDER_FACTORIES = {
+    "gemini": get_gemini_llm,
+    "groq": get_groq_llm,
+}
+
+def get_llm(tier: str = FAST):
+    """
+    Build the configured LLM for a model tier ("fast" or "strong").
+    
+    LLM_PROVIDERS is an ordered, comma-separated list (default "gemini").
+    With more than one provider the result is a ProviderPool that fails over
+    in order and, with LLM_HEDGE=true, hedges slow calls to the next one.
+    """
+    names = [n.strip().lower() for n in os.getenv("LLM_PROVIDERS", "gemini").split(",") if n.strip()]
+    unknown = [n for n in names if n not in PROVIDER_FACTORIES]
+    if unknown:
+        raise ValueError(f"Unknown LLM provider(s): {', '.join(unknown)}")
+    
+    if len(names) == 1:
+        return PROVIDER_FACTORIES[names[0]](tier=tier)
+    
+    # Inside a pool, failing over beats retrying the same provider
+    providers, available = [], []
+    for name in names:
+        try:
+            providers.append(PROVIDER_FACTORIES[name](max_retries=0, tier=tier))
+            available.append(name)
+        except ValueError as e:
+            logger.warning(f"Skipping LLM provider {name}: {e}")
+    if not providers:
+        raise ValueError("CRITICAL: no LLM provider could be initialized. Check your .env file.")
+    
+    return ProviderPool(
+        providers=providers,
+        names=available,
+        hedge=os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes"),
+        hedge_default_delay=float(os.getenv("LLM_HEDGE_DELAY", "2.0")),
     )
 
 def get_system_prompt():
@@ -56,72 +202,378 @@ BEHAVIOR:
 TOOL RULES:
 1. User gives Name + Email -> Call 'save_lead_tool'.
 2. User asks for time -> Call 'get_available_slots_tool'.
-3. User picks time -> Call 'book_call_tool'.
+3. User picks time -> Call 'book_call_tool' with that slot's ID from the slot list.
 """
 
-def get_agent_executor():
-    global _agent_executor
+def build_agent_executor(llm=None, agent_tools=None, terminal_tools=None, tool_dependencies=None):
+    """
+    Build a tool-calling AgentExecutor around `llm` (Gemini by default).
+
+    A successful call to one of `terminal_tools` (TERMINAL_TOOLS by default)
+    ends the run with the tool's templated reply instead of another LLM call.
+    Tool calls from one model response run concurrently, except where
+    `tool_dependencies` (TOOL_DEPENDENCIES by default) orders them.
+    """
+    if llm is None:
+        llm = get_llm()
+    if agent_tools is None:
+        agent_tools = tools
+    if terminal_tools is None:
+        terminal_tools = TERMINAL_TOOLS
+    if tool_dependencies is None:
+        tool_dependencies = TOOL_DEPENDENCIES
+    check_dependencies(tool_dependencies)
+
+    system_prompt = get_system_prompt()
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+
+    agent = create_tool_calling_agent(llm, agent_tools, prompt)
+
+    return TerminalAgentExecutor(
+        agent=agent,
+        tools=agent_tools,
+        terminal_tools=frozenset(terminal_tools),
+        tool_dependencies={tool: frozenset(deps) for tool, deps in tool_dependencies.items()},
+        max_iterations=AGENT_MAX_ITERATIONS,
+        verbose=True,
+        handle_parsing_errors=True,
+        # Lets the response cache notice when the prompt changes
+        metadata={"prompt_version": hashlib.sha256(system_prompt.encode()).hexdigest()[:16]}
+    )
+
+def get_agent_executor(tier: str = FAST):
+    """
+    Return the shared executor for a model tier, building it on first use.
+    The strong tier falls back to the fast one when it is not configured.
+
+    The first call should happen inside the running event loop: Gemini only
+    creates its async (grpc.aio) client when a loop is running, otherwise
+    every async call falls back to a worker thread.
+    """
+    global _agent_executor, _strong_executor
+    if tier == STRONG and (_strong_executor is not None or model_router.enabled):
+        if _strong_executor is None:
+            _strong_executor = build_agent_executor(get_llm(STRONG))
+            logger.info("✓ Delta-1 strong-tier agent ready")
+        return _strong_executor
     if _agent_executor is None:
         try:
-            llm = get_llm()
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", get_system_prompt()),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad"),
-            ])
-            
-            agent = create_tool_calling_agent(llm, tools, prompt)
-            
-            _agent_executor = AgentExecutor(
-                agent=agent,
-                tools=tools,
-                verbose=True,
-                handle_parsing_errors=True
-            )
+            _agent_executor = build_agent_executor()
             logger.info("✓ Delta-1 Agent Ready (Power: Gemini Flash)")
         except Exception as e:
             logger.error(f"Failed to init agent: {e}")
             raise
     return _agent_executor
 
-async def run_agent(messages: list) -> str:
-    try:
-        # Safety check for empty messages
-        if not messages:
-            return "Hello! How can I help you today?"
-            
-        chat_history = []
-        user_input = ""
-        
-        # Robust parsing
-        for msg in messages:
-            role = msg.get('role', '')
-            content = msg.get('content', '')
-            if role == 'user':
-                user_input = content 
-                chat_history.append(HumanMessage(content=content))
-            elif role == 'assistant':
-                chat_history.append(AIMessage(content=content))
-        
-        # Pop last message to use as input
-        if chat_history and isinstance(chat_history[-1], HumanMessage):
-            chat_history.pop()
+def _executor_llm(executor) -> Optional[BaseChatModel]:
+    """The chat model inside a tool-calling agent (prompt | llm.bind_tools | parser)."""
+    for step in getattr(executor.agent.runnable, "steps", []):
+        model = getattr(step, "bound", step)
+        if isinstance(model, BaseChatModel):
+            return model
+    return None
 
+def _uses_llm_http(llm) -> bool:
+    """The primary provider sends its requests through the shared `llm_http` pool (Groq, not Gemini)."""
+    if isinstance(llm, ProviderPool):
+        llm = llm.providers[0]
+    return getattr(getattr(llm, "bound", llm), "http_async_client", None) is not None
+
+async def warm_up(mode: str = "build", url: Optional[str] = None) -> Dict[str, float]:
+    """
+    Prepare the agent before the first chat arrives.
+
+    "build" imports LangChain and the provider SDK and builds the executor
+    inside the running loop. "connect" then also opens a connection ahead of
+    the first request: an HTTP GET to `url` through the shared pool when
+    given, otherwise a one-line (billed) call through the agent's model. The
+    GET only warms a provider that uses the pool, so with any other primary
+    provider it is skipped. Returns how long each step took, in seconds. A
+    failed connection warm-up is logged, not raised; a failed build raises.
+    """
+    timings = {}
+    start = time.perf_counter()
+    executor = get_agent_executor()
+    if model_router.enabled:
+        get_agent_executor(STRONG)
+    timings["build"] = time.perf_counter() - start
+
+    llm = _executor_llm(executor)
+    if mode == "connect" and url and not _uses_llm_http(llm):
+        logger.warning("LLM_WARMUP_URL only warms the shared HTTP pool, which the primary provider "
+                       "does not use; skipping the connection warm-up")
+    elif mode == "connect":
+        start = time.perf_counter()
+        try:
+            if url:
+                # Through the shared pool, so the warmed connection is the one calls reuse
+                await llm_http.client().get(url, timeout=5.0)
+            elif llm is not None:
+                await llm.ainvoke([HumanMessage(content="Reply with OK.")])
+        except Exception as e:
+            logger.warning(f"LLM connection warm-up failed: {type(e).__name__}: {e}")
+        timings["connect"] = time.perf_counter() - start
+    return timings
+
+def parse_messages(messages: list) -> Tuple[str, List[BaseMessage]]:
+    """Split role/content dicts into the latest user input and prior history."""
+    chat_history = []
+    user_input = ""
+
+    # Robust parsing
+    for msg in messages:
+        role = msg.get('role', '')
+        content = msg.get('content', '')
+        if role == 'user':
+            user_input = content
+            chat_history.append(HumanMessage(content=content))
+        elif role == 'assistant':
+            chat_history.append(AIMessage(content=content))
+
+    # Pop last message to use as input
+    if chat_history and isinstance(chat_history[-1], HumanMessage):
+        chat_history.pop()
+
+    return user_input, chat_history
+
+def _chunk_text(chunk) -> str:
+    """Extract plain text from a streamed message chunk."""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    # Gemini may return a list of content parts
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
+
+def _partial_answer(tool_output: Any) -> str:
+    """The best reply available when a run is cut short after `tool_output`."""
+    reply = getattr(tool_output, "reply", None)
+    if reply:
+        # A terminal tool (e.g. the booking) already succeeded
+        return reply
+    if isinstance(tool_output, str) and tool_output.startswith("Available slots:"):
+        return f"{tool_output}\n\nWhich time works best for you?"
+    return DEADLINE_REPLY
+
+def _call_tokens(data: Dict[str, Any]) -> Tuple[int, int]:
+    """(input, output) tokens of one LLM call: reported usage, else an estimate."""
+    output = data.get("output")
+    usage = getattr(output, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    prompt = [m for batch in (data.get("input") or {}).get("messages", []) for m in batch]
+    input_tokens = sum(estimate_tokens(str(m.content)) for m in prompt)
+    return input_tokens, estimate_tokens(_chunk_text(output) if output is not None else "")
+
+async def stream_agent_events(
+    messages: list,
+    session_id: Optional[str] = None,
+    trace: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the agent and yield typed events as it works.
+
+    Events are dicts with a "type": "token" (`text`, forwarded straight
+    from the LLM stream), "tool_start" (`tool`), "tool_end" (`tool`, `ms`)
+    and "error" (`message`, after which nothing else follows). If the final
+    answer did not arrive as tokens (e.g. it came directly from a tool), it
+    is sent as one token event when the run finishes. Answers to turns that
+    used no tools are cached and replayed for identical conversations, and
+    high-confidence single-tool intents are answered without the LLM.
+
+    History beyond the token budget is compacted into a rolling summary,
+    cached under `session_id`. If `trace` is given, the names of the tools
+    that ran are recorded in `trace["tools"]` and how the turn was answered
+    (greeting, cache, intent, agent, deadline or error) in `trace["outcome"]`.
+
+    `deadline` is an absolute event-loop time. Each step of the agent run
+    is awaited under it, so whichever LLM or tool call is in flight gets
+    only the remaining budget; when it runs out the call is cancelled and
+    the turn ends with a partial answer (outcome "deadline").
+    """
+    trace = {} if trace is None else trace
+    # Safety check for empty messages
+    if not messages:
+        trace["outcome"] = "greeting"
+        yield {"type": "token", "text": GREETING}
+        return
+
+    # Lets tools keep per-session state (the slot prefetch). Full-history
+    # conversations have no stable identity (any key built from their opening
+    # messages is shared by every chat that starts with "Hi"), so none
+    current_session.set(session_id)
+    used_tools = trace.setdefault("tools", [])
+    streamed = False
+    since_tool = []  # text streamed after the most recent tool call
+    final_output = ""
+    turn_start = time.perf_counter()
+    tool_started = {}  # run_id -> perf_counter at on_tool_start
+    llm_runs = set()  # run_ids of LLM calls in flight
+
+    try:
         executor = get_agent_executor()
-        
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: executor.invoke({
-                "input": user_input,
-                "chat_history": chat_history
-            })
+
+        cache_key = cached = None
+        if response_cache.enabled:
+            with span("cache_lookup"):
+                response_cache.sync_prompt(executor.metadata["prompt_version"])
+                cache_key = conversation_key(messages)
+                cached = response_cache.get(cache_key)
+        if cached is not None:
+            trace["outcome"] = "cache"
+            yield {"type": "token", "text": cached}
+            return
+
+        if messages[-1].get("role") == "user":
+            with span("intent_route"):
+                route_start = time.perf_counter()
+                routed = await intent_router.route(messages[-1].get("content", ""))
+            if routed is not None:
+                reply, tool_name = routed
+                used_tools.append(tool_name)
+                trace["outcome"] = "intent"
+                yield {"type": "tool_start", "tool": tool_name}
+                yield {"type": "tool_end", "tool": tool_name,
+                       "ms": round((time.perf_counter() - route_start) * 1000, 1)}
+                yield {"type": "token", "text": reply}
+                return
+
+        with span("history_compact"):
+            window = await history_window.compact(
+                messages, key=session_id or conversation_key(messages[:3])
+            )
+        with span("message_convert"):
+            user_input, chat_history = parse_messages(window)
+
+        tier, reason = model_router.choose(user_input)
+        trace["tier"] = tier
+        if tier != FAST:
+            logger.info(f"Routing turn to the {tier} model ({reason})")
+            executor = get_agent_executor(tier)
+
+        trace["outcome"] = "agent"
+        root_run_id = None
+        agent_start = time.perf_counter()
+        phase = "agent"  # what is in flight: llm, tool, or the executor itself
+        last_tool_output = None
+        run = executor.astream_events(
+            {"input": user_input, "chat_history": chat_history},
+            config={"callbacks": [metrics_callback]},
+            version="v2",
         )
-        
-        return result['output']
+        while True:
+            try:
+                # Only the wait for the next event is timed, never our own yields
+                async with asyncio.timeout_at(deadline):
+                    event = await run.__anext__()
+            except StopAsyncIteration:
+                break
+            except TimeoutError:
+                await run.aclose()
+                metrics_callback.abandon([*tool_started, *llm_runs])
+                AGENT_LIMIT_HITS.inc(limit="deadline", phase=phase)
+                logger.warning(f"Request deadline hit while waiting on {phase}")
+                trace["outcome"] = "deadline"
+                if not since_tool:
+                    yield {"type": "token", "text": _partial_answer(last_tool_output)}
+                return
+
+            kind = event["event"]
+            if root_run_id is None:
+                root_run_id = event["run_id"]
+
+            if kind == "on_chat_model_stream":
+                text = _chunk_text(event["data"]["chunk"])
+                if text:
+                    if not streamed:
+                        STAGE_SECONDS.observe(time.perf_counter() - agent_start, stage="first_token")
+                    streamed = True
+                    since_tool.append(text)
+                    yield {"type": "token", "text": text}
+            elif kind == "on_chat_model_start":
+                phase = "llm"
+                llm_runs.add(event["run_id"])
+            elif kind == "on_chat_model_end":
+                phase = "agent"
+                llm_runs.discard(event["run_id"])
+                model_router.record_call(tier, *_call_tokens(event["data"]))
+            elif kind == "on_tool_start":
+                phase = "tool"
+                used_tools.append(event["name"])
+                since_tool.clear()
+                tool_started[event["run_id"]] = time.perf_counter()
+                yield {"type": "tool_start", "tool": event["name"]}
+            elif kind == "on_tool_end":
+                phase = "agent"
+                last_tool_output = event["data"].get("output")
+                started = tool_started.pop(event["run_id"], time.perf_counter())
+                yield {"type": "tool_end", "tool": event["name"],
+                       "ms": round((time.perf_counter() - started) * 1000, 1)}
+            elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+                final_output = (event["data"].get("output") or {}).get("output", "")
+                if final_output in _STOPPED_OUTPUTS:
+                    # Iteration cap: answer from what the tools found instead
+                    AGENT_LIMIT_HITS.inc(limit="iterations", phase="agent")
+                    trace["outcome"] = "deadline"
+                    final_output = "" if since_tool else _partial_answer(last_tool_output)
+                if final_output and not since_tool:
+                    if not streamed:
+                        STAGE_SECONDS.observe(time.perf_counter() - agent_start, stage="first_token")
+                    streamed = True
+                    yield {"type": "token", "text": final_output}
+        STAGE_SECONDS.observe(time.perf_counter() - agent_start, stage="agent")
+        model_router.record_turn(tier, time.perf_counter() - agent_start)
+
+        # Tool turns have side effects or live data: never replay them
+        if cache_key and final_output and not used_tools and trace["outcome"] == "agent":
+            response_cache.put(cache_key, final_output)
+
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client went away; the LLM or tool call in flight is cancelled with us
+        elapsed = time.perf_counter() - turn_start
+        trace["outcome"] = "cancelled"
+        metrics_callback.abandon([*tool_started, *llm_runs])
+        CANCELLED_RUNS.inc()
+        RECLAIMED_SECONDS.inc(max(0.0, STAGE_SECONDS.mean(stage="agent") - elapsed))
+        logger.info(f"Agent run cancelled after {elapsed:.2f}s (client disconnected)")
+        raise
 
     except Exception as e:
         logger.error(f"AGENT FAILURE: {e}")
-        return "I encountered a system error. Please try again."
\ No newline at end of file
+        trace["outcome"] = "error"
+        yield {"type": "error", "message": ERROR_REPLY}
+
+async def stream_agent(
+    messages: list,
+    session_id: Optional[str] = None,
+    trace: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Run the agent and yield response text as the model produces it.
+
+    The plain-text view of `stream_agent_events`: token text only, or
+    ERROR_REPLY if the run failed before any text was sent.
+    """
+    streamed = False
+    # Closing this generator (client gone) closes, and so cancels, the agent run
+    run = stream_agent_events(messages, session_id=session_id, trace=trace, deadline=deadline)
+    async with aclosing(run) as events:
+        async for event in events:
+            if event["type"] == "token":
+                streamed = True
+                yield event["text"]
+            elif event["type"] == "error" and not streamed:
+                yield event["message"]
+
+async def run_agent(messages: list) -> str:
+    """Run the agent to completion and return the full response text."""
+    return "".join([chunk async for chunk in stream_agent(messages)])
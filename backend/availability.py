@@ -0,0 +1,294 @@
+"""
+Availability engine for discovery calls.
+
+Bookable slots come from configurable business hours in the business time
+zone. Taken slots live in a sorted array of start times (UTC epoch
+seconds), so a conflict check is one binary search and a free-slot query
+costs O(log n) per candidate it looks at. The index is loaded once from
+`call_requests` at startup and then updated in place as calls are booked.
+
+Every booking lasts one slot, so two bookings conflict exactly when their
+starts are less than one slot length apart.
+
+Slots are offered with short opaque IDs ("VNHXR4"): the start minute since
+the epoch in Crockford base32 plus a check character. An ID decodes back to
+its start time without any lookup table, stays the same across restarts,
+and a mistyped or invented ID fails the check. Minutes rather than slot
+numbers, because slots start at local opening times that need not fall on
+an epoch multiple of the slot length (UTC+5:30, 09:15 openings, 40-minute
+slots).
+"""
+import logging
+import os
+import zlib
+from bisect import bisect_left, insort
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Union
+from zoneinfo import ZoneInfo
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_DISPLAY_FORMAT = "%Y-%m-%d at %I:%M %p"
+_PARSE_FORMATS = (_DISPLAY_FORMAT, "%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M")
+
+_ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+_ID_VALUES = {c: i for i, c in enumerate(_ID_ALPHABET)}
+
+
+def parse_hours(text: str) -> tuple:
+    """"09:00-17:00" -> (time(9), time(17))."""
+    start, end = (time.fromisoformat(part.strip()) for part in text.split("-"))
+    if end <= start:
+        raise ValueError(f"Business hours must end after they start: {text!r}")
+    return start, end
+
+
+def parse_days(text: str) -> FrozenSet[int]:
+    """"mon-fri" or "mon,wed,fri" -> weekday numbers (Monday = 0)."""
+    days = set()
+    for part in text.lower().split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = (WEEKDAYS.index(p.strip()[:3]) for p in part.split("-"))
+            days.update(range(first, last + 1))
+        elif part:
+            days.add(WEEKDAYS.index(part[:3]))
+    return frozenset(days)
+
+
+def get_timezone(name: str) -> tzinfo:
+    return timezone.utc if name.upper() == "UTC" else ZoneInfo(name)
+
+
+def _epoch(moment: datetime) -> int:
+    """Aware datetime, or naive UTC (how call_requests stores it), to epoch seconds."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def to_utc_naive(moment: datetime) -> datetime:
+    """The form `call_requests.selected_time` stores (TIMESTAMP, UTC)."""
+    return datetime.fromtimestamp(_epoch(moment), timezone.utc).replace(tzinfo=None)
+
+
+class BookingCalendar:
+    """
+    Business-hours slot generator plus an index of taken slots.
+
+    `reserve()` checks and records a slot in one step on the event loop, so
+    two turns in this process can never book the same time.
+    """
+
+    def __init__(self, tz: str = "UTC", hours: str = "09:00-17:00", days: str = "mon-fri",
+                 slot_minutes: int = 30, horizon_days: int = 14, min_notice_minutes: int = 120,
+                 offer: int = 6, offer_per_day: int = 2,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.tz_name = tz
+        self.tz = get_timezone(tz)
+        self.open, self.close = parse_hours(hours)
+        self.days = parse_days(days)
+        self.slot_seconds = slot_minutes * 60
+        self.horizon = timedelta(days=horizon_days)
+        self.min_notice = timedelta(minutes=min_notice_minutes)
+        self.offer = offer
+        self.offer_per_day = offer_per_day
+        self._clock = clock
+        self._starts: List[int] = []  # sorted epoch seconds of booked slots
+        self.version = 0  # bumped whenever the index changes
+
+        # Counters
+        self.reservations = 0
+        self.conflicts = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    # --- Index ---
+
+    def load(self, starts: Iterable[datetime]) -> None:
+        """Replace the index with existing bookings (naive values are UTC)."""
+        self._starts = sorted(_epoch(s) for s in starts if s is not None)
+        self.version += 1
+        logger.info(f"Availability index loaded: {len(self._starts)} bookings")
+
+    async def load_from(self, repository) -> None:
+        """Load upcoming bookings from the repository (once, at startup)."""
+        since = to_utc_naive(self._clock() - timedelta(seconds=self.slot_seconds))
+        self.load(await repository.booked_times(since))
+
+    def is_free(self, start: datetime) -> bool:
+        return not self._conflicts(_epoch(start))
+
+    def _conflicts(self, ts: int) -> bool:
+        i = bisect_left(self._starts, ts - self.slot_seconds + 1)
+        return i < len(self._starts) and self._starts[i] < ts + self.slot_seconds
+
+    def reserve(self, start: datetime) -> bool:
+        """Claim a slot; False if it is not bookable or already taken."""
+        if not self.is_bookable(start):
+            self.rejected += 1
+            return False
+        ts = _epoch(start)
+        if self._conflicts(ts):
+            self.conflicts += 1
+            return False
+        insort(self._starts, ts)
+        self.version += 1
+        self.reservations += 1
+        return True
+
+    def release(self, start: datetime) -> None:
+        """Undo a reservation (e.g. when the booking could not be stored)."""
+        ts = _epoch(start)
+        i = bisect_left(self._starts, ts)
+        if i < len(self._starts) and self._starts[i] == ts:
+            del self._starts[i]
+            self.version += 1
+
+    def prune(self) -> int:
+        """Forget bookings that have already ended."""
+        cutoff = _epoch(self._clock()) - self.slot_seconds
+        i = bisect_left(self._starts, cutoff)
+        del self._starts[:i]
+        return i
+
+    # --- Slots ---
+
+    def _window(self) -> tuple:
+        now = self._clock()
+        return now + self.min_notice, now + self.horizon
+
+    def is_bookable(self, start: datetime) -> bool:
+        """Inside business hours, on the slot grid, and within notice/horizon."""
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        earliest, latest = self._window()
+        if not earliest <= start <= latest:
+            return False
+        local = start.astimezone(self.tz)
+        if local.weekday() not in self.days:
+            return False
+        opens = datetime.combine(local.date(), self.open, tzinfo=self.tz)
+        offset = _epoch(local) - _epoch(opens)
+        closes = datetime.combine(local.date(), self.close, tzinfo=self.tz)
+        return offset >= 0 and offset % self.slot_seconds == 0 and _epoch(local) + self.slot_seconds <= _epoch(closes)
+
+    def _day_slots(self, day: date) -> Iterator[datetime]:
+        opens = _epoch(datetime.combine(day, self.open, tzinfo=self.tz))
+        closes = _epoch(datetime.combine(day, self.close, tzinfo=self.tz))
+        for ts in range(opens, closes - self.slot_seconds + 1, self.slot_seconds):
+            yield datetime.fromtimestamp(ts, timezone.utc)
+
+    def free_slots(self, limit: Optional[int] = None, per_day: Optional[int] = None) -> List[datetime]:
+        """The next free slots (aware UTC), at most `per_day` per business day."""
+        limit = self.offer if limit is None else limit
+        per_day = self.offer_per_day if per_day is None else per_day
+        self.prune()
+        earliest, latest = self._window()
+        day = earliest.astimezone(self.tz).date()
+        last_day = latest.astimezone(self.tz).date()
+        found: List[datetime] = []
+        while day <= last_day and len(found) < limit:
+            if day.weekday() in self.days:
+                # Spread the offer: first free slot in each part of the day
+                slots = list(self._day_slots(day))
+                for part in range(per_day):
+                    for slot in slots[part * len(slots) // per_day:(part + 1) * len(slots) // per_day]:
+                        if earliest <= slot <= latest and not self._conflicts(_epoch(slot)):
+                            found.append(slot)
+                            break
+                    if len(found) == limit:
+                        break
+            day += timedelta(days=1)
+        return found
+
+    # --- Formatting ---
+
+    def format_slot(self, start: datetime) -> str:
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        return start.astimezone(self.tz).strftime(_DISPLAY_FORMAT)
+
+    def slot_id(self, start: datetime) -> str:
+        """Short stable ID for a slot start."""
+        number = _epoch(start) // 60
+        digits = ""
+        while True:
+            number, digit = divmod(number, 32)
+            digits = _ID_ALPHABET[digit] + digits
+            if not number:
+                break
+        return digits + _ID_ALPHABET[zlib.crc32(digits.encode()) % 32]
+
+    def slot_from_id(self, slot_id: str) -> datetime:
+        """Decode a slot ID back to its start (aware UTC); ValueError if malformed."""
+        token = slot_id.strip().upper()
+        if len(token) < 2 or any(c not in _ID_VALUES for c in token):
+            raise ValueError(f"Not a slot ID: {slot_id!r}")
+        digits, check = token[:-1], token[-1]
+        if _ID_ALPHABET[zlib.crc32(digits.encode()) % 32] != check:
+            raise ValueError(f"Not a slot ID: {slot_id!r}")
+        number = 0
+        for c in digits:
+            number = number * 32 + _ID_VALUES[c]
+        return datetime.fromtimestamp(number * 60, timezone.utc)
+
+    def resolve(self, slot: str) -> datetime:
+        """A slot ID, or (as a fallback) a time as written in the slot list."""
+        try:
+            return self.slot_from_id(slot)
+        except ValueError:
+            return self.parse_slot(slot)
+
+    def parse_slot(self, text: Union[str, datetime]) -> datetime:
+        """Read a slot time; naive text is business-local time. Returns aware UTC."""
+        if isinstance(text, datetime):
+            moment = text
+        else:
+            text = text.strip()
+            try:
+                moment = datetime.fromisoformat(text)
+            except ValueError:
+                moment = None
+                for fmt in _PARSE_FORMATS:
+                    try:
+                        moment = datetime.strptime(text, fmt)
+                        break
+                    except ValueError:
+                        continue
+            if moment is None:
+                raise ValueError(f"Unrecognised time: {text!r}")
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=self.tz)
+        return moment.astimezone(timezone.utc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "timezone": self.tz_name,
+            "indexed_bookings": len(self._starts),
+            "reservations": self.reservations,
+            "conflicts": self.conflicts,
+            "rejected": self.rejected,
+        }
+
+
+booking_calendar = BookingCalendar(
+    tz=os.getenv("BUSINESS_TIMEZONE", "UTC"),
+    hours=os.getenv("BUSINESS_HOURS", "09:00-17:00"),
+    days=os.getenv("BUSINESS_DAYS", "mon-fri"),
+    slot_minutes=int(os.getenv("SLOT_MINUTES", "30")),
+    horizon_days=int(os.getenv("BOOKING_HORIZON_DAYS", "14")),
+    min_notice_minutes=int(os.getenv("BOOKING_MIN_NOTICE_MINUTES", "120")),
+    offer=int(os.getenv("SLOTS_OFFERED", "6")),
+    offer_per_day=int(os.getenv("SLOTS_PER_DAY", "2")),
+)
+
+REGISTRY.gauge("delta_calendar_bookings", "Upcoming bookings in the availability index", lambda: len(booking_calendar))
+REGISTRY.gauge("delta_calendar_conflicts", "Booking attempts for a slot that was already taken",
+               lambda: booking_calendar.conflicts, kind="counter")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Availability index benchmark: loading, conflict checks, reservations and
+free-slot queries with tens of thousands of bookings, against a linear
+scan over the same bookings.
+
+Usage: python bench_availability.py --bookings 10000 50000 100000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from availability import BookingCalendar
+
+NOW = datetime(2025, 1, 6, 0, 0, tzinfo=timezone.utc)
+
+
+def _per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def run(bookings: int, calls: int) -> None:
+    # Around-the-clock hours and a long horizon so every booking fits on the grid
+    slot_minutes = 30
+    slots_per_day = 24 * 60 // slot_minutes
+    horizon_days = int(bookings / slots_per_day / 0.8) + 2  # ~80% of slots taken
+    calendar = BookingCalendar(hours="00:00-23:59", days="mon-sun", slot_minutes=slot_minutes,
+                               horizon_days=horizon_days, min_notice_minutes=0, clock=lambda: NOW)
+    rng = random.Random(42)
+    grid = rng.sample(range(1, horizon_days * slots_per_day - slots_per_day), bookings)
+    taken = [(NOW + timedelta(minutes=slot_minutes * i)).replace(tzinfo=None) for i in grid]
+
+    start = time.perf_counter()
+    calendar.load(taken)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    probes = [NOW + timedelta(minutes=slot_minutes * rng.randrange(1, len(grid))) for _ in range(calls)]
+    probe = iter(probes * 2)
+    check = _per_call(lambda: calendar.is_free(next(probe)), calls)
+
+    # Linear scan baseline (what a list of bookings without an index costs)
+    slot = timedelta(minutes=slot_minutes)
+    naive = [t.replace(tzinfo=timezone.utc) for t in taken]
+    probe = iter(probes)
+    scan_calls = max(1, calls // 100)
+    scan = _per_call(lambda: (lambda p: any(abs(b - p) < slot for b in naive))(next(probe)), scan_calls)
+
+    free = _per_call(lambda: calendar.free_slots(limit=6, per_day=2), calls // 10)
+
+    candidates = iter(probes)
+
+    def reserve():
+        when = next(candidates)
+        if calendar.reserve(when):
+            calendar.release(when)
+
+    book = _per_call(reserve, calls)
+
+    print(f"{bookings:>8} bookings  load {load_ms:7.1f} ms  "
+          f"conflict check {check * 1e6:6.2f} µs (scan {scan * 1e6:9.1f} µs)  "
+          f"reserve+release {book * 1e6:6.2f} µs  free_slots {free * 1e6:7.1f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Availability index benchmark")
+    parser.add_argument("--bookings", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    for n in args.bookings:
+        run(n, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Agent iterations per booking: slot IDs versus free-text times.
+
+Each run replays the booking turn of a conversation: the slot list is
+already in the history, the user picks one in their own words, and the
+agent has to call book_call_tool. Every LLM call is one agent iteration.
+
+"legacy" is the previous tool that took `selected_time` as free text;
+"slot-id" is the current book_call_tool. Offline, a scripted model stands
+in for the LLM: with free text it rephrases the time `--paraphrase-rate`
+of the time (the tool then rejects it and the model retries with the exact
+string from the error), with IDs it copies the ID. With --live the
+configured real provider is used instead.
+
+Usage:
+    python bench_booking.py --bookings 200 --paraphrase-rate 0.3
+    python bench_booking.py --live --bookings 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain.tools import tool
+
+import agent
+import metrics
+import tools
+from availability import booking_calendar, to_utc_naive
+from database import log_booking
+from fake_llm import FakeStreamingChatModel, tool_call
+
+
+@tool
+async def legacy_book_call_tool(name: str, email: str, selected_time: str, intent: str = "Discovery Call") -> str:
+    """
+    Books a meeting. Use this ONLY after the user selects a specific time.
+    Requires name, email, and the chosen time string.
+    """
+    try:
+        start = booking_calendar.parse_slot(selected_time)
+    except ValueError:
+        return f"Error booking call: could not read the time '{selected_time}'. Available slots:\n{_legacy_list()}"
+    if not booking_calendar.reserve(start):
+        return f"Error booking call: {selected_time} is not available. Available slots:\n{_legacy_list()}"
+    result = await log_booking(name, email, to_utc_naive(start), intent)
+    return f"Booking confirmed for {name} at {selected_time}. Reference: {result['callRequestId']}"
+
+
+legacy_book_call_tool.name = "book_call_tool"
+
+
+def _legacy_list() -> str:
+    return "\n".join(booking_calendar.format_slot(s) for s in booking_calendar.free_slots())
+
+
+def _paraphrase(shown: str, rng: random.Random) -> str:
+    """How a model might restate "2025-03-04 at 01:00 PM"."""
+    date, clock = shown.split(" at ")
+    hour, rest = clock.split(":")
+    minute, ampm = rest.split()
+    short = f"{int(hour)}{'' if minute == '00' else ':' + minute}{ampm.lower()}"
+    return rng.choice([f"{date} {short}", f"{date} at {short}", f"{date}, {int(hour)} {ampm}", f"{date} {clock.lower()}"])
+
+
+def scripted_model(mode: str, paraphrase_rate: float, rng: random.Random) -> FakeStreamingChatModel:
+    def respond(messages):
+        last = messages[-1]
+        if last.type == "tool":
+            if last.content.startswith("Booking confirmed"):
+                return "You're booked! You'll get a confirmation email shortly."
+            # Retry with an entry copied verbatim from the error's slot list
+            listed = last.content.split("Available slots:\n", 1)[1].splitlines()[0]
+            return tool_call("book_call_tool", name="Jane Doe", email="jane@example.com",
+                             **{_arg(mode): _pick(mode, listed)})
+        choice = int(re.search(r"option (\d+)", last.content, re.I).group(1))
+        listing = [m for m in messages if m.type == "ai" and "Available slots:" in m.content][-1].content
+        line = listing.split("Available slots:\n", 1)[1].splitlines()[choice - 1]
+        value = _pick(mode, line)
+        if mode == "legacy" and rng.random() < paraphrase_rate:
+            value = _paraphrase(value, rng)
+        return tool_call("book_call_tool", name="Jane Doe", email="jane@example.com", **{_arg(mode): value})
+
+    return FakeStreamingChatModel(responder=respond)
+
+
+def _arg(mode: str) -> str:
+    return "selected_time" if mode == "legacy" else "slot_id"
+
+
+def _pick(mode: str, line: str) -> str:
+    if mode == "legacy":
+        return line.split(" (ID:")[0]
+    return re.search(r"\(ID: (\w+)\)", line).group(1)
+
+
+async def measure(mode: str, bookings: int, llm) -> float:
+    book_tool = legacy_book_call_tool if mode == "legacy" else tools.book_call_tool
+    agent_tools = [tools.save_lead_tool, tools.get_available_slots_tool, book_tool]
+    # Terminal tools would end only the slot-ID runs early; compare like with like
+    executor = agent.build_agent_executor(llm, agent_tools=agent_tools, terminal_tools=())
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.max_size = 0
+    agent.intent_router.threshold = float("inf")
+
+    rng = random.Random(7)
+    calls = 0
+    for _ in range(bookings):
+        booking_calendar.load([])
+        listing = "Available slots:\n" + (_legacy_list() if mode == "legacy" else tools._slot_list())
+        choice = rng.randint(1, len(booking_calendar.free_slots()))
+        messages = [
+            {"role": "user", "content": "I'm Jane Doe, jane@example.com. When can we talk?"},
+            {"role": "assistant", "content": f"{listing}\n\nWhich time works best for you?"},
+            {"role": "user", "content": f"Option {choice} please" if llm.__class__ is FakeStreamingChatModel
+             else f"Let's do option {choice} from that list."},
+        ]
+        before = metrics.LLM_CALLS.value(status="ok") + metrics.LLM_CALLS.value(status="error")
+        reply = await agent.run_agent(messages)
+        calls += metrics.LLM_CALLS.value(status="ok") + metrics.LLM_CALLS.value(status="error") - before
+        if not booking_calendar.stats()["indexed_bookings"]:
+            logging.getLogger(__name__).warning(f"{mode}: booking did not complete: {reply[:80]}")
+    booking_calendar.load([])
+    return calls / bookings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent iterations per booking")
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--paraphrase-rate", type=float, default=0.3,
+                        help="offline only: share of free-text times the model rephrases")
+    parser.add_argument("--live", action="store_true", help="use the configured LLM provider")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = {}
+    for mode in ("legacy", "slot-id"):
+        llm = agent.get_llm() if args.live else scripted_model(mode, args.paraphrase_rate, random.Random(1))
+        results[mode] = asyncio.run(measure(mode, args.bookings, llm))
+
+    source = "live provider" if args.live else f"scripted model, paraphrase rate {args.paraphrase_rate:.0%}"
+    print(f"{args.bookings} bookings ({source})")
+    for mode, avg in results.items():
+        print(f"  {mode:<8} {avg:.2f} LLM calls per booking")
+    drop = (results["legacy"] - results["slot-id"]) / results["legacy"]
+    print(f"  drop     {drop:.1%}")
+
+
+if __name__ == "__main__":
+    main()
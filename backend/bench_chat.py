@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the chat backend.
+
+Starts the FastAPI app under uvicorn (in a background thread) with a
+deterministic fake LLM, drives /api/chat with concurrent multi-turn
+conversations, and reports latency percentiles, time-to-first-byte,
+throughput and peak RSS. Results are written as JSON so runs can be
+compared between commits.
+
+Usage:
+    python bench_chat.py --concurrency 20 --conversations 100 --turns 4
+    python bench_chat.py --output new.json --compare old.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+import uvicorn
+
+import agent
+import main
+from fake_llm import FakeStreamingChatModel, tool_call
+
+# One scripted sales conversation; turn i asks for SCRIPT[i % len(SCRIPT)]
+SCRIPT = [
+    ("What does Ctrl. Alt. Delta do?", None),
+    ("Could you check the calendar for me?", "get_available_slots_tool"),
+    ("I'm Jane Doe, reach me at jane@example.com", "save_lead_tool"),
+    ("How do your AI agents handle follow-ups?", None),
+]
+REPLY = "Happy to help! We design AI agents that qualify leads and book calls for busy teams. "
+
+
+def scripted_responder(messages) -> Any:
+    """Deterministic fake model: one tool call when the turn needs it, then text."""
+    last = messages[-1]
+    if last.type == "tool":
+        return REPLY * 2
+    for text, tool in SCRIPT:
+        if tool and last.type == "human" and last.content == text:
+            if tool == "save_lead_tool":
+                return tool_call(tool, name="Jane Doe", email="jane@example.com")
+            return tool_call(tool)
+    return REPLY * 3
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(max(values, default=0.0) * 1000, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+class BenchServer:
+    """uvicorn serving main.app on its own thread and event loop."""
+
+    def __init__(self, port: int):
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "BenchServer":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def _conversation(client: httpx.AsyncClient, turns: int, session: bool, samples: Dict[str, list]) -> None:
+    history: List[Dict[str, str]] = []
+    session_id = None
+    for turn in range(turns):
+        text = SCRIPT[turn % len(SCRIPT)][0]
+        if session:
+            payload = {"message": text, "session_id": session_id}
+        else:
+            history.append({"role": "user", "content": text})
+            payload = {"messages": history}
+
+        start = time.perf_counter()
+        first_byte = None
+        body = []
+        async with client.stream("POST", "/api/chat", json=payload) as response:
+            async for chunk in response.aiter_text():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                body.append(chunk)
+        elapsed = time.perf_counter() - start
+
+        if response.status_code != 200:
+            samples["errors"].append(response.status_code)
+            return
+        samples["latency"].append(elapsed)
+        samples["ttfb"].append(first_byte if first_byte is not None else elapsed)
+        reply = "".join(body)
+        if session:
+            session_id = response.headers.get("X-Session-Id")
+        else:
+            history.append({"role": "assistant", "content": reply})
+
+
+async def _drive(base_url: str, concurrency: int, conversations: int, turns: int, session: bool) -> Dict[str, Any]:
+    samples: Dict[str, list] = {"latency": [], "ttfb": [], "errors": []}
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(conversations):
+        queue.put_nowait(None)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                await _conversation(client, turns, session, samples)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = time.perf_counter() - start
+
+    requests = len(samples["latency"])
+    return {
+        "requests": requests,
+        "errors": len(samples["errors"]),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "latency": _summary(samples["latency"]),
+        "ttfb": _summary(samples["ttfb"]),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    logging.disable(logging.INFO)
+    llm = FakeStreamingChatModel(responder=scripted_responder, latency=args.llm_latency, token_delay=args.token_delay)
+    executor = agent.build_agent_executor(llm)
+    executor.verbose = False
+    agent._agent_executor = executor
+    if not args.cache:
+        agent.response_cache.max_size = 0
+    if not args.fast_path:
+        agent.intent_router.threshold = float("inf")
+    # The scripted conversations repeat the same turns: coalescing them would
+    # measure one shared run per batch instead of the agent
+    main.single_flight.enabled = args.single_flight
+    main.admission.max_concurrency = max(main.admission.max_concurrency, args.concurrency)
+
+    port = _free_port()
+    with BenchServer(port):
+        results = asyncio.run(_drive(
+            f"http://127.0.0.1:{port}", args.concurrency, args.conversations, args.turns, args.session,
+        ))
+
+    return {
+        "benchmark": "chat",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "conversations": args.conversations,
+            "turns": args.turns,
+            "session_mode": args.session,
+            "llm_latency_s": args.llm_latency,
+            "token_delay_s": args.token_delay,
+            "response_cache": args.cache,
+            "intent_fast_path": args.fast_path,
+            "single_flight": args.single_flight,
+        },
+        "results": results,
+        # ru_maxrss is KiB on Linux; includes the load generator (same process)
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    print(f"\nCompared with {old.get('commit', '?')} ({old.get('timestamp', '?')}):")
+    changed = sorted(key for key in set(old.get("config", {})) | set(new["config"])
+                     if old.get("config", {}).get(key) != new["config"].get(key))
+    if changed:
+        print(f"  Warning: settings differ ({', '.join(changed)}); results are not directly comparable")
+    rows = [
+        ("throughput_rps", old["results"]["throughput_rps"], new["results"]["throughput_rps"]),
+        ("peak_rss_mb", old["peak_rss_mb"], new["peak_rss_mb"]),
+    ]
+    for metric in ("latency", "ttfb"):
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            rows.append((f"{metric}.{key}", old["results"][metric][key], new["results"][metric][key]))
+    for name, before, after in rows:
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:<18}{before:>10}{after:>10}{change:>+9.1f}%")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Offline load test for /api/chat")
+    parser.add_argument("--concurrency", type=int, default=20, help="conversations in flight")
+    parser.add_argument("--conversations", type=int, default=100, help="total conversations")
+    parser.add_argument("--turns", type=int, default=4, help="user turns per conversation")
+    parser.add_argument("--session", action="store_true", help="use session mode instead of full history")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    parser.add_argument("--token-delay", type=float, default=0.001, help="fake LLM delay per token (s)")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--fast-path", action="store_true", help="keep the intent fast path enabled")
+    parser.add_argument("--single-flight", action="store_true", help="keep identical concurrent requests coalesced")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON report")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    r = report["results"]
+    print(f"{r['requests']} requests, {r['errors']} errors in {r['wall_seconds']}s "
+          f"({r['throughput_rps']} req/s), peak RSS {report['peak_rss_mb']} MB")
+    print(f"latency  {r['latency']}")
+    print(f"ttfb     {r['ttfb']}")
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main_cli()
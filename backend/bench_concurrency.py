@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: how many conversations one worker holds at once.
+
+Drives /api/chat in-process (single event loop, like one uvicorn worker)
+against a stub LLM with fixed latency, and compares the native async agent
+path with the legacy `run_in_executor(None, executor.invoke)` path.
+
+Usage: python bench_concurrency.py [--latency 0.5] [--levels 10 50 200 500]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import main
+from fake_llm import FakeStreamingChatModel
+
+PAYLOAD = {"messages": [{"role": "user", "content": "What do you do?"}]}
+
+
+async def _threaded_run_agent(messages: list) -> str:
+    """The pre-async implementation: one default-pool thread per chat."""
+    user_input, chat_history = agent.parse_messages(messages)
+    executor = agent.get_agent_executor()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        None,
+        lambda: executor.invoke({"input": user_input, "chat_history": chat_history})
+    )
+    return result["output"]
+
+
+async def _legacy_chat(messages: list, **kwargs):
+    yield await _threaded_run_agent(messages)
+
+
+async def _drive(conversations: int) -> tuple:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/chat", json=PAYLOAD, timeout=None)
+            for _ in range(conversations)
+        ])
+        elapsed = time.perf_counter() - start
+    rejected = sum(r.status_code == 503 for r in responses)
+    assert all(r.status_code in (200, 503) for r in responses)
+    return elapsed, rejected
+
+
+def run(latency: float, levels: list) -> None:
+    logging.disable(logging.INFO)
+    llm = FakeStreamingChatModel(responses=["We build AI agents for sales teams."], latency=latency)
+    executor = agent.build_agent_executor(llm)
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.max_size = 0  # measure the agent, not the cache
+    # Admit every conversation at once: this measures the agent path, not load shedding
+    main.admission.max_concurrency = max(main.admission.max_concurrency, max(levels))
+    main.single_flight.enabled = False  # every request sends PAYLOAD: one run each, not one shared run
+
+    native_stream = agent.stream_agent
+    print(f"Stub LLM latency: {latency * 1000:.0f} ms")
+    print(f"{'mode':<10}{'convs':>8}{'wall (s)':>12}{'concurrency':>14}{'503s':>7}")
+    for mode in ("async", "threaded"):
+        agent.stream_agent = native_stream if mode == "async" else _legacy_chat
+        for conversations in levels:
+            elapsed, rejected = asyncio.run(_drive(conversations))
+            # Effective concurrency: LLM-seconds served per wall-clock second
+            concurrency = (conversations - rejected) * latency / elapsed
+            print(f"{mode:<10}{conversations:>8}{elapsed:>12.2f}{concurrency:>14.1f}{rejected:>7}")
+    agent.stream_agent = native_stream
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 50, 200, 500])
+    args = parser.parse_args()
+    run(args.latency, args.levels)
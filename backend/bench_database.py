@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Insert throughput for save_lead: a fresh connection per insert, the shared
+pool at several sizes, and the write-behind queue (batched COPY).
+
+With DATABASE_URL set, runs against that Postgres inside a throwaway schema
+(dropped afterwards). Otherwise uses fake_db.StandInPool, which simulates a
+round trip per query and a connection setup cost.
+
+Usage:
+    python bench_database.py --inserts 2000 --concurrency 50
+    python bench_database.py --rtt 0.001 --connect-cost 0.02   # stand-in only
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import asyncpg
+
+import database
+from database import PostgresRepository
+from fake_db import StandInPool
+from writebehind import WriteBehindQueue
+
+SCHEMA = f"bench_{os.getpid()}"
+TABLES = """
+CREATE TABLE leads (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, details TEXT,
+    source TEXT NOT NULL DEFAULT 'delta-1-chat', created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ON leads (email);
+CREATE INDEX ON leads (created_at);
+"""
+
+
+async def _drive(inserts: int, concurrency: int) -> float:
+    """Run `inserts` save_lead calls with `concurrency` workers; return inserts/s."""
+    remaining = iter(range(inserts))
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        for i in remaining:
+            result = await database.save_lead(f"Lead {i}", f"lead{i}@example.com", "benchmark")
+            failures += not result["success"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise RuntimeError(f"{failures} inserts failed")
+    return inserts / elapsed
+
+
+async def _drive_write_behind(repository, inserts: int, concurrency: int, batch: int) -> tuple:
+    """Throughput including the final drain, plus the worst save_lead ack time."""
+    database.set_repository(repository)
+    queue = WriteBehindQueue(repository.insert_many, max_batch=batch, max_pending=inserts)
+    database.start_write_queue(queue)
+    start = time.perf_counter()
+    await _drive(inserts, concurrency)
+    acked = time.perf_counter() - start
+    await database.stop_write_queue()
+    elapsed = time.perf_counter() - start
+    if queue.flushed != inserts:
+        raise RuntimeError(f"only {queue.flushed} of {inserts} rows flushed")
+    return inserts / elapsed, acked / inserts
+
+
+def _report_write_behind(batch: int, result: tuple) -> None:
+    rate, ack = result
+    print(f"{f'write-behind (batch {batch})':<26}{rate:>10.0f} inserts/s  (ack {ack * 1e6:.0f} µs/insert)")
+
+
+class ConnectPerInsert:
+    """Pool-shaped wrapper that opens a new connection for every query."""
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    async def execute(self, query, *args):
+        conn = await self.connect()
+        try:
+            return await conn.execute(query, *args)
+        finally:
+            await conn.close()
+
+
+async def bench_postgres(url: str, args) -> None:
+    setup = {"server_settings": {"search_path": SCHEMA}}
+    admin = await asyncpg.connect(url)
+    await admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        await admin.execute(f"SET search_path TO {SCHEMA}; {TABLES}")
+
+        unpooled_n = min(args.inserts, 200)
+        database.set_repository(PostgresRepository(ConnectPerInsert(lambda: asyncpg.connect(url, **setup))))
+        rate = await _drive(unpooled_n, min(args.concurrency, 20))
+        print(f"{'connect per insert':<26}{rate:>10.0f} inserts/s  ({unpooled_n} inserts)")
+
+        for size in args.pool_sizes:
+            pool = await asyncpg.create_pool(url, min_size=size, max_size=size, **setup)
+            database.set_repository(PostgresRepository(pool))
+            rate = await _drive(args.inserts, args.concurrency)
+            await pool.close()
+            print(f"{f'pool size {size}':<26}{rate:>10.0f} inserts/s")
+
+        size = max(args.pool_sizes)
+        pool = await asyncpg.create_pool(url, min_size=size, max_size=size, **setup)
+        result = await _drive_write_behind(PostgresRepository(pool), args.inserts, args.concurrency, args.batch)
+        await pool.close()
+        _report_write_behind(args.batch, result)
+    finally:
+        await admin.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        await admin.close()
+
+
+async def bench_stand_in(args) -> None:
+    unpooled_n = min(args.inserts, 500)
+
+    async def connect():
+        # A one-connection pool behaves like a bare connection (execute/close)
+        return StandInPool(max_size=1, rtt=args.rtt, connect_cost=args.connect_cost)
+
+    database.set_repository(PostgresRepository(ConnectPerInsert(connect)))
+    rate = await _drive(unpooled_n, args.concurrency)
+    print(f"{'connect per insert':<26}{rate:>10.0f} inserts/s  ({unpooled_n} inserts)")
+
+    for size in args.pool_sizes:
+        database.set_repository(PostgresRepository(
+            StandInPool(max_size=size, rtt=args.rtt, connect_cost=args.connect_cost)
+        ))
+        rate = await _drive(args.inserts, args.concurrency)
+        print(f"{f'pool size {size}':<26}{rate:>10.0f} inserts/s")
+
+    repository = PostgresRepository(
+        StandInPool(max_size=max(args.pool_sizes), rtt=args.rtt, connect_cost=args.connect_cost)
+    )
+    _report_write_behind(args.batch, await _drive_write_behind(repository, args.inserts, args.concurrency, args.batch))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="save_lead insert throughput")
+    parser.add_argument("--inserts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--batch", type=int, default=100, help="write-behind batch size")
+    parser.add_argument("--rtt", type=float, default=0.001, help="stand-in round trip (s)")
+    parser.add_argument("--connect-cost", type=float, default=0.02, help="stand-in connection setup (s)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    url = os.getenv("DATABASE_URL")
+    if url:
+        print(f"Postgres at {url.split('@')[-1]}, {args.concurrency} concurrent writers")
+        asyncio.run(bench_postgres(url, args))
+    else:
+        print(f"DATABASE_URL not set: in-process stand-in (rtt {args.rtt * 1000:.1f} ms, "
+              f"connect {args.connect_cost * 1000:.0f} ms), {args.concurrency} concurrent writers")
+        asyncio.run(bench_stand_in(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Prompt-size benchmark for history windowing.
+
+Grows a synthetic conversation turn by turn (the way session mode does) and
+reports the estimated prompt tokens sent to the model with and without the
+token-budgeted window, plus the per-turn compaction cost.
+
+Usage: python bench_history.py [--turns 200] [--budget 2000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from history import HistoryWindow, message_tokens
+
+
+def user_turn(i):
+    return {"role": "user", "content": f"Turn {i}: here is more about our project, goals and timeline. " * 3}
+
+
+def assistant_turn(i):
+    return {"role": "assistant", "content": f"Reply {i}: thanks, that helps. Could you share a bit more? " * 3}
+
+
+async def run(turns: int, budget: int) -> None:
+    window = HistoryWindow(budget_tokens=budget)
+    history = []
+    print(f"Token budget: {budget}")
+    print(f"{'turn':>6}{'full prompt':>14}{'windowed':>12}{'compact (ms)':>15}")
+    for i in range(1, turns + 1):
+        messages = history + [user_turn(i)]
+        start = time.perf_counter()
+        windowed = await window.compact(messages, key="bench")
+        elapsed = (time.perf_counter() - start) * 1000
+        if i in (1, 5, 10) or i % 25 == 0:
+            print(f"{i:>6}{message_tokens(messages):>14}{message_tokens(windowed):>12}{elapsed:>15.3f}")
+        history = messages + [assistant_turn(i)]
+    print(f"Stats: {window.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.budget))
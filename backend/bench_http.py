@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Per-call HTTP overhead: cold clients vs the shared connection pool.
+
+Starts a local stub of an OpenAI-style chat completions endpoint (HTTP/1.1
+keep-alive, TLS with a throwaway self-signed certificate unless --plain)
+and times the same POST three ways:
+
+    new client     a fresh AsyncClient per call (client setup + TCP + TLS)
+    no keep-alive  one client, but every call opens a new connection
+    pooled         the shared LLMHttpPool, connections reused
+
+The stub answers after --server-ms, so per-call time minus that is client
+and connection overhead. "new client" includes building the client's SSL
+context; with --plain that is the full certifi CA bundle, as for a real
+provider, while the TLS run only loads the stub's certificate. On loopback
+TCP connect costs next to nothing; against a real provider each new
+connection adds about one round trip for TCP and one or two for TLS on top
+of the handshake CPU time shown here.
+
+Usage:
+    python bench_http.py --calls 200 --server-ms 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from http_pool import LLMHttpPool
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "OK"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 1, "total_tokens": 13},
+}).encode()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, server_delay: float) -> None:
+    """Minimal HTTP/1.1 keep-alive server: read a request, answer, repeat."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(server_delay)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\nConnection: keep-alive\r\n\r\n%s" % (len(COMPLETION), COMPLETION))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def self_signed(directory: str):
+    """(server SSLContext, CA file for the client) using the openssl CLI."""
+    if shutil.which("openssl") is None:
+        sys.exit("openssl not found: run with --plain")
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1", "-nodes",
+         "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context, cert
+
+
+async def timed_calls(pool_for_call, url: str, calls: int) -> list:
+    body = {"model": "stub", "messages": [{"role": "user", "content": "Reply with OK."}]}
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        pool = pool_for_call()
+        response = await pool.client().post(url, json=body)
+        response.read()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        server_ssl, ca_file = (None, True) if args.plain else self_signed(directory)
+        server = await asyncio.start_server(lambda r, w: handle(r, w, args.server_ms / 1000),
+                                            "127.0.0.1", 0, ssl=server_ssl)
+        port = server.sockets[0].getsockname()[1]
+        scheme = "http" if args.plain else "https"
+        url = f"{scheme}://{'127.0.0.1' if args.plain else 'localhost'}:{port}/v1/chat/completions"
+
+        # Imports, the server and the first handshake code paths
+        warm = LLMHttpPool(verify=ca_file)
+        await timed_calls(lambda: warm, url, 3)
+        await warm.aclose()
+
+        cold_pools = []
+
+        def new_client():
+            pool = LLMHttpPool(verify=ca_file)
+            cold_pools.append(pool)
+            return pool
+
+        no_keepalive = LLMHttpPool(max_keepalive=0, verify=ca_file)
+        pooled = LLMHttpPool(verify=ca_file)
+
+        results = {}
+        for label, pool_for_call, pools in (
+            ("new client", new_client, cold_pools),
+            ("no keep-alive", lambda: no_keepalive, [no_keepalive]),
+            ("pooled", lambda: pooled, [pooled]),
+        ):
+            timings = await timed_calls(pool_for_call, url, args.calls)
+            for pool in pools:
+                await pool.aclose()
+            results[label] = (timings, pools)
+
+        server.close()
+        await server.wait_closed()
+
+    server_s = args.server_ms / 1000
+    print(f"{args.calls} sequential calls to a local {scheme.upper()} stub answering in {args.server_ms:.0f}ms")
+    print(f"  {'':<15}{'p50 ms':>8}{'p95 ms':>8}{'overhead':>10}{'new conns':>11}{'tcp ms':>8}{'tls ms':>8}")
+    for label, (timings, pools) in results.items():
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        new = sum(p.new_connections for p in pools)
+        phase = {}
+        for name in ("tcp", "tls"):
+            count = sum(p.phase_count[name] for p in pools)
+            phase[name] = f"{1000 * sum(p.phase_seconds[name] for p in pools) / count:.2f}" if count else "-"
+        print(f"  {label:<15}{p50 * 1000:>8.2f}{p95 * 1000:>8.2f}{(p50 - server_s) * 1000:>10.2f}"
+              f"{new:>11}{phase['tcp']:>8}{phase['tls']:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold vs pooled per-call HTTP overhead")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--server-ms", type=float, default=5.0, help="stub server think time per call")
+    parser.add_argument("--plain", action="store_true", help="plain HTTP instead of TLS")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Startup cost and where the first request's latency goes.
+
+1. Import-time breakdown (`python -X importtime`) of `main` and `agent`,
+   grouped by top-level package.
+2. For each AGENT_WARMUP mode, a fresh process imports main, runs the app
+   lifespan, then does what the first /api/chat would still have to do
+   (import agent, build the executor). The children run Groq, the provider
+   that uses the shared HTTP pool, with connection warm-up pointed at a
+   local HTTP stand-in (LLM_WARMUP_URL) so no API key or network is needed.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --top 15 --runs 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("off", "build", "connect")
+
+
+def import_times(module: str) -> Tuple[float, Dict[str, float]]:
+    """Total cumulative import time of `module` and self time per top-level package (seconds)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, env=_child_env(),
+    )
+    per_package: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1e6
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, per_package
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _child_env(**extra: str) -> Dict[str, str]:
+    env = dict(os.environ, **extra)
+    # The clients only check that a key is present when they are built
+    env.setdefault("GOOGLE_API_KEY", "bench-placeholder")
+    env.setdefault("GROQ_API_KEY", "bench-placeholder")
+    # LLM_WARMUP_URL only warms the shared pool, which Gemini does not use
+    env["LLM_PROVIDERS"] = "groq"
+    env.pop("DATABASE_URL", None)
+    return env
+
+
+def child(mode: str) -> None:
+    """Runs in a fresh interpreter: report startup and first-request costs as JSON."""
+    sys.path.insert(0, HERE)
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter() - start
+
+    async def scenario():
+        lifespan_start = time.perf_counter()
+        async with main.lifespan(main.app):
+            startup = time.perf_counter() - lifespan_start
+            # What the first /api/chat does before it can call the model
+            first_start = time.perf_counter()
+            import agent
+            agent.get_agent_executor()
+            return startup, time.perf_counter() - first_start
+
+    startup, first_request = asyncio.run(scenario())
+    print(json.dumps({"import_main": imported, "startup": startup, "first_request": first_request,
+                      "warmup": main.readiness["warmup"]}))
+
+
+def measure(mode: str, url: str, runs: int) -> Dict[str, float]:
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode],
+            cwd=HERE, capture_output=True, text=True,
+            env=_child_env(AGENT_WARMUP=mode, LLM_WARMUP_URL=url),
+        )
+        if proc.returncode:
+            raise RuntimeError(f"{mode} run failed:\n{proc.stderr[-2000:]}")
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    keys = ("import_main", "startup", "first_request")
+    return {key: sorted(s[key] for s in samples)[len(samples) // 2] for key in keys}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup and first-request cost")
+    parser.add_argument("--top", type=int, default=10, help="packages to list in the import breakdown")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per warm-up mode (median reported)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    for module in ("main", "agent"):
+        total, per_package = import_times(module)
+        print(f"import {module}: {total * 1000:.0f}ms")
+        for package, seconds in sorted(per_package.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {package:<28}{seconds * 1000:>8.1f}ms")
+        print()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        print(f"{'AGENT_WARMUP':<14}{'import main':>12}{'startup':>10}{'1st request':>13}")
+        for mode in MODES:
+            r = measure(mode, url, args.runs)
+            print(f"{mode:<14}{r['import_main'] * 1000:>10.0f}ms{r['startup'] * 1000:>8.0f}ms"
+                  f"{r['first_request'] * 1000:>11.0f}ms")
+    finally:
+        server.shutdown()
+    print("\n'1st request' is setup the first /api/chat pays before its LLM call.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+LLM calls saved by terminal tools.
+
+Replays lead-capture and booking turns through the agent with a counting
+fake LLM (fixed per-call latency), once with the final summarisation call
+after book_call_tool/save_lead_tool and once with TERMINAL_TOOLS (only the
+booking by default; set TERMINAL_TOOLS=book_call_tool,save_lead_tool to
+include lead saves), and reports LLM calls and wall time per turn.
+
+Usage:
+    python bench_terminal.py --turns 50 --latency 0.4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from availability import booking_calendar
+from fake_llm import FakeStreamingChatModel, tool_call
+from terminal import TERMINAL_TOOLS
+
+
+def responder(messages):
+    """One tool call per turn, then a short confirmation if asked again."""
+    last = messages[-1]
+    if last.type == "tool":
+        return "You're all set! Anything else I can help with?"
+    if last.content.startswith("Book "):
+        return tool_call("book_call_tool", name="Jane Doe", email="jane@example.com", slot_id=last.content.split()[1])
+    return tool_call("save_lead_tool", name="Jane Doe", email="jane@example.com")
+
+
+async def run(turns: int, latency: float, terminal_tools) -> dict:
+    llm = FakeStreamingChatModel(responder=responder, latency=latency)
+    executor = agent.build_agent_executor(llm, terminal_tools=terminal_tools)
+    executor.verbose = False
+    agent._agent_executor = executor
+
+    elapsed = 0.0
+    for i in range(turns):
+        booking_calendar.load([])
+        if i % 2:
+            text = f"Book {booking_calendar.slot_id(booking_calendar.free_slots(limit=1)[0])} please"
+        else:
+            text = "Please note down Jane Doe, jane@example.com"
+        start = time.perf_counter()
+        await agent.run_agent([{"role": "user", "content": text}])
+        elapsed += time.perf_counter() - start
+    booking_calendar.load([])
+    return {"calls": llm.calls / turns, "seconds": elapsed / turns}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM calls saved by terminal tools")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds per fake LLM call")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    agent.response_cache.max_size = 0
+
+    before = asyncio.run(run(args.turns, args.latency, terminal_tools=()))
+    after = asyncio.run(run(args.turns, args.latency, terminal_tools=TERMINAL_TOOLS))
+
+    print(f"{args.turns} lead/booking turns, {args.latency * 1000:.0f}ms per LLM call")
+    print(f"  {'':<16}{'LLM calls/turn':>16}{'ms/turn':>10}")
+    print(f"  {'model summary':<16}{before['calls']:>16.2f}{before['seconds'] * 1000:>10.0f}")
+    print(f"  {'terminal tools':<16}{after['calls']:>16.2f}{after['seconds'] * 1000:>10.0f}")
+    print(f"  saved {before['calls'] - after['calls']:.2f} calls and "
+          f"{(before['seconds'] - after['seconds']) * 1000:.0f}ms per turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tool calls under concurrency: blocking sync tools vs coroutine tools.
+
+Fires N concurrent save_lead_tool calls against a repository with a fixed
+write latency, the way concurrent agent turns would. The "sync" row is a
+blocking implementation (a sync driver), which LangChain's `ainvoke` hands
+to the event loop's worker threads; the "async" row is the coroutine tool
+from tools.py. Reports wall time, per-call latency and how many worker
+threads were tied up.
+
+Usage:
+    python bench_tools.py --calls 64 --latency 0.05 --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain_core.tools import StructuredTool
+
+import database
+import tools
+from database import InMemoryRepository
+
+
+class SlowRepository(InMemoryRepository):
+    """In-memory rows, each insert taking `latency` seconds of (awaited) I/O."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.threads = set()
+
+    async def insert_lead(self, *row):
+        self.threads.add(threading.get_ident())
+        await asyncio.sleep(self.latency)
+        await super().insert_lead(*row)
+
+
+def blocking_tool(latency: float, threads: set) -> StructuredTool:
+    """save_lead_tool as it would look on a blocking database driver."""
+
+    def save_lead_tool(name: str, email: str, details: str = "General Inquiry") -> str:
+        """Saves a user's contact information (lead) to the database."""
+        threads.add(threading.get_ident())
+        time.sleep(latency)
+        return f"Successfully saved lead for {name}."
+
+    return StructuredTool.from_function(save_lead_tool)
+
+
+async def run(tool: StructuredTool, calls: int, workers: int) -> dict:
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+    latencies = []
+
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        await tool.ainvoke({"name": f"Lead {i}", "email": f"lead{i}@example.com"})
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(calls)])
+    latencies.sort()
+    return {
+        "wall": time.perf_counter() - start,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Blocking vs coroutine tool calls under concurrency")
+    parser.add_argument("--calls", type=int, default=64, help="concurrent tool calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds of database I/O per call")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads in the loop's executor")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    sync_threads = set()
+    sync = asyncio.run(run(blocking_tool(args.latency, sync_threads), args.calls, args.workers))
+
+    repository = SlowRepository(args.latency)
+    previous = database.get_repository()
+    database.set_repository(repository)
+    try:
+        native = asyncio.run(run(tools.save_lead_tool, args.calls, args.workers))
+    finally:
+        database.set_repository(previous)
+    main_thread = threading.get_ident()
+    async_threads = {t for t in repository.threads if t != main_thread}
+
+    print(f"{args.calls} concurrent save_lead_tool calls, {args.latency * 1000:.0f}ms I/O each, "
+          f"{args.workers} worker threads")
+    print(f"  {'':<8}{'wall ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'threads used':>14}")
+    for label, result, threads in (("sync", sync, sync_threads), ("async", native, async_threads)):
+        print(f"  {label:<8}{result['wall'] * 1000:>10.0f}{result['p50'] * 1000:>10.0f}"
+              f"{result['p95'] * 1000:>10.0f}{len(threads):>14}")
+
+
+if __name__ == "__main__":
+    main()
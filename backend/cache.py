@@ -0,0 +1,109 @@
+"""
+LRU + TTL response cache for repeated conversations.
+
+Most first turns are the same handful of questions ("what do you do?",
+"pricing?"). Answers to turns that did not call a tool depend only on the
+conversation text and the system prompt, so they can be replayed without
+another LLM round trip.
+"""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+def conversation_key(messages: List[Dict[str, str]]) -> str:
+    """Stable hash of the normalized conversation."""
+    canonical = "\x1e".join(
+        f"{msg.get('role', '')}:{normalize(msg.get('content', ''))}" for msg in messages
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Bounded LRU map of conversation key -> final answer, with per-entry TTL.
+
+    Entries are tied to a system prompt version; `sync_prompt()` drops every
+    entry as soon as the prompt the agent runs with changes.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.prompt_version: Optional[str] = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def sync_prompt(self, version: str) -> None:
+        """Invalidate everything if the system prompt changed."""
+        if version != self.prompt_version:
+            if self.prompt_version is not None:
+                self.invalidate()
+            self.prompt_version = version
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self.invalidations += 1
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
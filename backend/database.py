@@ -1,41 +1,298 @@
 """
-Database operations - Mock implementation
+Database operations - PostgreSQL via a shared asyncpg pool
 
-In production, this would connect to a real database (Prisma/PostgreSQL).
-Currently using in-memory mock for development.
+Tables are the ones defined in prisma/schema.prisma (`leads`,
+`call_requests`). The pool is opened once by `connect_db()` in the FastAPI
+lifespan and shared by every request. Inserts go through asyncpg's
+per-connection statement cache, so each connection prepares them once and
+afterwards only sends Bind/Execute.
+
+Rows are written behind the request by default: the ID is generated
+here, the row is queued and the tool returns immediately; a background
+task COPYs queued rows in batches (see writebehind.py). Without a running
+queue (e.g. outside the app lifespan) writes happen inline.
+
+Without DATABASE_URL the module falls back to an in-memory repository so
+the agent still runs in development and offline tests.
 """
-import asyncio
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any
+import os
+import time
 import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from metrics import REGISTRY
+from writebehind import WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "5"))
+# Set to 0 behind PgBouncer in transaction mode (prepared statements can't be reused there)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "100"))
+DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "0.05"))
+DB_WRITE_QUEUE_MAX = int(os.getenv("DB_WRITE_QUEUE_MAX", "10000"))
+
+LEADS = "leads"
+CALL_REQUESTS = "call_requests"
+LEAD_COLUMNS = ("id", "name", "email", "details")
+BOOKING_COLUMNS = ("id", "name", "email", "intent", "selected_time", "status", "booking_link")
+
+INSERT_LEAD = f"INSERT INTO {LEADS} ({', '.join(LEAD_COLUMNS)}) VALUES ($1, $2, $3, $4)"
+INSERT_BOOKING = (
+    f"INSERT INTO {CALL_REQUESTS} ({', '.join(BOOKING_COLUMNS)}) "
+    "VALUES ($1, $2, $3, $4, $5, $6, $7)"
+)
+SELECT_BOOKED_TIMES = (
+    f"SELECT selected_time FROM {CALL_REQUESTS} "
+    "WHERE selected_time >= $1 AND status <> 'cancelled' ORDER BY selected_time"
+)
+
+QUERY_SECONDS = REGISTRY.histogram("delta_db_query_seconds", "Duration of database writes", ["op"])
+QUERY_ERRORS = REGISTRY.counter("delta_db_query_errors", "Failed database writes", ["op"])
+
+_TIME_FORMATS = ("%Y-%m-%d at %I:%M %p", "%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M")
+
+
+def parse_selected_time(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Parse a slot time ("2025-01-31 at 10:00 AM" or ISO 8601) into a naive UTC datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _TIME_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        raise ValueError(f"Unrecognised time: {value!r}")
+    # selected_time is TIMESTAMP WITHOUT TIME ZONE (Prisma DateTime), in UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.replace(tzinfo=None)
+
+
+class Repository(ABC):
+    """Storage interface for leads and call requests."""
+
+    @abstractmethod
+    async def insert_lead(self, lead_id: str, name: str, email: str, details: str) -> None:
+        """Insert one row into `leads`."""
+
+    @abstractmethod
+    async def insert_booking(self, booking_id: str, name: str, email: str, intent: str,
+                             selected_time: Optional[datetime], status: str,
+                             booking_link: Optional[str]) -> None:
+        """Insert one row into `call_requests`."""
+
+    @abstractmethod
+    async def booked_times(self, since: datetime) -> List[datetime]:
+        """Start times of active bookings at or after `since` (naive UTC)."""
+
+    async def insert_many(self, table: str, rows: List[Sequence[Any]]) -> None:
+        """Insert a batch of rows (in LEAD_COLUMNS / BOOKING_COLUMNS order)."""
+        insert = self.insert_lead if table == LEADS else self.insert_booking
+        for row in rows:
+            await insert(*row)
+
+    async def close(self) -> None:
+        """Release any resources held by the repository."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class PostgresRepository(Repository):
+    """Repository on an asyncpg pool (anything with asyncpg's Pool interface)."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def insert_lead(self, lead_id, name, email, details):
+        await self.pool.execute(INSERT_LEAD, lead_id, name, email, details)
+
+    async def insert_booking(self, booking_id, name, email, intent, selected_time, status, booking_link):
+        await self.pool.execute(
+            INSERT_BOOKING, booking_id, name, email, intent, selected_time, status, booking_link
+        )
+
+    async def booked_times(self, since):
+        rows = await self.pool.fetch(SELECT_BOOKED_TIMES, since)
+        return [row["selected_time"] for row in rows]
+
+    async def insert_many(self, table, rows):
+        # COPY sends the whole batch in one statement; unspecified columns get their defaults
+        columns = LEAD_COLUMNS if table == LEADS else BOOKING_COLUMNS
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(table, records=rows, columns=columns)
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "pool_size": self.pool.get_size(),
+            "pool_idle": self.pool.get_idle_size(),
+            "pool_min": self.pool.get_min_size(),
+            "pool_max": self.pool.get_max_size(),
+        }
+
+
+class InMemoryRepository(Repository):
+    """Process-local stand-in used when DATABASE_URL is not set."""
+
+    def __init__(self):
+        self.leads: List[Dict[str, Any]] = []
+        self.bookings: List[Dict[str, Any]] = []
+
+    async def insert_lead(self, lead_id, name, email, details):
+        self.leads.append({"id": lead_id, "name": name, "email": email, "details": details,
+                           "created_at": datetime.now()})
+
+    async def insert_booking(self, booking_id, name, email, intent, selected_time, status, booking_link):
+        self.bookings.append({"id": booking_id, "name": name, "email": email, "intent": intent,
+                              "selected_time": selected_time, "status": status,
+                              "booking_link": booking_link, "created_at": datetime.now()})
+
+    async def booked_times(self, since):
+        return sorted(
+            b["selected_time"] for b in self.bookings
+            if b["selected_time"] is not None and b["selected_time"] >= since and b["status"] != "cancelled"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "leads": len(self.leads), "bookings": len(self.bookings)}
+
+
+_repository: Repository = InMemoryRepository()
+_write_queue: Optional[WriteBehindQueue] = None
+
+
+def get_repository() -> Repository:
+    return _repository
+
+
+def set_repository(repository: Repository) -> None:
+    """Swap the active repository (used by connect_db, tests and benchmarks)."""
+    global _repository
+    _repository = repository
+
+
+def stats() -> Dict[str, Any]:
+    result = _repository.stats()
+    if _write_queue is not None:
+        result["write_queue"] = _write_queue.stats()
+    return result
+
+
+def _pool_stat(key: str):
+    return lambda: _repository.stats().get(key)
+
+
+REGISTRY.gauge("delta_db_pool_size", "Open connections in the database pool", _pool_stat("pool_size"))
+REGISTRY.gauge("delta_db_pool_idle", "Idle connections in the database pool", _pool_stat("pool_idle"))
+REGISTRY.gauge("delta_db_write_queue_depth", "Rows waiting to be written behind",
+               lambda: _write_queue.depth if _write_queue is not None else None)
+
+
 async def connect_db() -> bool:
-    """Connect to database"""
-    logger.info("Database connected")
-    return True
+    """
+    Open the shared connection pool and start the write-behind queue
+    (called once from the app lifespan).
+    """
+    url = os.getenv("DATABASE_URL")
+    if url:
+        # Deferred: not needed for the in-memory fallback
+        import asyncpg
+
+        pool = await asyncpg.create_pool(
+            url,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            command_timeout=DB_COMMAND_TIMEOUT,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+        )
+        set_repository(PostgresRepository(pool))
+        logger.info(f"Database connected (pool {DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE})")
+    else:
+        logger.warning("DATABASE_URL not set: leads and bookings are kept in memory only")
+        set_repository(InMemoryRepository())
+
+    if DB_WRITE_BEHIND:
+        start_write_queue(WriteBehindQueue(
+            lambda table, rows: _repository.insert_many(table, rows),
+            max_batch=DB_BATCH_SIZE,
+            flush_interval=DB_FLUSH_INTERVAL,
+            max_pending=DB_WRITE_QUEUE_MAX,
+        ))
+    return bool(url)
+
+
+def start_write_queue(queue: WriteBehindQueue) -> None:
+    """Route writes through `queue` (must be called inside the event loop)."""
+    global _write_queue
+    queue.start()
+    _write_queue = queue
+
+
+async def stop_write_queue() -> None:
+    """Drain queued rows and go back to inline writes."""
+    global _write_queue
+    queue, _write_queue = _write_queue, None
+    if queue is not None:
+        await queue.stop()
+        logger.info(f"Write-behind queue drained: {queue.stats()}")
+
 
 async def disconnect_db() -> bool:
-    """Disconnect from database"""
+    """Drain queued writes, then close the pool, waiting for in-flight queries."""
+    await stop_write_queue()
+    await _repository.close()
     logger.info("Database disconnected")
     return True
 
+
+async def _timed(op: str, call) -> None:
+    start = time.perf_counter()
+    try:
+        await call
+    except Exception:
+        QUERY_ERRORS.inc(op=op)
+        raise
+    finally:
+        QUERY_SECONDS.observe(time.perf_counter() - start, op=op)
+
+
 async def save_lead(name: str, email: str, details: str = "No details") -> Dict[str, Any]:
     """
     Save a lead to the database.
-    
+
     Args:
         name: Lead's full name
         email: Lead's email address
         details: Context about their inquiry
-        
+
     Returns:
         Dict with success status and lead ID
     """
     try:
         lead_id = str(uuid.uuid4())
+        row = (lead_id, name, email, details)
+        if _write_queue is None or not _write_queue.submit(LEADS, row):
+            await _timed("save_lead", _repository.insert_lead(*row))
         logger.info(f"Lead saved: {name} ({email}) - ID: {lead_id}")
         return {
             "success": True,
@@ -53,27 +310,30 @@ async def save_lead(name: str, email: str, details: str = "No details") -> Dict[
 async def log_booking(
     name: str,
     email: str,
-    selected_time: str,
+    selected_time: Union[str, datetime],
     intent: str,
     status: str = "pending",
     booking_link: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Log a call booking to the database.
-    
+
     Args:
         name: Attendee name
         email: Attendee email
-        selected_time: ISO timestamp of booking
+        selected_time: Slot time (datetime, ISO timestamp or "YYYY-MM-DD at HH:MM AM")
         intent: What will be discussed
         status: Booking status (pending, confirmed, etc.)
         booking_link: URL to calendar/booking
-        
+
     Returns:
         Dict with success status and booking ID
     """
     try:
         booking_id = str(uuid.uuid4())
+        row = (booking_id, name, email, intent, parse_selected_time(selected_time), status, booking_link)
+        if _write_queue is None or not _write_queue.submit(CALL_REQUESTS, row):
+            await _timed("log_booking", _repository.insert_booking(*row))
         logger.info(f"Booking logged: {name} at {selected_time} - ID: {booking_id}")
         return {
             "success": True,
@@ -87,46 +347,3 @@ async def log_booking(
             "callRequestId": None,
             "message": f"Database error: {str(e)}"
         }
-# Synchronous versions for use in agent tools
-def mock_save_lead(name: str, email: str, details: str = "No details") -> Dict[str, Any]:
-    """Synchronous version for save_lead"""
-    try:
-        lead_id = str(uuid.uuid4())
-        logger.info(f"Lead saved: {name} ({email}) - ID: {lead_id}")
-        return {
-            "success": True,
-            "leadId": lead_id,
-            "message": f"Lead saved: {name} ({email})"
-        }
-    except Exception as e:
-        logger.error(f"Failed to save lead: {e}")
-        return {
-            "success": False,
-            "leadId": None,
-            "message": f"Database error: {str(e)}"
-        }
-
-def mock_log_booking(
-    name: str,
-    email: str,
-    selected_time: str,
-    intent: str,
-    status: str = "pending",
-    booking_link: Optional[str] = None
-) -> Dict[str, Any]:
-    """Synchronous version for log_booking"""
-    try:
-        booking_id = str(uuid.uuid4())
-        logger.info(f"Booking logged: {name} at {selected_time} - ID: {booking_id}")
-        return {
-            "success": True,
-            "callRequestId": booking_id,
-            "message": "Booking logged successfully"
-        }
-    except Exception as e:
-        logger.error(f"Failed to log booking: {e}")
-        return {
-            "success": False,
-            "callRequestId": None,
-            "message": f"Database error: {str(e)}"
-        }
\ No newline at end of file
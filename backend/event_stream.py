@@ -0,0 +1,97 @@
+"""
+Typed event stream for /api/chat (opt-in; plain text stays the default).
+
+`coalesce()` merges consecutive token events so the response is written in
+a few larger pieces instead of one write per model token: buffered text is
+flushed once it reaches `max_bytes`, once the oldest buffered token is
+`max_delay` seconds old (even if the model has gone quiet), and before any
+other event. The first token is always sent at once so time to first byte
+does not change.
+
+Wire formats, one event per line/message:
+    ndjson  {"type": "token", "text": "Hel"}\n
+    sse     event: token\ndata: {"type": "token", "text": "Hel"}\n\n
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+MEDIA_TYPES = {
+    "text": "text/plain",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def encode(event: Dict[str, Any], fmt: str) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    if fmt == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def coalesce(
+    events: AsyncIterator[Dict[str, Any]],
+    max_bytes: int = 512,
+    max_delay: float = 0.05,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Merge runs of token events according to the size/time flush policy."""
+    iterator = events.__aiter__()
+    buffer = []
+    size = 0
+    oldest: Optional[float] = None
+    first = True
+    pending: Optional[asyncio.Future] = None
+
+    def flush() -> Dict[str, Any]:
+        nonlocal size, oldest
+        event = {"type": "token", "text": "".join(buffer)}
+        buffer.clear()
+        size, oldest = 0, None
+        return event
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            if buffer:
+                timeout = max(0.0, oldest + max_delay - time.perf_counter())
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    # The model paused: send what we have
+                    yield flush()
+                    continue
+            try:
+                event = await pending
+            except StopAsyncIteration:
+                break
+            finally:
+                if pending.done():
+                    pending = None
+
+            if event["type"] != "token":
+                if buffer:
+                    yield flush()
+                yield event
+                continue
+            if first:
+                first = False
+                yield event
+                continue
+            buffer.append(event["text"])
+            size += len(event["text"].encode())
+            if oldest is None:
+                oldest = time.perf_counter()
+            if size >= max_bytes:
+                yield flush()
+        if buffer:
+            yield flush()
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            # Let the cancellation land before closing the source generator
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,123 @@
+"""
+In-process stand-in for an asyncpg pool.
+
+`StandInPool` implements the parts of asyncpg's Pool interface the backend
+uses and simulates a network round trip per query plus a one-off cost per
+new connection, so repository code and benchmarks run without a Postgres
+server. INSERTs are parsed just enough to keep the rows per table.
+"""
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Sequence, Tuple
+
+_INSERT_RE = re.compile(r"INSERT INTO (\w+)\s*\(([^)]*)\)", re.I)
+
+
+class StandInConnection:
+    def __init__(self, pool: "StandInPool"):
+        self._pool = pool
+
+    async def _round_trip(self) -> None:
+        self._pool.round_trips += 1
+        if self._pool.rtt:
+            await asyncio.sleep(self._pool.rtt)
+
+    def _insert(self, query: str, args: Sequence[Any]) -> int:
+        match = _INSERT_RE.search(query)
+        if not match:
+            return 0
+        table, columns = match.group(1), [c.strip() for c in match.group(2).split(",")]
+        rows = self._pool.tables.setdefault(table, [])
+        # Multi-row VALUES lists repeat the column set
+        for start in range(0, len(args), len(columns)):
+            rows.append(dict(zip(columns, args[start:start + len(columns)])))
+        return len(args) // len(columns)
+
+    async def execute(self, query: str, *args: Any, timeout: float = None) -> str:
+        await self._round_trip()
+        self._pool.queries.append((query, args))
+        return f"INSERT 0 {self._insert(query, args)}"
+
+    async def executemany(self, query: str, args: Sequence[Sequence[Any]], timeout: float = None) -> None:
+        # asyncpg pipelines the whole batch: one round trip
+        await self._round_trip()
+        for row in args:
+            self._pool.queries.append((query, tuple(row)))
+            self._insert(query, row)
+
+    async def fetch(self, query: str, *args: Any, timeout: float = None) -> List[Dict[str, Any]]:
+        await self._round_trip()
+        self._pool.queries.append((query, args))
+        match = re.search(r"FROM (\w+)", query, re.I)
+        return list(self._pool.tables.get(match.group(1), [])) if match else []
+
+    async def copy_records_to_table(self, table: str, *, records: Sequence[Tuple], columns: Sequence[str],
+                                    timeout: float = None, **kwargs: Any) -> str:
+        await self._round_trip()
+        rows = self._pool.tables.setdefault(table, [])
+        for record in records:
+            rows.append(dict(zip(columns, record)))
+        self._pool.copies += 1
+        return f"COPY {len(records)}"
+
+
+class StandInPool:
+    """Bounded pool of simulated connections (`rtt` seconds per round trip)."""
+
+    def __init__(self, max_size: int = 10, rtt: float = 0.0, connect_cost: float = 0.0):
+        self.max_size = max_size
+        self.rtt = rtt
+        self.connect_cost = connect_cost
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.queries: List[Tuple[str, Tuple]] = []
+        self.round_trips = 0
+        self.copies = 0
+        self.connections_opened = 0
+        self.closed = False
+        self._idle: List[StandInConnection] = []
+        self._slots = asyncio.Semaphore(max_size)
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.closed:
+            raise RuntimeError("pool is closed")
+        async with self._slots:
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                if self.connect_cost:
+                    await asyncio.sleep(self.connect_cost)
+                self.connections_opened += 1
+                conn = StandInConnection(self)
+            try:
+                yield conn
+            finally:
+                self._idle.append(conn)
+
+    async def execute(self, query: str, *args: Any, timeout: float = None) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args)
+
+    async def executemany(self, query: str, args: Sequence[Sequence[Any]], timeout: float = None) -> None:
+        async with self.acquire() as conn:
+            return await conn.executemany(query, args)
+
+    async def fetch(self, query: str, *args: Any, timeout: float = None) -> List[Dict[str, Any]]:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def get_size(self) -> int:
+        return self.connections_opened
+
+    def get_idle_size(self) -> int:
+        return len(self._idle)
+
+    def get_min_size(self) -> int:
+        return 0
+
+    def get_max_size(self) -> int:
+        return self.max_size
@@ -0,0 +1,133 @@
+"""
+Deterministic fake chat model for offline tests and benchmarks.
+
+Replays scripted responses token by token with configurable latency so the
+agent, streaming and HTTP layers can be exercised without API keys.
+"""
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+Response = Union[str, AIMessage]
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def tool_call(name: str, /, **args: Any) -> AIMessage:
+    """Build a scripted response that asks the agent to run a tool."""
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}],
+    )
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    Chat model that replays `responses` in order (cycling when exhausted).
+
+    `latency` is paid once before the first token, `token_delay` before
+    every token. A `responder` callable, when given, picks the response from
+    the incoming messages instead of the fixed script.
+    """
+
+    responses: List[Response] = []
+    responder: Optional[Callable[[List[BaseMessage]], Response]] = None
+    latency: float = 0.0
+    token_delay: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeStreamingChatModel":
+        # Tool schemas are irrelevant for scripted output
+        return self
+
+    def _next_response(self, messages: List[BaseMessage]) -> AIMessage:
+        if self.responder is not None:
+            response = self.responder(messages)
+        else:
+            response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        if isinstance(response, str):
+            return AIMessage(content=response)
+        return response
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[AIMessageChunk]:
+        if message.tool_calls:
+            return [
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": index,
+                        }
+                        for index, call in enumerate(message.tool_calls)
+                    ],
+                )
+            ]
+        return [AIMessageChunk(content=token) for token in _TOKEN_RE.findall(message.content)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._next_response(messages)
+        time.sleep(self.latency + self.token_delay * len(self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._next_response(messages)
+        await asyncio.sleep(self.latency + self.token_delay * len(self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._next_response(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(message):
+            time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._next_response(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(message):
+            await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=chunk)
@@ -0,0 +1,151 @@
+"""
+Token-budgeted history windowing with a rolling summary.
+
+Long conversations are compacted before they reach the model: the most
+recent turns and any turn that carried tool results stay verbatim, and
+everything older is folded into a summary. Summaries are extended
+incrementally and cached per conversation, so each turn only summarizes
+the messages that just slid out of the window.
+"""
+import inspect
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+Message = Dict[str, Any]
+Summarizer = Callable[[str, List[Message]], Union[str, Awaitable[str]]]
+
+SUMMARY_HEADER = "[Summary of the earlier conversation]"
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token); avoids a tokenizer dependency."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages: List[Message]) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def carries_tool_result(message: Message) -> bool:
+    """Assistant turns produced by a tool call are tagged with `tools`."""
+    return bool(message.get("tools"))
+
+
+def extractive_summary(previous: str, messages: List[Message]) -> str:
+    """Default summarizer: append the first sentence of each message."""
+    lines = previous.splitlines() if previous else []
+    for msg in messages:
+        content = " ".join(msg.get("content", "").split())
+        if not content:
+            continue
+        first = _SENTENCE_RE.split(content, 1)[0]
+        if len(first) > 160:
+            first = first[:157] + "..."
+        speaker = "User" if msg.get("role") == "user" else "Delta-1"
+        lines.append(f"{speaker}: {first}")
+    return "\n".join(lines)
+
+
+@dataclass
+class _SummaryState:
+    covered: int                  # messages[:covered] are folded into `text`
+    tail: Tuple[str, str]         # (role, content) of messages[covered - 1]
+    text: str
+
+
+class HistoryWindow:
+    """
+    Fit a conversation into `budget_tokens`.
+
+    The last `keep_turns` user/assistant pairs (plus the new input) are kept
+    verbatim when they fit; tool-result turns are always kept. Older messages
+    become a summary capped at `summary_tokens`.
+    """
+
+    def __init__(self, budget_tokens: int = 2000, keep_turns: int = 4, summary_tokens: int = 300,
+                 summarizer: Summarizer = extractive_summary, max_conversations: int = 10000):
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.max_conversations = max_conversations
+        self._summaries: "OrderedDict[str, _SummaryState]" = OrderedDict()
+
+        # Counters
+        self.compactions = 0
+        self.summary_reuses = 0
+        self.summarized_messages = 0
+
+    def _cached(self, key: str, messages: List[Message], cut: int) -> Optional[_SummaryState]:
+        state = self._summaries.get(key)
+        if state is None or state.covered > cut:
+            return None
+        last = messages[state.covered - 1]
+        if (last.get("role", ""), last.get("content", "")) != state.tail:
+            return None  # a different conversation reused the key
+        return state
+
+    def _cap(self, text: str) -> str:
+        """Drop the oldest summary lines until the summary fits its budget."""
+        lines = text.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    async def _summarize(self, previous: str, messages: List[Message]) -> str:
+        result = self.summarizer(previous, messages)
+        if inspect.isawaitable(result):
+            result = await result
+        return self._cap(result)
+
+    async def compact(self, messages: List[Message], key: str) -> List[Message]:
+        """Return the messages to send to the model for this turn."""
+        if self.budget_tokens <= 0 or message_tokens(messages) <= self.budget_tokens:
+            return messages
+
+        # Start from the most recent turns, then shrink until the window fits
+        verbatim_budget = self.budget_tokens - self.summary_tokens - MESSAGE_OVERHEAD_TOKENS
+        cut = max(0, len(messages) - (2 * self.keep_turns + 1))
+        pinned = [m for m in messages[:cut] if carries_tool_result(m)]
+        while cut < len(messages) - 1 and message_tokens(pinned + messages[cut:]) > verbatim_budget:
+            if carries_tool_result(messages[cut]):
+                pinned.append(messages[cut])
+            cut += 1
+        if cut == 0:
+            return messages
+
+        # Extend the cached summary with just the messages that left the window
+        state = self._cached(key, messages, cut)
+        start, text = (state.covered, state.text) if state else (0, "")
+        if state:
+            self.summary_reuses += 1
+        new = [m for m in messages[start:cut] if not carries_tool_result(m)]
+        if new:
+            text = await self._summarize(text, new)
+            self.summarized_messages += len(new)
+
+        last = messages[cut - 1]
+        self._summaries[key] = _SummaryState(cut, (last.get("role", ""), last.get("content", "")), text)
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.max_conversations:
+            self._summaries.popitem(last=False)
+
+        self.compactions += 1
+        window = pinned + messages[cut:]
+        if text:
+            window = [{"role": "user", "content": f"{SUMMARY_HEADER}\n{text}"}] + window
+        return window
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "cached_summaries": len(self._summaries),
+            "compactions": self.compactions,
+            "summary_reuses": self.summary_reuses,
+            "summarized_messages": self.summarized_messages,
+        }
@@ -0,0 +1,133 @@
+"""
+Shared, pooled HTTP client for LLM provider calls.
+
+Provider SDKs each build their own HTTP client with default limits, and
+nothing shows whether a call reused a warm connection or paid for a new TCP
+connect and TLS handshake. `LLMHttpPool` owns one `httpx.AsyncClient` per
+process with configurable connection limits, keep-alive and (optionally,
+with the `h2` package) HTTP/2, and is injected into the clients that accept
+one (ChatGroq's `http_async_client`). The Gemini client talks gRPC through
+the Google SDK and cannot be given an httpx client; its connection stays
+managed by the SDK.
+
+Every request carries an httpcore trace hook: TCP connect and TLS handshake
+times are recorded when a new connection is opened, and requests are
+counted as on a new or a reused connection.
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from metrics import HTTP_CONNECT_SECONDS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_PHASES = {"connection.connect_tcp": "tcp", "connection.start_tls": "tls"}
+
+
+class _RequestTrace:
+    """httpcore `trace` extension for one request."""
+
+    def __init__(self, pool: "LLMHttpPool"):
+        self.pool = pool
+        self.new_connection = False
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        name, _, stage = event.rpartition(".")
+        phase = _PHASES.get(name)
+        if phase is None:
+            return
+        if stage == "started":
+            self.new_connection = True
+            self._started[phase] = time.perf_counter()
+        elif stage == "complete" and phase in self._started:
+            self.pool.record_phase(phase, time.perf_counter() - self._started.pop(phase))
+
+
+class LLMHttpPool:
+    """One lazily created AsyncClient plus connection-reuse and handshake counters."""
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30.0,
+                 http2: bool = False, connect_timeout: float = 5.0, timeout: float = 60.0, verify: Any = True):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("LLM_HTTP2 is on but the h2 package is not installed; using HTTP/1.1")
+                http2 = False
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        self.verify = verify
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Counters
+        self.requests = 0
+        self.new_connections = 0
+        self.phase_seconds: Dict[str, float] = {"tcp": 0.0, "tls": 0.0}
+        self.phase_count: Dict[str, int] = {"tcp": 0, "tls": 0}
+
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (created on first use, and again after `aclose`)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                verify=self.verify,
+                event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = _RequestTrace(self)
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        trace = response.request.extensions.get("trace")
+        self.requests += 1
+        if isinstance(trace, _RequestTrace) and trace.new_connection:
+            self.new_connections += 1
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] += seconds
+        self.phase_count[phase] += 1
+        HTTP_CONNECT_SECONDS.observe(seconds, phase=phase)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": self.requests - self.new_connections,
+            "avg_connect_ms": {
+                phase: round(1000 * self.phase_seconds[phase] / count, 2)
+                for phase, count in self.phase_count.items() if count
+            },
+        }
+
+
+llm_http = LLMHttpPool(
+    max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+    http2=os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes"),
+    connect_timeout=float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5")),
+    timeout=float(os.getenv("LLM_HTTP_TIMEOUT", "60")),
+)
+
+REGISTRY.gauge("delta_llm_http_requests", "LLM HTTP requests by connection (new or reused)",
+               lambda: {"new": llm_http.new_connections, "reused": llm_http.requests - llm_http.new_connections},
+               labelname="connection", kind="counter")
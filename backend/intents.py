@@ -0,0 +1,168 @@
+"""
+Deterministic fast-path intent router.
+
+A keyword/regex classifier recognises turns that map onto exactly one tool
+("what times are available?", "I'm Jane, jane@acme.com"). When it is
+confident enough the tool is called directly and its result is phrased from
+a local template, skipping both LLM round trips. Everything else falls back
+to the agent.
+"""
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+AVAILABILITY = "availability"
+SAVE_LEAD = "save_lead"
+OTHER = "other"
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Prefix is case-insensitive, the captured name must be capitalised
+_NAME_RE = re.compile(
+    r"(?i:\bmy name is|\bi am|\bi'm|\bthis is|\bname:)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)"
+)
+# Capitalised words after "I am"/"this is" that are not names ("I am Looking for...")
+_NOT_NAMES = frozenset({
+    "not", "looking", "interested", "here", "just", "trying", "reaching", "writing", "wondering",
+    "hoping", "curious", "sorry", "sure", "happy", "glad", "ready", "still", "also", "really",
+    "very", "available", "new", "the", "a", "an", "so", "ok", "okay", "fine", "good", "great",
+})
+# Lowercase words that may follow a name ("I'm Jane from Acme"); any other
+# lowercase continuation means the capture was a sentence, not a name
+_NAME_FOLLOWERS = frozenset({"and", "from", "at", "with", "of", "here"})
+_CONTINUATION_RE = re.compile(r"\s+([a-z]+)")
+_AVAILABILITY_STRONG_RE = re.compile(
+    r"\b(availability|available (?:times?|slots?|dates?)|open (?:slots?|times?)|free (?:slots?|times?)"
+    r"|what (?:times?|slots?|days?) (?:are|do|work|is)|which (?:times?|slots?|days?)"
+    r"|when (?:are|is) (?:you|someone|the team) (?:free|available)|when can (?:i|we) (?:book|meet|talk))\b",
+    re.I,
+)
+_BOOKING_WORDS_RE = re.compile(r"\b(book|schedule|call|meeting|slot|times?)\b", re.I)
+# A concrete time means the user is picking a slot, not asking for options
+_SPECIFIC_TIME_RE = re.compile(r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\b\d{1,2}:\d{2}\b|\d{4}-\d{2}-\d{2}", re.I)
+_OFF_TOPIC_RE = re.compile(r"\b(price|pricing|cost|services?|portfolio|case stud(?:y|ies))\b", re.I)
+
+
+@dataclass
+class Intent:
+    name: str
+    confidence: float
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+def _find_name(text: str) -> Optional[re.Match]:
+    """The first "I'm <Name>" style match that looks like a name."""
+    for match in _NAME_RE.finditer(text):
+        if match.group(1).split()[0].lower() in _NOT_NAMES:
+            continue
+        following = _CONTINUATION_RE.match(text, match.end())
+        if following and following.group(1) not in _NAME_FOLLOWERS:
+            continue
+        return match
+    return None
+
+
+def classify(text: str) -> Intent:
+    """Classify one user message. Pure and cheap (a handful of regexes)."""
+    email = _EMAIL_RE.search(text)
+    if email:
+        name = _find_name(text)
+        if not name:
+            return Intent(SAVE_LEAD, 0.5, {"email": email.group(0)})
+        # Only a message with nothing but contact details is answered
+        # directly; a time, a booking or a question must reach the agent
+        rest = text
+        for span in sorted((name.span(), email.span()), reverse=True):
+            rest = rest[:span[0]] + " " + rest[span[1]:]
+        confidence = 0.95
+        if (_SPECIFIC_TIME_RE.search(text) or _BOOKING_WORDS_RE.search(rest) or _OFF_TOPIC_RE.search(rest)
+                or "?" in rest or len(re.findall(r"[a-z]+", rest, re.I)) > 6 or len(text) > 200):
+            confidence = 0.45
+        return Intent(SAVE_LEAD, confidence, {"name": name.group(1), "email": email.group(0)})
+
+    if _SPECIFIC_TIME_RE.search(text):
+        return Intent(OTHER, 0.0)
+
+    confidence = 0.0
+    if _AVAILABILITY_STRONG_RE.search(text):
+        confidence = 0.95
+    elif _BOOKING_WORDS_RE.search(text):
+        confidence = 0.5
+    if confidence and (_OFF_TOPIC_RE.search(text) or len(text) > 200):
+        # Mixed or long requests need the agent's judgement
+        confidence -= 0.3
+    if confidence:
+        return Intent(AVAILABILITY, round(confidence, 2))
+    return Intent(OTHER, 0.0)
+
+
+def tool_likely(text: str) -> bool:
+    """The message looks like a booking/lead step (an email, a concrete time or booking words)."""
+    return bool(_EMAIL_RE.search(text) or _SPECIFIC_TIME_RE.search(text) or _BOOKING_WORDS_RE.search(text))
+
+
+class IntentRouter:
+    """
+    Answer high-confidence intents straight from the tools.
+
+    `tools` maps tool names to LangChain tools. Per-intent counters record
+    direct hits, below-threshold fallbacks and tool latency.
+    """
+
+    def __init__(self, tools: Dict[str, Any], threshold: float = 0.85):
+        self.tools = tools
+        self.threshold = threshold
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.fallbacks: Dict[str, int] = defaultdict(int)
+        self.errors = 0
+        self.latency_total: Dict[str, float] = defaultdict(float)
+
+    async def _answer(self, intent: Intent) -> Optional[Tuple[str, str]]:
+        if intent.name == AVAILABILITY:
+            tool_name = "get_available_slots_tool"
+            output = await self.tools[tool_name].ainvoke({})
+            return f"{output}\n\nWhich time works best for you?", tool_name
+
+        if intent.name == SAVE_LEAD:
+            tool_name = "save_lead_tool"
+            output = await self.tools[tool_name].ainvoke(intent.args)
+            if output.startswith("Error"):
+                return None
+            # The same templated confirmation the agent ends with (terminal.py)
+            return output.reply, tool_name
+        return None
+
+    async def route(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (reply, tool name) for a direct answer, or None to use the agent."""
+        intent = classify(text)
+        if intent.name == OTHER:
+            return None
+        if intent.confidence < self.threshold:
+            self.fallbacks[intent.name] += 1
+            return None
+
+        start = time.perf_counter()
+        try:
+            answer = await self._answer(intent)
+        except Exception:
+            self.errors += 1
+            return None
+        self.latency_total[intent.name] += time.perf_counter() - start
+        if answer is None:
+            self.fallbacks[intent.name] += 1
+            return None
+        self.hits[intent.name] += 1
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "hits": dict(self.hits),
+            "fallbacks": dict(self.fallbacks),
+            "errors": self.errors,
+            "avg_latency_ms": {
+                name: round(1000 * total / self.hits[name], 3)
+                for name, total in self.latency_total.items() if self.hits[name]
+            },
+        }
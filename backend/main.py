@@ -4,15 +4,26 @@ Optimized for performance and reliability
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
+import time
 import asyncio
 import logging
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
 from dotenv import load_dotenv
 
+from admission import AdmissionController, Overloaded
+from sessions import InMemorySessionBackend, SessionNotFound, SessionStore
+from metrics import REGISTRY, CHAT_REQUESTS, STAGE_SECONDS, span
+import database
+from availability import booking_calendar
+from event_stream import MEDIA_TYPES, coalesce, encode
+from singleflight import SingleFlight, request_key
+
 # Load environment variables
 load_dotenv()
 
@@ -20,11 +31,57 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Startup warm-up: "off" (build the agent on the first chat), "build", or
+# "connect" (also open the provider connection before reporting ready; without
+# LLM_WARMUP_URL that is one billed LLM call per worker start)
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "build").lower()
+# Warm the shared HTTP pool with a GET here instead of an LLM call (Groq only:
+# Gemini does not use the pool, so the GET is skipped for it)
+LLM_WARMUP_URL = os.getenv("LLM_WARMUP_URL")
+
+# Time budget for one chat turn, from request to last byte. Keep it under the
+# Next.js route's maxDuration (30s) so users get a partial answer, not a 504
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "25"))
+
+# Event-stream modes: flush buffered tokens at this size (bytes) or age (seconds)
+STREAM_FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", "512"))
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.05"))
+
+# Reported by /ready; set once startup (including warm-up) has finished
+readiness: Dict[str, Any] = {"ready": False, "warmup": {}}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources once per process"""
+    started = time.perf_counter()
+    await database.connect_db()
+    await booking_calendar.load_from(database.get_repository())
+    if AGENT_WARMUP != "off":
+        from agent import warm_up
+        try:
+            readiness["warmup"] = await warm_up(AGENT_WARMUP, LLM_WARMUP_URL)
+        except Exception as e:
+            # Stay up (health, metrics) but never report ready
+            readiness["error"] = f"{type(e).__name__}: {e}"
+            logger.error(f"Agent warm-up failed: {readiness['error']}")
+    if "error" not in readiness:
+        readiness["ready"] = True
+    readiness["startup_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Startup finished in {readiness['startup_seconds']}s (warm-up: {AGENT_WARMUP})")
+    try:
+        yield
+    finally:
+        readiness["ready"] = False
+        from http_pool import llm_http
+        await llm_http.aclose()
+        await database.disconnect_db()
+
 app = FastAPI(
     title="Delta-1 Agent",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url=None  # Disable ReDoc to reduce overhead
+    redoc_url=None,  # Disable ReDoc to reduce overhead
+    lifespan=lifespan
 )
 
 # CORS - Allow Next.js frontend
@@ -34,8 +91,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["Content-Type"],
+    expose_headers=["X-Session-Id", "Retry-After"],
 )
 
+# Admission control - bound in-flight agent runs and the wait queue
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("CHAT_MAX_CONCURRENCY", "32")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "10")),
+)
+
+# Server-side conversation history for session mode
+sessions = SessionStore(InMemorySessionBackend(
+    max_sessions=int(os.getenv("SESSION_MAX", "10000")),
+    idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "3600")),
+))
+
+# Concurrent identical requests (double-submits, proxy retries) share one agent run
+single_flight = SingleFlight(enabled=os.getenv("SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes"))
+
+REGISTRY.gauge("delta_admission_in_flight", "Agent runs in progress", lambda: admission.in_flight)
+REGISTRY.gauge("delta_admission_queued", "Requests waiting for an agent slot", lambda: admission.queued)
+REGISTRY.gauge("delta_admission_rejected", "Requests rejected by admission control",
+               lambda: {"full": admission.rejected_full, "timeout": admission.rejected_timeout},
+               labelname="reason", kind="counter")
+REGISTRY.gauge("delta_sessions", "Sessions held in memory", lambda: sessions.stats()["sessions"])
+REGISTRY.gauge("delta_single_flight_shared", "Requests served by another request's agent run",
+               lambda: single_flight.shared, kind="counter")
+
 # Models
 class Message(BaseModel):
     role: str
@@ -48,7 +131,13 @@ class Message(BaseModel):
             yield cls.validate
 
 class ChatRequest(BaseModel):
-    messages: List[Message]
+    # Full-history mode: the client sends the whole conversation
+    messages: Optional[List[Message]] = None
+    # Session mode: the client sends only the newest message
+    session_id: Optional[str] = None
+    message: Optional[str] = None
+    # "text" (default), or typed events as "ndjson" / "sse"
+    stream_format: Optional[str] = None
     
     class Config:
         # Validate non-empty messages list
@@ -58,57 +147,217 @@ class ChatRequest(BaseModel):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    from agent import response_cache, history_window, intent_router, model_router
+    from http_pool import llm_http
+    from tools import slot_prefetch
+    import providers
+    
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "services": {
-            "database": "connected",
+            "database": database.stats(),
             "groq": "configured" if os.getenv("GROQ_API_KEY") else "missing"
-        }
+        },
+        "admission": admission.stats(),
+        "response_cache": response_cache.stats(),
+        "sessions": sessions.stats(),
+        "single_flight": single_flight.stats(),
+        "history": history_window.stats(),
+        "intent_router": intent_router.stats(),
+        "llm_providers": providers.stats(),
+        "model_router": model_router.stats(),
+        "llm_http": llm_http.stats(),
+        "calendar": booking_calendar.stats(),
+        "slot_prefetch": slot_prefetch.stats()
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the agent is built and warmed up, 503 until then"""
+    body = {
+        "status": "ready" if readiness["ready"] else "starting",
+        "warmup": {step: round(seconds, 3) for step, seconds in readiness["warmup"].items()},
+    }
+    for key in ("startup_seconds", "error"):
+        if key in readiness:
+            body[key] = readiness[key]
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/chat")
 async def chat(request: ChatRequest):
     """
-    Chat endpoint with optimized streaming response.
-    Streams response character by character without artificial delays.
+    Chat endpoint with token-level streaming.
+    Text is forwarded to the client as soon as the agent produces it.
+    
+    Send either the whole conversation as `messages`, or just the newest
+    `message` plus the `session_id` returned in the X-Session-Id header.
+    With `stream_format` "ndjson" or "sse" the response is a stream of typed
+    events (token, tool_start, tool_end, final, error) instead of plain text.
     """
+    received = time.perf_counter()
+    deadline = asyncio.get_running_loop().time() + CHAT_DEADLINE_SECONDS
+    mode = "session" if request.message is not None else "history"
     try:
-        from agent import run_agent
+        from agent import stream_agent, stream_agent_events, ERROR_REPLY
         
-        # Convert to dict format for agent
-        messages = [
-            {"role": msg.role.lower(), "content": msg.content}
-            for msg in request.messages
-        ]
+        session_id = None
+        stream_format = (request.stream_format or "text").lower()
+        with span("request_parse"):
+            if stream_format not in MEDIA_TYPES:
+                raise ValueError(f"Unknown stream_format {request.stream_format!r}: use text, ndjson or sse")
+            if request.message is not None:
+                # Session mode: history lives on the server. A session it no
+                # longer holds (restart, eviction, another worker) is a 404, not
+                # a silent fresh start: the client resends the full history
+                new_message = {"role": "user", "content": request.message}
+                if request.session_id:
+                    session_id = request.session_id
+                    messages = await sessions.resume(session_id) + [new_message]
+                else:
+                    session_id = sessions.new_session_id()
+                    messages = [new_message]
+            elif request.messages is not None:
+                # Convert to dict format for agent
+                messages = [
+                    {"role": msg.role.lower(), "content": msg.content}
+                    for msg in request.messages
+                ]
+            else:
+                raise ValueError("Request must include 'messages' or 'message'")
         
         logger.info(f"Processing {len(messages)} messages")
         
-        # Execute agent
-        response = await run_agent(messages)
+        # Byte-identical concurrent requests join the first one's run (a request
+        # that opens a new session has a fresh id, so it never matches another)
+        key = request_key(session_id, messages, stream_format == "text")
+        slot = None
         
-        logger.info(f"Generated response: {len(response)} chars")
+        async def run(trace):
+            """The agent run shared by identical requests"""
+            if stream_format == "text":
+                source = stream_agent(messages, session_id=session_id, trace=trace, deadline=deadline)
+            else:
+                source = stream_agent_events(messages, session_id=session_id, trace=trace, deadline=deadline)
+            async with aclosing(source):
+                async for item in source:
+                    yield item
+        
+        flight, leader = single_flight.join(key, run)
+        if leader:
+            flight.session_id = session_id
+            # Wait for a free agent slot (or fail fast when overloaded)
+            try:
+                with span("admission_wait"):
+                    slot = await admission.acquire()
+            except BaseException as e:
+                flight.reject(e if isinstance(e, Exception) else Overloaded("cancelled", 1))
+                single_flight.leave(key, flight)
+                raise
+            # The run holds the slot for as long as any request is reading it
+            flight.release = slot.release
+            flight.admit()
+        else:
+            try:
+                await asyncio.shield(flight.ready)
+            except BaseException:
+                single_flight.leave(key, flight)
+                raise
+            session_id = flight.session_id
+            logger.info("Joined an identical request already in flight")
         
-        # Stream response efficiently (no artificial delay)
         async def stream_response():
-            """Stream response without unnecessary delays"""
-            chunk_size = 10  # Send 10 chars at a time
-            for i in range(0, len(response), chunk_size):
-                yield response[i:i + chunk_size]
-                # Only add minimal delay for network efficiency
-                await asyncio.sleep(0)
+            """Forward agent output as it is generated"""
+            parts = []
+            trace = flight.trace
+            try:
+                if stream_format == "text":
+                    chunks = flight.subscribe()
+                    async with aclosing(chunks):
+                        async for chunk in chunks:
+                            parts.append(chunk)
+                            yield chunk
+                else:
+                    events = coalesce(
+                        flight.subscribe(), max_bytes=STREAM_FLUSH_BYTES, max_delay=STREAM_FLUSH_INTERVAL,
+                    )
+                    async with aclosing(events):
+                        async for event in events:
+                            if event["type"] == "token":
+                                parts.append(event["text"])
+                            yield encode(event, stream_format)
+                    if trace.get("outcome") != "error":
+                        final = {"type": "final", "text": "".join(parts), "outcome": trace.get("outcome")}
+                        yield encode(final, stream_format)
+            finally:
+                elapsed = time.perf_counter() - received
+                STAGE_SECONDS.observe(elapsed, stage="total")
+                if not leader:
+                    outcome = "coalesced"
+                elif flight.done:
+                    outcome = trace.get("outcome", "cancelled")
+                else:
+                    # Left while the run (perhaps still serving duplicates) went on
+                    outcome = "cancelled"
+                CHAT_REQUESTS.inc(mode=mode, outcome=outcome)
+            reply = "".join(parts)
+            logger.info(f"Generated response: {len(reply)} chars in {elapsed:.2f}s")
+            # The leader alone records the turn, so duplicates don't repeat it
+            if leader and session_id and reply and reply != ERROR_REPLY:
+                assistant_message = {"role": "assistant", "content": reply}
+                if trace.get("tools"):
+                    # Tool-result turns stay verbatim when history is compacted
+                    assistant_message["tools"] = trace["tools"]
+                await sessions.append(session_id, new_message, assistant_message)
+        
+        headers = {
+            "Cache-Control": "no-cache",
+            "X-Content-Type-Options": "nosniff"
+        }
+        if session_id:
+            headers["X-Session-Id"] = session_id
+        if stream_format != "text":
+            # Keep reverse proxies from buffering the event stream
+            headers["X-Accel-Buffering"] = "no"
+        
+        body = stream_response()
+        
+        async def finish():
+            # After a disconnect the stream may be parked mid-run: close it so the
+            # agent run is cancelled now, not whenever it is garbage-collected
+            await body.aclose()
+            # Frees the slot if every request disconnected before streaming started
+            single_flight.leave(key, flight)
         
         return StreamingResponse(
-            stream_response(),
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "X-Content-Type-Options": "nosniff"
-            }
+            body,
+            media_type=MEDIA_TYPES[stream_format],
+            headers=headers,
+            background=BackgroundTask(finish)
+        )
+    
+    except Overloaded as e:
+        CHAT_REQUESTS.inc(mode=mode, outcome="rejected")
+        logger.warning(f"Chat rejected ({e.reason}): {admission.stats()}")
+        raise HTTPException(
+            status_code=503,
+            detail="Delta-1 is handling a lot of conversations right now. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
         )
     
+    except SessionNotFound as e:
+        CHAT_REQUESTS.inc(mode=mode, outcome="unknown_session")
+        logger.warning(f"Chat rejected: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+    
     except ValueError as e:
         # Validation errors
+        CHAT_REQUESTS.inc(mode=mode, outcome="invalid")
         logger.warning(f"Invalid request: {e}")
         raise HTTPException(status_code=400, detail=str(e))
     
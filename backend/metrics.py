@@ -0,0 +1,277 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain dict updates on the hot path; nothing is
+formatted until /metrics is scraped. Gauges are read from callbacks at
+scrape time, so component stats (admission, cache, ...) are exported
+without extra bookkeeping.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._data: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        data = self._data.get(key)
+        if data is None:
+            data = self._data[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        data[0][bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        data = self._data.get(tuple(labels[n] for n in self.labelnames))
+        return data[2] if data else 0
+
+    def mean(self, **labels: str) -> float:
+        data = self._data.get(tuple(labels[n] for n in self.labelnames))
+        return data[1] / data[2] if data and data[2] else 0.0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in self._data.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Gauge:
+    """
+    Value read from `read()` at scrape time: a number or {label value: number}.
+
+    With kind="counter" it exports a counter some component already keeps.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable[[], Any], labelname: Optional[str] = None,
+                 kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelname = labelname
+        self.kind = kind
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        if value is None:
+            return
+        name = f"{self.name}_total" if self.kind == "counter" else self.name
+        if isinstance(value, dict):
+            for label, v in value.items():
+                if v is not None:
+                    yield f"{name}{_format_labels((self.labelname,), (label,))} {_format_value(v)}"
+        else:
+            yield f"{name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], Any], labelname: Optional[str] = None,
+              kind: str = "gauge") -> Gauge:
+        return self.register(Gauge(name, help, read, labelname, kind))
+
+    def render(self) -> str:
+        """Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:  # a broken gauge must not break the scrape
+                samples = []
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+            # Counter samples carry the _total suffix, so their family name must too
+            family = f"{metric.name}_total" if metric.kind == "counter" else metric.name
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Request and agent stages: request_parse, admission_wait, cache_lookup,
+# intent_route, history_compact, message_convert, first_token, agent, total
+STAGE_SECONDS = REGISTRY.histogram(
+    "delta_chat_stage_seconds", "Time spent in each stage of a chat request", ["stage"])
+CHAT_REQUESTS = REGISTRY.counter(
+    "delta_chat_requests", "Chat requests by mode and how they were answered", ["mode", "outcome"])
+LLM_CALLS = REGISTRY.counter("delta_llm_calls", "LLM calls made by the agent", ["status"])
+LLM_SECONDS = REGISTRY.histogram("delta_llm_call_seconds", "Duration of LLM calls made by the agent")
+TOOL_CALLS = REGISTRY.counter("delta_tool_calls", "Tool calls made by the agent", ["tool", "status"])
+TOOL_SECONDS = REGISTRY.histogram("delta_tool_call_seconds", "Duration of tool calls", ["tool"])
+TOOL_STEP_SECONDS = REGISTRY.histogram(
+    "delta_tool_step_seconds", "Wall time of each agent step's tool calls, by number of calls in the step", ["calls"])
+HTTP_CONNECT_SECONDS = REGISTRY.histogram(
+    "delta_llm_http_connect_seconds", "New LLM HTTP connections: TCP connect and TLS handshake time", ["phase"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+AGENT_LIMIT_HITS = REGISTRY.counter(
+    "delta_agent_limit_hits", "Agent runs cut short by the request deadline or the iteration cap",
+    ["limit", "phase"])
+CANCELLED_RUNS = REGISTRY.counter(
+    "delta_agent_cancelled_runs", "Agent runs cancelled because the client disconnected")
+RECLAIMED_SECONDS = REGISTRY.counter(
+    "delta_agent_reclaimed_seconds",
+    "Estimated agent seconds not spent on cancelled runs (mean run time minus time already spent)")
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block into delta_chat_stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM and tool call counts and durations for an agent run."""
+
+    # Called directly from the event loop instead of a worker thread
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, Optional[str]]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), None)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, "ok")
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._started[run_id] = (time.perf_counter(), name)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_tool(run_id, "error")
+
+    def abandon(self, run_ids: Iterable[Any], status: str = "cancelled") -> None:
+        """
+        Close runs that were cancelled in flight: LangChain sends no end or
+        error callback for a CancelledError (client disconnect, deadline).
+        """
+        for run_id in run_ids:
+            run_id = run_id if isinstance(run_id, UUID) else UUID(str(run_id))
+            started = self._started.get(run_id)
+            if started is None:
+                continue
+            if started[1] is None:
+                self._finish_llm(run_id, status)
+            else:
+                self._finish_tool(run_id, status)
+
+    def _finish_llm(self, run_id: UUID, status: str) -> None:
+        started = self._started.pop(run_id, None)
+        LLM_CALLS.inc(status=status)
+        if started:
+            LLM_SECONDS.observe(time.perf_counter() - started[0])
+
+    def _finish_tool(self, run_id: UUID, status: str) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, name = started
+        TOOL_CALLS.inc(tool=name, status=status)
+        TOOL_SECONDS.observe(time.perf_counter() - start, tool=name)
+
+
+metrics_callback = MetricsCallbackHandler()
@@ -0,0 +1,116 @@
+"""
+Speculative slot-list prefetch after a lead is captured.
+
+The usual flow is save lead -> ask for times -> book. As soon as
+save_lead_tool succeeds, the free-slot list is computed in the background
+and kept for that session for a short TTL, so the next turn's
+get_available_slots_tool answers from it. An entry is only served while the
+booking index is unchanged since it was computed (any booking or release
+in between makes it stale), and at most once.
+
+Only session-mode turns are prefetched for; full-history requests carry no
+session to key the entry by.
+
+Prefetches that expire, go stale or are replaced without being served are
+counted as wasted; hits and misses count the get_available_slots_tool calls
+that had a session to look up.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Session of the agent turn being run, for the tools (None in full-history mode: no prefetch)
+current_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("session", default=None)
+
+
+class SlotPrefetcher:
+    """Per-session slot lists computed ahead of the turn that asks for them."""
+
+    def __init__(self, compute: Callable[[], str], version: Callable[[], int], ttl: float = 120.0,
+                 max_sessions: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.compute = compute
+        self.version = version
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        # session -> (expires_at, index version, slot list)
+        self._entries: "OrderedDict[str, Tuple[float, int, str]]" = OrderedDict()
+
+        # Counters
+        self.prefetches = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_sessions > 0
+
+    def schedule(self, session: Optional[str] = None) -> None:
+        """Compute the slot list for `session` (default: the current one) after this step."""
+        session = session or current_session.get()
+        if session is None or not self.enabled:
+            return
+        # Runs once the tool has returned, off the turn's critical path
+        asyncio.get_running_loop().call_soon(self._prefetch, session)
+
+    def _prefetch(self, session: str) -> None:
+        try:
+            version = self.version()
+            listing = self.compute()
+        except Exception as e:
+            logger.warning(f"Slot prefetch failed: {type(e).__name__}: {e}")
+            return
+        self.sweep()
+        if self._entries.pop(session, None) is not None:
+            self.wasted += 1
+        self._entries[session] = (self._clock() + self.ttl, version, listing)
+        self.prefetches += 1
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self.wasted += 1
+
+    def take(self, session: Optional[str] = None) -> Optional[str]:
+        """The prefetched slot list for `session`, if still valid; consumed on use."""
+        session = session or current_session.get()
+        if session is None or not self.enabled:
+            return None
+        entry = self._entries.pop(session, None)
+        if entry is not None:
+            expires_at, version, listing = entry
+            if expires_at > self._clock() and version == self.version():
+                self.hits += 1
+                return listing
+            self.wasted += 1
+        self.misses += 1
+        return None
+
+    def sweep(self) -> int:
+        """Drop expired entries (counted as wasted). Entries are in expiry order."""
+        now = self._clock()
+        expired = 0
+        while self._entries and next(iter(self._entries.values()))[0] <= now:
+            self._entries.popitem(last=False)
+            expired += 1
+        self.wasted += expired
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        self.sweep()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "prefetches": self.prefetches,
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted": self.wasted,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
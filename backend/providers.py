@@ -0,0 +1,294 @@
+"""
+Multi-provider LLM pool with failover and hedged requests.
+
+`ProviderPool` is a chat model that fronts an ordered list of providers
+(Gemini, Groq, ...). Calls go to the first provider; if it fails the next
+one is tried. With hedging on, a backup request is also fired when the
+current provider is slower than its own recent p95, and whichever answers
+first wins. For streaming calls "answers" means "produces its first chunk";
+once a stream has started it is never switched.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from metrics import REGISTRY
+
+# Inner provider calls must not report to the pool's callbacks, otherwise
+# every token would be emitted twice (once per layer)
+_ISOLATED = {"callbacks": []}
+
+
+class LatencyTracker:
+    """Rolling latency samples and error counts for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.successes = 0
+        self.errors = 0
+        self.hedges_fired = 0  # backup requests sent to this provider
+        self.hedges_won = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.successes += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "successes": self.successes,
+            "errors": self.errors,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# Shared by every pool (and every tool-bound copy of a pool)
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def tracker_for(name: str) -> LatencyTracker:
+    if name not in _trackers:
+        _trackers[name] = LatencyTracker()
+    return _trackers[name]
+
+
+def stats() -> Dict[str, Any]:
+    return {name: tracker.stats() for name, tracker in _trackers.items()}
+
+
+def _per_provider(field: str) -> Callable[[], Dict[str, Any]]:
+    return lambda: {name: getattr(tracker, field) for name, tracker in _trackers.items()}
+
+
+REGISTRY.gauge("delta_llm_provider_successes", "Successful calls per LLM provider",
+               _per_provider("successes"), labelname="provider", kind="counter")
+REGISTRY.gauge("delta_llm_provider_errors", "Failed calls per LLM provider",
+               _per_provider("errors"), labelname="provider", kind="counter")
+REGISTRY.gauge("delta_llm_provider_hedges_fired", "Hedged backup requests sent to each provider",
+               _per_provider("hedges_fired"), labelname="provider", kind="counter")
+REGISTRY.gauge("delta_llm_provider_hedges_won", "Hedged backup requests that answered first",
+               _per_provider("hedges_won"), labelname="provider", kind="counter")
+
+
+class ProviderPool(BaseChatModel):
+    """
+    Ordered pool of chat models behind one BaseChatModel interface.
+
+    `providers` are chat models (or tool-bound runnables), `names` label them
+    for latency tracking. Hedging waits `max(hedge_min_delay, p95)` of the
+    running provider, or `hedge_default_delay` until enough samples exist.
+    """
+
+    providers: List[Any]
+    names: List[str]
+    hedge: bool = False
+    hedge_min_delay: float = 0.25
+    hedge_default_delay: float = 2.0
+    hedge_min_samples: int = 20
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider-pool"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ProviderPool":
+        """Bind the tools on every provider, keeping the pool semantics."""
+        return ProviderPool(
+            providers=[provider.bind_tools(tools, **kwargs) for provider in self.providers],
+            names=self.names,
+            hedge=self.hedge,
+            hedge_min_delay=self.hedge_min_delay,
+            hedge_default_delay=self.hedge_default_delay,
+            hedge_min_samples=self.hedge_min_samples,
+        )
+
+    def _hedge_delay(self, index: int) -> float:
+        tracker = tracker_for(self.names[index])
+        if len(tracker.samples) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, tracker.percentile(0.95))
+
+    async def _race(self, start: Callable[[int], Any]) -> Any:
+        """
+        Run `start(i)` coroutines provider by provider and return the first
+        success. Failures move on to the next provider immediately; with
+        hedging, a slow provider also gets a backup after its hedge delay.
+        """
+        tasks: Dict[asyncio.Task, int] = {}
+        next_index = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal next_index
+            tasks[asyncio.ensure_future(start(next_index))] = next_index
+            next_index += 1
+
+        launch()
+        try:
+            while tasks:
+                timeout = None
+                if self.hedge and next_index < len(self.providers):
+                    timeout = self._hedge_delay(next_index - 1)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    tracker_for(self.names[next_index]).hedges_fired += 1
+                    launch()
+                    continue
+                for task in done:
+                    index = tasks.pop(task)
+                    if task.exception() is None:
+                        if index > 0 and tasks:
+                            tracker_for(self.names[index]).hedges_won += 1
+                        return task.result()
+                    last_error = task.exception()
+                if not tasks and next_index < len(self.providers):
+                    launch()
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the losers unwind before their streams are closed
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _timed(self, index: int, call: Callable[[], Any]) -> Any:
+        tracker = tracker_for(self.names[index])
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            tracker.errors += 1
+            raise
+        tracker.record(time.perf_counter() - start)
+        return result
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Sync path: plain failover, no hedging
+        last_error: Optional[Exception] = None
+        for index, provider in enumerate(self.providers):
+            tracker = tracker_for(self.names[index])
+            start = time.perf_counter()
+            try:
+                message = provider.invoke(messages, stop=stop, config=_ISOLATED, **kwargs)
+            except Exception as e:
+                tracker.errors += 1
+                last_error = e
+                continue
+            tracker.record(time.perf_counter() - start)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise last_error
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        def start(index: int):
+            provider = self.providers[index]
+            return self._timed(index, lambda: provider.ainvoke(messages, stop=stop, config=_ISOLATED, **kwargs))
+
+        message = await self._race(start)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        # Sync path: fail over until some provider produces a first chunk
+        last_error: Optional[Exception] = None
+        for index, provider in enumerate(self.providers):
+            tracker = tracker_for(self.names[index])
+            start = time.perf_counter()
+            stream = iter(provider.stream(messages, stop=stop, config=_ISOLATED, **kwargs))
+            try:
+                first = next(stream, None)
+            except Exception as e:
+                tracker.errors += 1
+                last_error = e
+                continue
+            tracker.record(time.perf_counter() - start)
+            if first is None:
+                return
+            yield ChatGenerationChunk(message=first)
+            for chunk in stream:
+                yield ChatGenerationChunk(message=chunk)
+            return
+        raise last_error
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        streams: Dict[int, AsyncIterator] = {}
+
+        def start(index: int):
+            stream = self.providers[index].astream(messages, stop=stop, config=_ISOLATED, **kwargs)
+            streams[index] = stream
+
+            async def first_chunk():
+                async for chunk in stream:
+                    return index, chunk
+                return index, None  # empty stream
+
+            return self._timed(index, first_chunk)
+
+        try:
+            winner, chunk = await self._race(start)
+        except BaseException:
+            for stream in streams.values():
+                await _close(stream)
+            raise
+        for index, stream in streams.items():
+            if index != winner:
+                await _close(stream)
+
+        stream = streams[winner]
+        try:
+            if chunk is None:
+                return
+            yield ChatGenerationChunk(message=chunk)
+            async for chunk in stream:
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            await _close(stream)
+
+
+async def _close(stream: AsyncIterator) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
@@ -0,0 +1,110 @@
+"""
+Per-turn model tier routing.
+
+Most turns are greetings, slot-filling ("I'm Jane, jane@acme.com", "10am
+works") or short questions that the fast model handles well. Long
+multi-part briefs ("we need a voice agent that...") get the stronger
+model. The choice is made from cheap local features of the newest user
+message, before any LLM call:
+
+- a recognised single-tool intent (intents.classify) -> fast
+- length and structure (lines, questions) over the `strong_min_chars`
+  budget -> strong
+- otherwise fast ("tool" when the turn looks like a booking step)
+
+Per-tier counters record turns, agent time, LLM calls and tokens (from
+the provider's usage metadata, or estimated), plus an estimated cost from
+each tier's price per 1k tokens.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from intents import OTHER, classify, tool_likely
+
+FAST = "fast"
+STRONG = "strong"
+
+
+@dataclass
+class ModelTier:
+    name: str
+    model: str
+    cost_per_1k: float = 0.0  # USD per 1k tokens (input and output), for estimates
+
+
+def complexity(text: str, strong_min_chars: int) -> float:
+    """>= 1.0 means the message deserves the strong model."""
+    structure = text.count("\n") + text.count("?") + text.count("; ")
+    return len(text) / strong_min_chars + 0.2 * max(0, structure - 1)
+
+
+def choose_tier(text: str, strong_min_chars: int = 600) -> Tuple[str, str]:
+    """(tier, reason) for one user message. Pure and cheap."""
+    intent = classify(text)
+    if intent.name != OTHER and intent.confidence >= 0.5:
+        return FAST, "intent"
+    if complexity(text, strong_min_chars) >= 1.0:
+        return STRONG, "complex"
+    if tool_likely(text):
+        return FAST, "tool"
+    return FAST, "simple"
+
+
+class ModelRouter:
+    """Picks a tier per turn and keeps per-tier usage counters."""
+
+    def __init__(self, fast: ModelTier, strong: Optional[ModelTier] = None, strong_min_chars: int = 600):
+        self.tiers = {FAST: fast}
+        if strong is not None:
+            self.tiers[STRONG] = strong
+        self.strong_min_chars = strong_min_chars
+
+        # Counters
+        self.decisions: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.turns: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.llm_calls: Dict[str, int] = defaultdict(int)
+        self.input_tokens: Dict[str, int] = defaultdict(int)
+        self.output_tokens: Dict[str, int] = defaultdict(int)
+
+    @property
+    def enabled(self) -> bool:
+        """Routing only happens when a strong tier is configured."""
+        return STRONG in self.tiers
+
+    def choose(self, text: str) -> Tuple[str, str]:
+        tier, reason = choose_tier(text, self.strong_min_chars) if self.enabled else (FAST, "single")
+        self.decisions[(tier, reason)] += 1
+        return tier, reason
+
+    def record_call(self, tier: str, input_tokens: int, output_tokens: int) -> None:
+        self.llm_calls[tier] += 1
+        self.input_tokens[tier] += input_tokens
+        self.output_tokens[tier] += output_tokens
+
+    def record_turn(self, tier: str, seconds: float) -> None:
+        self.turns[tier] += 1
+        self.seconds[tier] += seconds
+
+    def cost(self, tier: str) -> float:
+        tokens = self.input_tokens[tier] + self.output_tokens[tier]
+        return tokens / 1000 * self.tiers[tier].cost_per_1k if tier in self.tiers else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "tiers": {
+                name: {
+                    "model": tier.model,
+                    "turns": self.turns[name],
+                    "llm_calls": self.llm_calls[name],
+                    "avg_turn_ms": round(1000 * self.seconds[name] / self.turns[name], 1) if self.turns[name] else None,
+                    "input_tokens": self.input_tokens[name],
+                    "output_tokens": self.output_tokens[name],
+                    "est_cost_usd": round(self.cost(name), 6),
+                }
+                for name, tier in self.tiers.items()
+            },
+            "decisions": {f"{tier}:{reason}": count for (tier, reason), count in self.decisions.items()},
+        }
@@ -0,0 +1,117 @@
+"""
+Server-side conversation sessions.
+
+In session mode the client posts only its newest message plus a session ID,
+and the server keeps the history. Storage sits behind `SessionBackend` so the
+in-process default can be swapped for a shared store (Redis, Postgres, ...)
+when running more than one worker.
+"""
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class SessionBackend(ABC):
+    """Storage interface for per-session message lists."""
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the stored messages, or None if the session is unknown."""
+
+    @abstractmethod
+    async def save(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Replace the stored messages for a session."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Forget a session."""
+
+
+class InMemorySessionBackend(SessionBackend):
+    """
+    Process-local backend with LRU and idle-time eviction.
+
+    At most `max_sessions` sessions are kept; the least recently used one is
+    dropped first. Sessions untouched for `idle_ttl` seconds expire lazily.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def load(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        touched, messages = entry
+        if self._clock() - touched >= self.idle_ttl:
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+        self._sessions[session_id] = (self._clock(), messages)
+        self._sessions.move_to_end(session_id)
+        return list(messages)
+
+    async def save(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        self._sessions[session_id] = (self._clock(), list(messages))
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SessionNotFound(Exception):
+    """The client resumed a session this store does not hold (unknown, evicted or expired)."""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"Unknown or expired session {session_id!r}")
+        self.session_id = session_id
+
+
+class SessionStore:
+    """Conversation history keyed by session ID, on top of a backend."""
+
+    def __init__(self, backend: SessionBackend):
+        self.backend = backend
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    async def history(self, session_id: str) -> List[Dict[str, Any]]:
+        """Stored messages for a session (empty for new or expired sessions)."""
+        return await self.backend.load(session_id) or []
+
+    async def resume(self, session_id: str) -> List[Dict[str, Any]]:
+        """Stored messages for a session the client already holds; SessionNotFound if it is gone."""
+        messages = await self.backend.load(session_id)
+        if messages is None:
+            raise SessionNotFound(session_id)
+        return messages
+
+    async def append(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        history = await self.history(session_id)
+        history.extend(messages)
+        await self.backend.save(session_id, history)
+
+    def stats(self) -> Dict[str, Any]:
+        backend = self.backend
+        return {
+            "backend": type(backend).__name__,
+            "sessions": len(backend) if hasattr(backend, "__len__") else None,
+            "evictions": getattr(backend, "evictions", None),
+            "expirations": getattr(backend, "expirations", None),
+        }
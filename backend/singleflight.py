@@ -0,0 +1,162 @@
+"""
+Single-flight coalescing of identical in-flight chat requests.
+
+Double-submits from the widget and proxy retries arrive as byte-identical
+payloads a few milliseconds apart. Instead of one agent run each (one LLM
+call each, and possibly duplicate leads), the first request for a key
+starts the run and later identical requests subscribe to it. Every
+subscriber replays the output produced so far and then follows it live.
+
+The run belongs to the flight, not to any one request. It starts when the
+first subscriber begins reading, keeps going while anyone is still reading,
+and is cancelled when the last subscriber leaves early. A key is forgotten
+as soon as its run finishes, so only concurrent duplicates are merged.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+def request_key(*parts: Any) -> str:
+    """Hash of the exact request content (no normalisation: only true duplicates match)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One shared run: buffered output plus live fan-out to its subscribers."""
+
+    def __init__(self, start: Callable[[Dict[str, Any]], AsyncIterator[Any]], on_done: Callable[[], None]):
+        self.trace: Dict[str, Any] = {}
+        # Resolved by the leader once the run may start (e.g. after admission),
+        # or failed with the reason it can't; followers wait on it
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Session the leader's turn is stored under
+        self.session_id: Optional[str] = None
+        # Frees what the run holds (e.g. its admission slot): called once, when
+        # the run ends or when every request leaves before it started
+        self.release: Callable[[], None] = lambda: None
+        self.requests = 0
+        self.items: List[Any] = []
+        self.done = False
+        self.subscribers = 0
+        self._start = start
+        self._on_done = on_done
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        self._changed: Optional[asyncio.Future] = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def admit(self) -> None:
+        if not self.ready.done():
+            self.ready.set_result(None)
+
+    def reject(self, error: BaseException) -> None:
+        if not self.ready.done():
+            self.ready.set_exception(error)
+            self.ready.exception()  # retrieved: followers may never look
+
+    def _notify(self) -> None:
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+
+    async def _run(self) -> None:
+        try:
+            async for item in self._start(self.trace):
+                self.items.append(item)
+                self._notify()
+        except BaseException as e:
+            self._error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self._on_done()
+            self.release()
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Everything the run has produced, then each new item until it ends."""
+        self.subscribers += 1
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        position = 0
+        try:
+            while True:
+                while position < len(self.items):
+                    position += 1
+                    yield self.items[position - 1]
+                if self.done:
+                    if self._error is not None and not isinstance(self._error, asyncio.CancelledError):
+                        raise self._error
+                    return
+                if self._changed is None:
+                    self._changed = asyncio.get_running_loop().create_future()
+                # wait() rather than await: leaving must not cancel the shared future
+                await asyncio.wait({self._changed})
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is left to read it. The wait may itself be cancelled
+                # (the server keeps cancelling a disconnected request); the run
+                # still winds down on its own
+                self._task.cancel()
+                await asyncio.wait({self._task})
+
+
+class SingleFlight:
+    """Registry of in-flight runs by request key."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[str, Flight] = {}
+
+        # Counters
+        self.started = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def join(self, key: str, start: Callable[[Dict[str, Any]], AsyncIterator[Any]]) -> Tuple[Flight, bool]:
+        """
+        Return (flight, leader) for `key`. The leader's `start(trace)` produces
+        the output; followers share it. Nothing runs until someone subscribes.
+        """
+        flight = self._flights.get(key) if self.enabled else None
+        if flight is not None:
+            flight.requests += 1
+            self.shared += 1
+            return flight, False
+
+        def forget() -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+        flight = Flight(start, forget)
+        flight.requests = 1
+        if self.enabled:
+            self._flights[key] = flight
+        self.started += 1
+        return flight, True
+
+    def leave(self, key: str, flight: Flight) -> None:
+        """A request is done with `flight`; the last one out drops it if it never started."""
+        flight.requests -= 1
+        if flight.requests == 0 and not flight.started:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "shared": self.shared,
+        }
@@ -0,0 +1,107 @@
+"""
+Concurrent tool calls within one agent step.
+
+When the model asks for several tools in one response (name, email and a
+chosen time in one message -> save_lead_tool + book_call_tool), the async
+AgentExecutor already runs them with asyncio.gather. Some tools still have
+to see another one's effect: a slot list fetched in the same step as a
+booking should not offer the slot just taken. `tool_dependencies` declares
+those pairs ({"get_available_slots_tool": {"book_call_tool"}}): a call
+waits for any call to the tools it depends on in the same step, the rest
+start at once. Each step's wall time is recorded in
+`delta_tool_step_seconds`, next to the per-call `delta_tool_call_seconds`.
+"""
+import asyncio
+import contextvars
+import time
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Mapping, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+
+from metrics import TOOL_STEP_SECONDS
+
+
+def check_dependencies(dependencies: Mapping[str, FrozenSet[str]]) -> None:
+    """Raise ValueError if the declared order has a cycle (it would never run)."""
+    visiting, done = set(), set()
+
+    def visit(tool: str, path: List[str]) -> None:
+        if tool in done:
+            return
+        if tool in visiting:
+            raise ValueError(f"Tool dependency cycle: {' -> '.join(path + [tool])}")
+        visiting.add(tool)
+        for dependency in dependencies.get(tool, ()):
+            visit(dependency, path + [tool])
+        visiting.discard(tool)
+        done.add(tool)
+
+    for tool in dependencies:
+        visit(tool, [])
+
+
+class _Step:
+    """The tool calls of one agent step, with a completion future each."""
+
+    def __init__(self):
+        self.actions: List[AgentAction] = []
+        self.finished: Dict[int, asyncio.Future] = {}
+
+    def add(self, action: AgentAction) -> None:
+        self.actions.append(action)
+        self.finished[id(action)] = asyncio.get_running_loop().create_future()
+
+    async def wait_for(self, action: AgentAction, depends_on: FrozenSet[str]) -> None:
+        waits = [self.finished[id(other)] for other in self.actions
+                 if other is not action and other.tool in depends_on]
+        if waits:
+            await asyncio.wait(waits)
+
+    def done(self, action: AgentAction) -> None:
+        future = self.finished.get(id(action))
+        if future is not None and not future.done():
+            future.set_result(None)
+
+
+# The step being executed by the current agent run (one executor serves many runs)
+_current_step: contextvars.ContextVar[Optional[_Step]] = contextvars.ContextVar("agent_step", default=None)
+
+
+class ParallelToolsAgentExecutor(AgentExecutor):
+    """AgentExecutor that orders same-step tool calls by `tool_dependencies` and times each step."""
+
+    tool_dependencies: Dict[str, FrozenSet[str]] = {}
+
+    async def _aiter_next_step(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        step = _Step()
+        token = _current_step.set(step)
+        start = None
+        outputs = super()._aiter_next_step(*args, **kwargs)
+        try:
+            async for output in outputs:
+                if isinstance(output, AgentAction):
+                    # All actions are yielded before any of them runs
+                    step.add(output)
+                    start = time.perf_counter()
+                yield output
+        finally:
+            await outputs.aclose()
+            try:
+                _current_step.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. by the garbage collector)
+                pass
+        if start is not None:
+            calls = str(len(step.actions)) if len(step.actions) < 3 else "3+"
+            TOOL_STEP_SECONDS.observe(time.perf_counter() - start, calls=calls)
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        step = _current_step.get()
+        if step is None:
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        try:
+            await step.wait_for(agent_action, self.tool_dependencies.get(agent_action.tool, frozenset()))
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        finally:
+            step.done(agent_action)
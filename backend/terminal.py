@@ -0,0 +1,73 @@
+"""
+Terminal tool results.
+
+A successful booking or lead save leaves nothing for the model to decide,
+yet AgentExecutor would still send the tool output back for one more LLM
+round trip just to phrase the confirmation. Tools mark such results by
+returning a `FinalResult`: the string the model would have seen, plus a
+reply rendered from a local template. `TerminalAgentExecutor` ends the
+run with that reply when the tool is listed as terminal; any other tool,
+an error string, or a tool not in the list goes back to the model as usual.
+
+Only the booking is terminal by default. A lead is often saved from a
+message that also asks something else ("I'm Jane, jane@acme.com - what do
+you charge?"), and a canned reply would drop the question; contact-only
+messages are already answered without the LLM by the intent router.
+"""
+import os
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from langchain_core.agents import AgentAction, AgentFinish
+
+from steps import ParallelToolsAgentExecutor
+
+REPLY_TEMPLATES: Dict[str, str] = {
+    "book_call_tool": (
+        "You're booked, {first_name}! Your {intent} is on {when} ({tz}). Reference: {reference}"
+    ),
+    "save_lead_tool": (
+        "Thanks, {first_name}! I've saved your details. "
+        "Would you like to see the available times for a discovery call?"
+    ),
+}
+
+
+def parse_terminal_tools(text: str) -> FrozenSet[str]:
+    """"book_call_tool, save_lead_tool" -> frozenset of tool names."""
+    return frozenset(name.strip() for name in text.split(",") if name.strip())
+
+
+TERMINAL_TOOLS = parse_terminal_tools(os.getenv("TERMINAL_TOOLS", "book_call_tool"))
+
+
+class FinalResult(str):
+    """Tool output (as the model would see it) carrying a ready-made user reply."""
+
+    reply: str
+
+    def __new__(cls, observation: str, reply: str) -> "FinalResult":
+        result = super().__new__(cls, observation)
+        result.reply = reply
+        return result
+
+
+def final_result(tool_name: str, observation: str, **fields: Any) -> FinalResult:
+    """Render `tool_name`'s reply template; `name` also provides `first_name`."""
+    if "name" in fields and "first_name" not in fields:
+        fields["first_name"] = str(fields["name"]).split()[0] if str(fields["name"]).strip() else "there"
+    return FinalResult(observation, REPLY_TEMPLATES[tool_name].format(**fields))
+
+
+class TerminalAgentExecutor(ParallelToolsAgentExecutor):
+    """AgentExecutor that finishes on a `FinalResult` from a terminal tool."""
+
+    terminal_tools: FrozenSet[str] = frozenset()
+
+    def _get_tool_return(self, next_step_output: Tuple[AgentAction, str]) -> Optional[AgentFinish]:
+        agent_action, observation = next_step_output
+        if isinstance(observation, FinalResult) and agent_action.tool in self.terminal_tools:
+            return_value_key = "output"
+            if self._action_agent.return_values:
+                return_value_key = self._action_agent.return_values[0]
+            return AgentFinish({return_value_key: observation.reply}, "")
+        return super()._get_tool_return(next_step_output)
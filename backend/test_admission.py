@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Admission control tests: concurrency cap, bounded queue, fast 503s.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_admission.py  (or: python test_admission.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import main
+from admission import AdmissionController, Overloaded
+from fake_llm import FakeStreamingChatModel
+
+
+def test_queue_full_rejects_immediately():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+        held = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        start = time.monotonic()
+        try:
+            await controller.acquire()
+            raise AssertionError("expected Overloaded")
+        except Overloaded as e:
+            assert e.reason == "queue full"
+            assert e.retry_after >= 1
+        assert time.monotonic() - start < 0.05
+
+        held.release()
+        second = await waiter
+        assert controller.in_flight == 1
+        second.release()
+        assert controller.stats()["rejected_full"] == 1
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_and_fifo_handoff():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout=0.05)
+        held = await controller.acquire()
+        try:
+            await controller.acquire()
+            raise AssertionError("expected Overloaded")
+        except Overloaded as e:
+            assert e.reason == "queue timeout"
+
+        controller.queue_timeout = 5
+        order = []
+
+        async def waiter(tag):
+            slot = await controller.acquire()
+            order.append(tag)
+            slot.release()
+
+        tasks = [asyncio.ensure_future(waiter(i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        held.release()
+        held.release()  # idempotent
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        stats = controller.stats()
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+        assert stats["rejected_timeout"] == 1
+        assert stats["queue_wait_max_ms"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout=5)
+        held = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        held.release()
+        assert controller.in_flight == 0 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_chat_endpoint_sheds_load_with_retry_after():
+    llm = FakeStreamingChatModel(responses=["Thanks for reaching out!"], latency=0.2)
+    executor = agent.build_agent_executor(llm)
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.invalidate()
+    main.admission = AdmissionController(max_concurrency=2, max_queue=2, queue_timeout=5)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Distinct messages: identical concurrent requests would share one run
+            payloads = [{"messages": [{"role": "user", "content": f"hi {i}"}]} for i in range(8)]
+            return await asyncio.gather(*[client.post("/api/chat", json=p) for p in payloads])
+
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        main.admission = AdmissionController()
+
+    ok = [r for r in responses if r.status_code == 200]
+    rejected = [r for r in responses if r.status_code == 503]
+    assert len(ok) == 4 and len(rejected) == 4
+    assert all(r.text == "Thanks for reaching out!" for r in ok)
+    assert all(int(r.headers["Retry-After"]) >= 1 for r in rejected)
+
+
+if __name__ == "__main__":
+    test_queue_full_rejects_immediately()
+    test_queue_timeout_and_fifo_handoff()
+    test_cancelled_waiter_does_not_leak_slot()
+    test_chat_endpoint_sheds_load_with_retry_after()
+    print("All admission tests passed")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Availability engine tests: business hours, time zones, the booking index
+and double-booking prevention in book_call_tool.
+
+Runs offline: no API keys or database required.
+Usage: python -m pytest -q test_availability.py  (or: python test_availability.py)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+import tools
+from availability import BookingCalendar, booking_calendar, parse_days
+from database import InMemoryRepository
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+
+# Monday 2025-03-03 08:00 UTC
+NOW = datetime(2025, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def calendar(**kwargs):
+    options = dict(tz="UTC", hours="09:00-17:00", days="mon-fri", slot_minutes=30,
+                   horizon_days=14, min_notice_minutes=120, clock=lambda: NOW)
+    options.update(kwargs)
+    return BookingCalendar(**options)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_parse_days():
+    assert parse_days("mon-fri") == {0, 1, 2, 3, 4}
+    assert parse_days("Mon, Wed,sat") == {0, 2, 5}
+
+
+def test_free_slots_follow_business_hours_and_notice():
+    cal = calendar()
+    slots = cal.free_slots(limit=4, per_day=2)
+    # 08:00 + 2h notice -> 10:00 first; one morning and one afternoon slot per day
+    assert slots == [utc(2025, 3, 3, 10, 0), utc(2025, 3, 3, 13, 0), utc(2025, 3, 4, 9, 0), utc(2025, 3, 4, 13, 0)]
+    assert all(cal.is_bookable(s) for s in slots)
+
+    assert not cal.is_bookable(utc(2025, 3, 3, 9, 0))     # inside the notice period
+    assert not cal.is_bookable(utc(2025, 3, 4, 9, 15))    # off the slot grid
+    assert not cal.is_bookable(utc(2025, 3, 4, 16, 45))   # would end after closing
+    assert not cal.is_bookable(utc(2025, 3, 8, 10, 0))    # Saturday
+    assert not cal.is_bookable(utc(2025, 3, 20, 10, 0))   # beyond the horizon
+
+
+def test_business_time_zone():
+    cal = calendar(tz="America/New_York", hours="09:00-12:00")
+    first = cal.free_slots(limit=1)[0]
+    # 09:00 EST is 14:00 UTC
+    assert first == utc(2025, 3, 3, 14, 0)
+    assert cal.format_slot(first) == "2025-03-03 at 09:00 AM"
+    assert cal.parse_slot("2025-03-03 at 09:00 AM") == first
+    # After the DST switch (2025-03-09) 09:00 EDT is 13:00 UTC
+    assert cal.is_bookable(utc(2025, 3, 10, 13, 0))
+    assert not cal.is_bookable(utc(2025, 3, 10, 16, 0))  # 12:00 EDT, closing time
+
+
+def test_index_detects_overlaps():
+    cal = calendar()
+    # A legacy booking off the slot grid blocks both slots it overlaps
+    cal.load([datetime(2025, 3, 4, 10, 15)])
+    assert not cal.is_free(utc(2025, 3, 4, 10, 0))
+    assert not cal.is_free(utc(2025, 3, 4, 10, 30))
+    assert cal.is_free(utc(2025, 3, 4, 9, 30))
+    assert cal.is_free(utc(2025, 3, 4, 11, 0))
+
+    assert cal.reserve(utc(2025, 3, 4, 11, 0))
+    assert not cal.reserve(utc(2025, 3, 4, 11, 0))
+    assert cal.conflicts == 1
+    cal.release(utc(2025, 3, 4, 11, 0))
+    assert cal.is_free(utc(2025, 3, 4, 11, 0))
+
+
+def test_slot_ids_round_trip():
+    cal = calendar()
+    slots = cal.free_slots(limit=6)
+    ids = [cal.slot_id(s) for s in slots]
+    assert len(set(ids)) == len(ids)
+    # Six characters today, seven once epoch minutes pass 32**5 (2033)
+    assert all(set(i) <= set(ALPHABET) for i in ids)
+    assert [cal.slot_from_id(i) for i in ids] == slots
+    # Stable across instances (and restarts) and case-insensitive
+    assert calendar().slot_id(slots[0]) == ids[0]
+    assert cal.resolve(ids[0].lower()) == slots[0]
+
+    typo = ids[0][:-2] + ("0" if ids[0][-2] != "0" else "1") + ids[0][-1]
+    for bad in (typo, "HELLO!", "", "2025-03-03"):
+        try:
+            cal.slot_from_id(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} decoded")
+
+
+def test_slot_ids_round_trip_off_the_epoch_grid():
+    # Openings that are not an epoch multiple of the slot length
+    for cal in (calendar(tz="Asia/Kolkata", slot_minutes=60),
+                calendar(hours="09:15-17:00"),
+                calendar(slot_minutes=40)):
+        slots = cal.free_slots(limit=6)
+        assert slots
+        for slot in slots:
+            assert cal.slot_from_id(cal.slot_id(slot)) == slot
+            assert cal.reserve(cal.resolve(cal.slot_id(slot)))
+
+
+def test_free_slots_skip_taken_slots():
+    cal = calendar()
+    cal.load([datetime(2025, 3, 3, 10, 0), datetime(2025, 3, 3, 10, 30)])
+    assert cal.free_slots(limit=1) == [utc(2025, 3, 3, 11, 0)]
+
+
+def test_load_from_repository():
+    repository = InMemoryRepository()
+    for when in (datetime(2025, 3, 1, 10, 0), datetime(2025, 3, 4, 10, 0)):
+        asyncio.run(repository.insert_booking(str(when), "Jane", "jane@example.com", "Discovery Call",
+                                              when, "pending", None))
+    cal = calendar()
+    asyncio.run(cal.load_from(repository))
+    assert len(cal) == 1  # past bookings are not loaded
+    assert not cal.is_free(utc(2025, 3, 4, 10, 0))
+
+
+def test_book_call_tool_prevents_double_booking():
+    repository = InMemoryRepository()
+    previous = database.get_repository()
+    database.set_repository(repository)
+    booking_calendar.load([])
+    slot = booking_calendar.free_slots(limit=1)[0]
+    slot_id = booking_calendar.slot_id(slot)
+    shown = booking_calendar.format_slot(slot)
+
+    async def book(name):
+        return await tools.book_call_tool.ainvoke(
+            {"name": name, "email": f"{name.lower()}@example.com", "slot_id": slot_id}
+        )
+
+    async def scenario():
+        return await asyncio.gather(book("Jane"), book("John"))
+
+    try:
+        first, second = asyncio.run(scenario())
+        assert first.startswith("Booking confirmed for Jane")
+        assert second.startswith(f"Error booking call: {shown} is not available")
+        assert "Available slots:" in second and slot_id not in second.split("Available slots:")[1]
+        assert [b["selected_time"] for b in repository.bookings] == [slot.replace(tzinfo=None)]
+        assert asyncio.run(book("Jim")).startswith("Error booking call")
+
+        unreadable = asyncio.run(tools.book_call_tool.ainvoke(
+            {"name": "Jim", "email": "jim@example.com", "slot_id": "sometime next week"}
+        ))
+        assert unreadable.startswith("Error booking call: unknown slot")
+    finally:
+        booking_calendar.load([])
+        database.set_repository(previous)
+
+
+def test_failed_write_releases_the_slot():
+    class BrokenRepository(InMemoryRepository):
+        async def insert_booking(self, *args):
+            raise ConnectionError("database down")
+
+    previous = database.get_repository()
+    database.set_repository(BrokenRepository())
+    booking_calendar.load([])
+    slot = booking_calendar.free_slots(limit=1)[0]
+    try:
+        reply = asyncio.run(tools.book_call_tool.ainvoke(
+            # A time copied from the slot list is accepted in place of the ID
+            {"name": "Jane", "email": "jane@example.com", "slot_id": booking_calendar.format_slot(slot)}
+        ))
+        assert reply.startswith("Error booking call")
+        assert booking_calendar.is_free(slot)
+    finally:
+        database.set_repository(previous)
+
+
+def test_tools_are_coroutines_with_sync_wrappers():
+    repository = InMemoryRepository()
+    previous = database.get_repository()
+    database.set_repository(repository)
+    booking_calendar.load([])
+    try:
+        assert all(t.coroutine is not None for t in tools.tools)
+        # The sync entry point runs the same coroutine
+        assert tools.get_available_slots_tool.invoke({}).startswith("Available slots:")
+        reply = tools.save_lead_tool.invoke({"name": "Jane", "email": "jane@example.com"})
+        assert reply.startswith("Successfully saved lead for Jane")
+        assert len(repository.leads) == 1
+    finally:
+        database.set_repository(previous)
+
+
+if __name__ == "__main__":
+    test_parse_days()
+    test_free_slots_follow_business_hours_and_notice()
+    test_business_time_zone()
+    test_index_detects_overlaps()
+    test_slot_ids_round_trip()
+    test_slot_ids_round_trip_off_the_epoch_grid()
+    test_free_slots_skip_taken_slots()
+    test_load_from_repository()
+    test_book_call_tool_prevents_double_booking()
+    test_failed_write_releases_the_slot()
+    test_tools_are_coroutines_with_sync_wrappers()
+    print("All availability tests passed")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Response cache tests: normalization, LRU/TTL bounds, prompt invalidation,
+and that only tool-free turns are replayed.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_cache.py  (or: python test_cache.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from cache import ResponseCache, conversation_key
+from fake_llm import FakeStreamingChatModel, tool_call
+
+
+def _user(content):
+    return [{"role": "user", "content": content}]
+
+
+def test_key_ignores_case_punctuation_and_spacing():
+    assert conversation_key(_user("Pricing?")) == conversation_key(_user("  pricing "))
+    assert conversation_key(_user("What do you do?")) == conversation_key(_user("what do you do"))
+    assert conversation_key(_user("pricing")) != conversation_key(_user("pricing plans"))
+    # Role matters: the same text from the assistant is a different conversation
+    assert conversation_key(_user("hi")) != conversation_key([{"role": "assistant", "content": "hi"}])
+
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache = ResponseCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"      # a is now most recent
+    cache.put("c", "C")               # evicts b
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert len(cache) == 2 and cache.evictions == 1
+
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_prompt_change_invalidates():
+    cache = ResponseCache()
+    cache.sync_prompt("v1")
+    cache.put("k", "answer")
+    cache.sync_prompt("v1")
+    assert cache.get("k") == "answer"
+    cache.sync_prompt("v2")
+    assert cache.get("k") is None
+    assert cache.invalidations == 1
+
+
+def _use(llm):
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+    return llm
+
+
+def test_repeated_faq_skips_llm():
+    llm = _use(FakeStreamingChatModel(responses=["We build AI sales agents."]))
+    hits = agent.response_cache.hits
+
+    first = asyncio.run(agent.run_agent(_user("What do you do?")))
+    second = asyncio.run(agent.run_agent(_user("what do you do")))
+    assert first == second == "We build AI sales agents."
+    assert llm.calls == 1
+    assert agent.response_cache.hits == hits + 1
+
+
+def test_tool_turns_are_not_cached():
+    llm = _use(FakeStreamingChatModel(responses=[
+        tool_call("get_available_slots_tool"),
+        "Tomorrow at 10:00 AM works.",
+    ]))
+    for _ in range(2):
+        reply = asyncio.run(agent.run_agent(_user("Any times available?")))
+        assert reply == "Tomorrow at 10:00 AM works."
+    assert llm.calls == 4
+
+
+def test_rebuilt_prompt_invalidates_cache():
+    llm = _use(FakeStreamingChatModel(responses=["Hi!"]))
+    asyncio.run(agent.run_agent(_user("hello")))
+
+    original = agent.get_system_prompt
+    agent.get_system_prompt = lambda: original() + "\nNew rule."
+    try:
+        agent._agent_executor = agent.build_agent_executor(llm)
+    finally:
+        agent.get_system_prompt = original
+    asyncio.run(agent.run_agent(_user("hello")))
+    assert llm.calls == 2
+
+
+if __name__ == "__main__":
+    test_key_ignores_case_punctuation_and_spacing()
+    test_lru_eviction_and_ttl()
+    test_prompt_change_invalidates()
+    test_repeated_faq_skips_llm()
+    test_tool_turns_are_not_cached()
+    test_rebuilt_prompt_invalidates_cache()
+    print("All cache tests passed")
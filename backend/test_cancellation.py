@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Client-disconnect tests: the agent run (and the LLM call in flight) is
+cancelled when the client goes away, cancellations are counted, and
+booking/lead writes already under way still complete.
+
+Runs offline against FakeStreamingChatModel: no API keys or database required.
+Usage: python -m pytest -q test_cancellation.py  (or: python test_cancellation.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+import database
+import main
+import metrics
+import tools
+from availability import booking_calendar
+from database import InMemoryRepository
+from fake_llm import FakeStreamingChatModel, tool_call
+from langchain.tools import tool
+
+
+class TrackingModel(FakeStreamingChatModel):
+    """Records whether its stream ran to the end or was cancelled."""
+
+    finished: int = 0
+    cancelled: int = 0
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.finished += 1
+
+
+async def _disconnect_after(delay, stream_format=None):
+    """Serve one /api/chat response to a client that hangs up after `delay` seconds."""
+    request = main.ChatRequest(
+        messages=[main.Message(role="user", content="Tell me more about your agents")],
+        stream_format=stream_format,
+    )
+    response = await main.chat(request)
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(delay)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    start = time.perf_counter()
+    await response({"type": "http"}, receive, send)
+    return time.perf_counter() - start, sent
+
+
+def test_disconnect_cancels_the_llm_call():
+    for stream_format in (None, "ndjson"):
+        llm = TrackingModel(responses=["word " * 200], latency=0.5, token_delay=0.01)
+        agent._agent_executor = agent.build_agent_executor(llm)
+        agent.response_cache.invalidate()
+        cancelled_before = metrics.CANCELLED_RUNS.value()
+        requests_before = metrics.CHAT_REQUESTS.value(mode="history", outcome="cancelled")
+
+        async def scenario():
+            elapsed, _ = await _disconnect_after(0.1, stream_format)
+            await asyncio.sleep(0.6)  # long enough for an uncancelled call to finish
+            return elapsed
+
+        elapsed = asyncio.run(scenario())
+        assert elapsed < 0.4
+        assert llm.cancelled == 1 and llm.finished == 0
+        assert metrics.CANCELLED_RUNS.value() == cancelled_before + 1
+        assert metrics.CHAT_REQUESTS.value(mode="history", outcome="cancelled") == requests_before + 1
+        assert main.admission.in_flight == 0
+        assert not metrics.metrics_callback._started
+
+
+@tool
+async def slow_lookup_tool() -> str:
+    """Looks something up, slowly."""
+    await asyncio.sleep(1.0)
+    return "found it"
+
+
+def test_cancelled_tool_call_is_recorded():
+    llm = FakeStreamingChatModel(responses=[tool_call("slow_lookup_tool"), "Done"])
+    agent._agent_executor = agent.build_agent_executor(llm, agent_tools=[slow_lookup_tool])
+    agent.response_cache.invalidate()
+    before = metrics.TOOL_CALLS.value(tool="slow_lookup_tool", status="cancelled")
+
+    asyncio.run(_disconnect_after(0.2))
+    assert metrics.TOOL_CALLS.value(tool="slow_lookup_tool", status="cancelled") == before + 1
+    assert not metrics.metrics_callback._started
+
+
+def test_cancelled_booking_still_stores_its_row():
+    class SlowRepository(InMemoryRepository):
+        async def insert_booking(self, *args):
+            await asyncio.sleep(0.1)
+            await super().insert_booking(*args)
+
+    repository = SlowRepository()
+    previous = database.get_repository()
+    database.set_repository(repository)
+    booking_calendar.load([])
+    slot = booking_calendar.free_slots(limit=1)[0]
+
+    async def scenario():
+        task = asyncio.ensure_future(tools.book_call_tool.ainvoke(
+            {"name": "Jane", "email": "jane@example.com", "slot_id": booking_calendar.slot_id(slot)}
+        ))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.sleep(0.2)
+        return task.cancelled()
+
+    try:
+        assert asyncio.run(scenario())
+        assert len(repository.bookings) == 1
+        assert not booking_calendar.is_free(slot)  # reservation and row agree
+    finally:
+        booking_calendar.load([])
+        database.set_repository(previous)
+
+
+if __name__ == "__main__":
+    test_disconnect_cancels_the_llm_call()
+    test_cancelled_tool_call_is_recorded()
+    test_cancelled_booking_still_stores_its_row()
+    print("All cancellation tests passed")
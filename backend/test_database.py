@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Persistence tests: save_lead/log_booking through the repository layer,
+against the in-memory fallback and PostgresRepository on an in-process
+stand-in pool.
+
+Runs offline: no database required.
+Usage: python -m pytest -q test_database.py  (or: python test_database.py)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+from database import InMemoryRepository, PostgresRepository, parse_selected_time
+from fake_db import StandInPool
+
+
+def with_repository(repository, coro_fn):
+    previous = database.get_repository()
+    database.set_repository(repository)
+    try:
+        return asyncio.run(coro_fn())
+    finally:
+        database.set_repository(previous)
+
+
+def test_parse_selected_time():
+    expected = datetime(2025, 3, 4, 14, 0)
+    assert parse_selected_time("2025-03-04 at 2:00 PM") == expected
+    assert parse_selected_time("2025-03-04T14:00:00") == expected
+    assert parse_selected_time("2025-03-04T14:00:00+00:00") == expected
+    assert parse_selected_time(expected) is expected
+    try:
+        parse_selected_time("next Tuesday-ish")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_in_memory_fallback_without_database_url():
+    previous_url = os.environ.pop("DATABASE_URL", None)
+    previous = database.get_repository()
+
+    async def scenario():
+        assert await database.connect_db() is False
+        repository = database.get_repository()
+        result = await database.save_lead("Jane Doe", "jane@example.com", "Chatbot")
+        await database.disconnect_db()
+        return repository, result
+
+    try:
+        repository, result = asyncio.run(scenario())
+        assert isinstance(repository, InMemoryRepository)
+        assert result["success"]
+        assert repository.leads[0]["id"] == result["leadId"]
+    finally:
+        database.set_repository(previous)
+        if previous_url is not None:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_postgres_repository_writes_parameterised_rows():
+    pool = StandInPool()
+
+    async def scenario():
+        lead = await database.save_lead("Jane Doe", "jane@example.com", "Wants a voice agent")
+        booking = await database.log_booking("Jane Doe", "jane@example.com", "2025-03-04 at 10:00 AM", "Discovery Call")
+        return lead, booking
+
+    lead, booking = with_repository(PostgresRepository(pool), scenario)
+    assert lead["success"] and booking["success"]
+
+    assert pool.tables["leads"] == [{
+        "id": lead["leadId"], "name": "Jane Doe", "email": "jane@example.com", "details": "Wants a voice agent",
+    }]
+    row = pool.tables["call_requests"][0]
+    assert row["id"] == booking["callRequestId"]
+    assert row["selected_time"] == datetime(2025, 3, 4, 10, 0)
+    assert row["status"] == "pending"
+    # Values travel as bind parameters, never interpolated into the SQL
+    assert all("Jane" not in query for query, _ in pool.queries)
+
+
+def test_write_failure_is_reported_not_raised():
+    pool = StandInPool()
+    asyncio.run(pool.close())
+    errors_before = database.QUERY_ERRORS.value(op="save_lead")
+
+    result = with_repository(PostgresRepository(pool), lambda: database.save_lead("Jane", "jane@example.com"))
+    assert result == {"success": False, "leadId": None, "message": "Database error: pool is closed"}
+    assert database.QUERY_ERRORS.value(op="save_lead") == errors_before + 1
+
+    bad_time = with_repository(
+        PostgresRepository(StandInPool()),
+        lambda: database.log_booking("Jane", "jane@example.com", "whenever", "Discovery Call"),
+    )
+    assert not bad_time["success"]
+
+
+def test_pool_bounds_concurrent_writes():
+    pool = StandInPool(max_size=3, rtt=0.01)
+
+    async def scenario():
+        await asyncio.gather(*[database.save_lead(f"Lead {i}", f"l{i}@example.com") for i in range(30)])
+
+    with_repository(PostgresRepository(pool), scenario)
+    assert len(pool.tables["leads"]) == 30
+    assert pool.connections_opened == 3
+
+
+if __name__ == "__main__":
+    test_parse_selected_time()
+    test_in_memory_fallback_without_database_url()
+    test_postgres_repository_writes_parameterised_rows()
+    test_write_failure_is_reported_not_raised()
+    test_pool_bounds_concurrent_writes()
+    print("All database tests passed")
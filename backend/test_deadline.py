@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Request deadline tests: a slow LLM or tool call is cut off at the deadline,
+the user still gets a partial answer, runs stop at the iteration cap, and
+both limits are counted.
+
+Runs offline against FakeStreamingChatModel: no API keys required.
+Usage: python -m pytest -q test_deadline.py  (or: python test_deadline.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain.tools import tool
+
+import agent
+import metrics
+import tools
+from fake_llm import FakeStreamingChatModel, tool_call
+
+
+@tool
+async def slow_lookup_tool() -> str:
+    """Looks something up, slowly."""
+    await asyncio.sleep(5)
+    return "done"
+
+
+def run_turn(llm, text, budget, agent_tools=None):
+    agent._agent_executor = agent.build_agent_executor(llm, agent_tools=agent_tools)
+    agent.response_cache.invalidate()
+    trace = {}
+
+    async def collect():
+        deadline = asyncio.get_running_loop().time() + budget
+        start = time.perf_counter()
+        reply = "".join([c async for c in agent.stream_agent(
+            [{"role": "user", "content": text}], trace=trace, deadline=deadline)])
+        return reply, time.perf_counter() - start
+
+    reply, elapsed = asyncio.run(collect())
+    return reply, elapsed, trace
+
+
+class SlowAfterToolModel(FakeStreamingChatModel):
+    """Asks for the slot list, then takes far too long to phrase the answer."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if messages[-1].type == "tool":
+            await asyncio.sleep(5)
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+def test_slow_llm_after_tool_gives_partial_answer():
+    hits = metrics.AGENT_LIMIT_HITS.value(limit="deadline", phase="llm")
+    llm = SlowAfterToolModel(responses=[tool_call("get_available_slots_tool"), "Too late."])
+    reply, elapsed, trace = run_turn(llm, "Could you check the calendar?", 0.3)
+    assert elapsed < 1.0
+    assert trace["outcome"] == "deadline"
+    # The slot list the tool already fetched is the partial answer
+    assert reply.startswith("Available slots:") and reply.endswith("Which time works best for you?")
+    assert metrics.AGENT_LIMIT_HITS.value(limit="deadline", phase="llm") == hits + 1
+    assert not metrics.metrics_callback._started
+
+
+def test_slow_tool_is_cancelled_at_the_deadline():
+    hits = metrics.AGENT_LIMIT_HITS.value(limit="deadline", phase="tool")
+    cancelled = metrics.TOOL_CALLS.value(tool="slow_lookup_tool", status="cancelled")
+    llm = FakeStreamingChatModel(responses=[tool_call("slow_lookup_tool"), "Done."])
+    reply, elapsed, trace = run_turn(llm, "Look it up please", 0.2, agent_tools=[slow_lookup_tool])
+    assert elapsed < 1.0
+    assert reply == agent.DEADLINE_REPLY and trace["outcome"] == "deadline"
+    assert metrics.AGENT_LIMIT_HITS.value(limit="deadline", phase="tool") == hits + 1
+    # The cut-off call is counted, not left open in the callback handler
+    assert metrics.TOOL_CALLS.value(tool="slow_lookup_tool", status="cancelled") == cancelled + 1
+    assert not metrics.metrics_callback._started
+
+
+def test_iteration_cap_answers_from_tool_results():
+    hits = metrics.AGENT_LIMIT_HITS.value(limit="iterations", phase="agent")
+    # A model that never stops asking for slots
+    llm = FakeStreamingChatModel(responses=[tool_call("get_available_slots_tool")])
+    reply, _, trace = run_turn(llm, "Could you check the calendar?", 10, agent_tools=tools.tools)
+    assert llm.calls == agent.AGENT_MAX_ITERATIONS
+    assert reply.startswith("Available slots:") and trace["outcome"] == "deadline"
+    assert metrics.AGENT_LIMIT_HITS.value(limit="iterations", phase="agent") == hits + 1
+
+
+if __name__ == "__main__":
+    test_slow_llm_after_tool_gives_partial_answer()
+    test_slow_tool_is_cancelled_at_the_deadline()
+    test_iteration_cap_answers_from_tool_results()
+    print("All deadline tests passed")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Typed event stream tests: NDJSON/SSE framing, tool progress events, the
+coalescing flush policy, and compatibility with the plain-text stream.
+
+Runs offline against FakeStreamingChatModel: no API keys required.
+Usage: python -m pytest -q test_event_stream.py  (or: python test_event_stream.py)
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import HTTPException
+
+import agent
+import main
+from event_stream import coalesce
+from fake_llm import FakeStreamingChatModel, tool_call
+
+ANSWER = "We have openings tomorrow at 10:00 AM and Thursday at 2:00 PM."
+
+
+def use_llm(llm):
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+
+
+async def _chat(stream_format=None, content="Could you check the calendar for me?"):
+    request = main.ChatRequest(
+        messages=[main.Message(role="user", content=content)], stream_format=stream_format,
+    )
+    response = await main.chat(request)
+    body = "".join([chunk async for chunk in response.body_iterator])
+    return response, body
+
+
+def test_ndjson_reports_tool_progress_and_final_message():
+    use_llm(FakeStreamingChatModel(responses=[tool_call("get_available_slots_tool"), ANSWER]))
+    response, body = asyncio.run(_chat("ndjson"))
+    assert response.media_type == "application/x-ndjson"
+    events = [json.loads(line) for line in body.splitlines()]
+    types = [e["type"] for e in events]
+
+    assert types[:2] == ["tool_start", "tool_end"]
+    assert events[0]["tool"] == "get_available_slots_tool" and events[1]["ms"] >= 0
+    assert set(types[2:-1]) == {"token"} and types[-1] == "final"
+    tokens = "".join(e["text"] for e in events if e["type"] == "token")
+    assert tokens == events[-1]["text"] == ANSWER
+    assert events[-1]["outcome"] == "agent"
+
+    # Plain text is unchanged and remains the default
+    use_llm(FakeStreamingChatModel(responses=[tool_call("get_available_slots_tool"), ANSWER]))
+    response, body = asyncio.run(_chat())
+    assert response.media_type == "text/plain" and body == ANSWER
+
+
+def test_sse_framing_and_error_event():
+    def broken(messages):
+        raise RuntimeError("provider down")
+
+    use_llm(FakeStreamingChatModel(responder=broken))
+    response, body = asyncio.run(_chat("sse", content="Tell me about your services"))
+    assert response.media_type == "text/event-stream"
+    assert response.headers["X-Accel-Buffering"] == "no"
+    frames = body.split("\n\n")[:-1]
+    assert len(frames) == 1
+    name, data = frames[0].split("\n")
+    assert name == "event: error"
+    assert json.loads(data[len("data: "):]) == {"type": "error", "message": agent.ERROR_REPLY}
+
+    try:
+        asyncio.run(_chat("xml"))
+    except HTTPException as e:
+        assert e.status_code == 400
+    else:
+        raise AssertionError("expected 400 for an unknown stream_format")
+
+
+def test_coalesce_flushes_by_size_and_time():
+    async def tokens(pause_after=None):
+        for i in range(100):
+            yield {"type": "token", "text": "abcd"}
+            if i == pause_after:
+                await asyncio.sleep(0.2)
+        yield {"type": "tool_start", "tool": "x"}
+
+    async def collect(**kwargs):
+        out = []
+        async for event in coalesce(tokens(kwargs.pop("pause_after", None)), **kwargs):
+            out.append((time.perf_counter(), event))
+        return out
+
+    out = asyncio.run(collect(max_bytes=64, max_delay=10))
+    events = [e for _, e in out]
+    # First token alone, then 64-byte batches, buffered text flushed before other events
+    assert events[0] == {"type": "token", "text": "abcd"}
+    assert all(len(e["text"]) == 64 for e in events[1:-2])
+    assert events[-1]["type"] == "tool_start"
+    assert "".join(e.get("text", "") for e in events) == "abcd" * 100
+    assert len(events) < 12
+
+    start = time.perf_counter()
+    out = asyncio.run(collect(max_bytes=10_000, max_delay=0.02, pause_after=10))
+    # Tokens buffered before the pause went out after ~max_delay, not after the pause
+    second_at, second = out[1]
+    assert second["text"] == "abcd" * 10
+    assert second_at - start < 0.15
+
+
+if __name__ == "__main__":
+    test_ndjson_reports_tool_progress_and_final_message()
+    test_sse_framing_and_error_event()
+    test_coalesce_flushes_by_size_and_time()
+    print("All event stream tests passed")
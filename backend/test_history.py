@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+History windowing tests: budget enforcement, verbatim tool turns, and
+incremental summary reuse.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_history.py  (or: python test_history.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from fake_llm import FakeStreamingChatModel
+from history import SUMMARY_HEADER, HistoryWindow, message_tokens
+
+
+def conversation(turns, tool_turn=None):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}. " + "detail " * 30})
+        reply = {"role": "assistant", "content": f"Answer {i}. " + "context " * 30}
+        if i == tool_turn:
+            reply["tools"] = ["get_available_slots_tool"]
+        messages.append(reply)
+    messages.append({"role": "user", "content": "Latest question?"})
+    return messages
+
+
+def test_short_conversations_pass_through():
+    window = HistoryWindow(budget_tokens=2000)
+    messages = conversation(2)
+    assert asyncio.run(window.compact(messages, key="s")) is messages
+
+
+def test_window_fits_budget_and_keeps_recent_and_tool_turns():
+    window = HistoryWindow(budget_tokens=600, keep_turns=2, summary_tokens=150)
+    messages = conversation(30, tool_turn=3)
+    compacted = asyncio.run(window.compact(messages, key="s"))
+
+    assert message_tokens(compacted) <= 600
+    assert compacted[0]["content"].startswith(SUMMARY_HEADER)
+    assert compacted[-1] == messages[-1]
+    assert compacted[-2] == messages[-2]
+    assert any(m.get("tools") for m in compacted)  # the tool turn survived
+    assert "Question 0" not in "".join(m["content"] for m in compacted[1:])
+
+
+def test_summary_is_extended_incrementally():
+    calls = []
+
+    def summarizer(previous, new):
+        calls.append(len(new))
+        return (previous + "\n" if previous else "") + "\n".join(m["content"][:12] for m in new)
+
+    window = HistoryWindow(budget_tokens=600, keep_turns=2, summary_tokens=150, summarizer=summarizer)
+    messages = conversation(20)
+    asyncio.run(window.compact(messages, key="s"))
+    first_batch = calls[-1]
+
+    # One more exchange only summarizes what slid out of the window
+    messages = messages[:-1] + [
+        {"role": "user", "content": "Question 20. " + "detail " * 30},
+        {"role": "assistant", "content": "Answer 20. " + "context " * 30},
+        {"role": "user", "content": "Latest question?"},
+    ]
+    asyncio.run(window.compact(messages, key="s"))
+    assert window.summary_reuses == 1
+    assert calls[-1] == 2 and first_batch > 2
+
+    # A different conversation under the same key is not mixed in
+    other = conversation(20)
+    other[0] = {"role": "user", "content": "Totally different opener"}
+    asyncio.run(window.compact(other, key="s"))
+    assert window.summary_reuses == 1
+
+
+def test_prompt_sent_to_model_stays_flat():
+    seen = []
+
+    def responder(messages):
+        seen.append(sum(len(m.content) for m in messages))
+        return "ok"
+
+    agent._agent_executor = agent.build_agent_executor(FakeStreamingChatModel(responder=responder))
+    agent._agent_executor.verbose = False
+    agent.response_cache.invalidate()
+    original = agent.history_window
+    agent.history_window = HistoryWindow(budget_tokens=800, keep_turns=2, summary_tokens=200)
+    try:
+        for turns in (20, 80):
+            asyncio.run(agent.run_agent(conversation(turns)))
+    finally:
+        agent.history_window = original
+    assert abs(seen[1] - seen[0]) < 0.1 * seen[0]
+
+
+if __name__ == "__main__":
+    test_short_conversations_pass_through()
+    test_window_fits_budget_and_keeps_recent_and_tool_turns()
+    test_summary_is_extended_incrementally()
+    test_prompt_sent_to_model_stays_flat()
+    print("All history tests passed")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+LLM HTTP pool tests: calls through the shared client reuse one connection,
+new connections have their TCP connect timed, and the pool can be closed
+and reopened.
+
+Runs offline against a local HTTP stub: no API keys required.
+Usage: python -m pytest -q test_http_pool.py  (or: python test_http_pool.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_http import handle
+from http_pool import LLMHttpPool
+
+
+async def _calls(pool, calls):
+    server = await asyncio.start_server(lambda r, w: handle(r, w, 0), "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1/chat/completions"
+    try:
+        for _ in range(calls):
+            response = await pool.client().post(url, json={"messages": []})
+            assert response.status_code == 200
+    finally:
+        await pool.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+def test_pooled_calls_reuse_one_connection():
+    pool = LLMHttpPool()
+    asyncio.run(_calls(pool, 4))
+    stats = pool.stats()
+    assert stats["requests"] == 4 and stats["new_connections"] == 1 and stats["reused"] == 3
+    assert pool.phase_count == {"tcp": 1, "tls": 0} and "tcp" in stats["avg_connect_ms"]
+
+    # Closed at shutdown; the next use opens a fresh client
+    asyncio.run(_calls(pool, 1))
+    assert pool.new_connections == 2
+
+
+def test_without_keepalive_every_call_connects():
+    pool = LLMHttpPool(max_keepalive=0)
+    asyncio.run(_calls(pool, 3))
+    assert pool.new_connections == 3 and pool.phase_count["tcp"] == 3
+
+
+if __name__ == "__main__":
+    test_pooled_calls_reuse_one_connection()
+    test_without_keepalive_every_call_connects()
+    print("All HTTP pool tests passed")
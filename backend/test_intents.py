@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Intent router tests: offline accuracy/latency on a labelled set, and
+direct answers that bypass the LLM.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_intents.py  (or: python test_intents.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from fake_llm import FakeStreamingChatModel
+from intents import AVAILABILITY, OTHER, SAVE_LEAD, IntentRouter, classify
+from tools import tools
+
+THRESHOLD = 0.85
+
+# (utterance, intent that may be answered directly, or OTHER for the agent)
+LABELLED = [
+    ("What times are available?", AVAILABILITY),
+    ("what slots are open this week", AVAILABILITY),
+    ("When are you available for a call?", AVAILABILITY),
+    ("Can you show me your availability?", AVAILABILITY),
+    ("Which days work for a discovery call?", AVAILABILITY),
+    ("Any open slots tomorrow?", AVAILABILITY),
+    ("when can we meet", AVAILABILITY),
+    ("Show me available times please", AVAILABILITY),
+    ("My name is Jane Doe and my email is jane@acme.com", SAVE_LEAD),
+    ("I'm Omar, omar.k@startup.io", SAVE_LEAD),
+    ("This is Priya Shah - priya+leads@example.co.uk", SAVE_LEAD),
+    ("name: Alex Kim, alex@kim.dev", SAVE_LEAD),
+    # Everything below needs the agent
+    ("Hi there!", OTHER),
+    ("What do you guys do?", OTHER),
+    ("How much does an AI agent cost?", OTHER),
+    ("Tell me about your pricing and your availability", OTHER),
+    ("I'd like to book the 2:00 PM slot", OTHER),
+    ("Let's do 2025-01-10 at 10:00 AM", OTHER),
+    ("Book me in for 10am tomorrow", OTHER),
+    ("my email is sam@example.com", OTHER),
+    ("I am interested in automation, email me at a@b.co", OTHER),
+    ("Can you call me?", OTHER),
+    ("Do you build chatbots for healthcare?", OTHER),
+    ("I want to schedule something", OTHER),
+    ("Thanks, that's all", OTHER),
+    ("Tell me about your case studies", OTHER),
+    # Contact details plus another request: the agent must see the rest
+    ("I am Jane, jane@acme.com. Please book me for 2025-01-10 at 2:00 PM", OTHER),
+    ("My name is Jane Doe, jane@acme.com. We need a pricing quote for a support bot", OTHER),
+    ("I'm Omar, omar@startup.io - can you also tell me how long a project takes?", OTHER),
+    ("This is Not working, support@acme.com", OTHER),
+    ("I am Looking for help, reach me at sam@example.com", OTHER),
+]
+
+
+def _routed_intent(text):
+    intent = classify(text)
+    return intent.name if intent.confidence >= THRESHOLD else OTHER
+
+
+def test_offline_accuracy_and_latency():
+    wrong = [(text, label, _routed_intent(text)) for text, label in LABELLED
+             if _routed_intent(text) != label]
+    accuracy = 1 - len(wrong) / len(LABELLED)
+
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        for text, _ in LABELLED:
+            classify(text)
+    per_call_us = (time.perf_counter() - start) / (rounds * len(LABELLED)) * 1e6
+
+    print(f"Intent accuracy {accuracy:.0%} on {len(LABELLED)} utterances, {per_call_us:.1f}µs/classification")
+    assert accuracy >= 0.95, wrong
+    # A wrong direct answer is worse than a fallback: no false positives allowed
+    assert not [w for w in wrong if w[2] != OTHER], wrong
+    assert per_call_us < 500
+
+
+def test_names_are_not_sentence_words():
+    assert classify("This is Not working, support@acme.com").args == {"email": "support@acme.com"}
+    assert classify("I am Looking for help, sam@example.com").args == {"email": "sam@example.com"}
+    assert classify("I'm Jane from Acme, jane@acme.com").args["name"] == "Jane"
+
+
+def test_direct_answers_skip_the_llm():
+    llm = FakeStreamingChatModel(responses=["should not be used"])
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+    hits = dict(agent.intent_router.hits)
+
+    reply = asyncio.run(agent.run_agent([{"role": "user", "content": "What times are available?"}]))
+    assert reply.startswith("Available slots:")
+    reply = asyncio.run(agent.run_agent(
+        [{"role": "user", "content": "My name is Jane Doe, jane@acme.com"}]
+    ))
+    assert reply.startswith("Thanks, Jane!")
+    assert llm.calls == 0
+    assert agent.intent_router.hits[AVAILABILITY] == hits.get(AVAILABILITY, 0) + 1
+    assert agent.intent_router.hits[SAVE_LEAD] == hits.get(SAVE_LEAD, 0) + 1
+
+
+def test_low_confidence_falls_back_to_agent():
+    router = IntentRouter({t.name: t for t in tools}, threshold=THRESHOLD)
+    assert asyncio.run(router.route("I want to schedule something")) is None
+    assert asyncio.run(router.route("Hello")) is None
+    assert router.fallbacks[AVAILABILITY] == 1
+    assert sum(router.hits.values()) == 0
+
+
+if __name__ == "__main__":
+    test_offline_accuracy_and_latency()
+    test_names_are_not_sentence_words()
+    test_direct_answers_skip_the_llm()
+    test_low_confidence_falls_back_to_agent()
+    print("All intent tests passed")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Metrics tests: registry exposition format, per-stage spans, per-tool
+counters from the callback handler, and the /metrics endpoint.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_metrics.py  (or: python test_metrics.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import main
+import metrics
+from fake_llm import FakeStreamingChatModel, tool_call
+from metrics import Registry
+
+
+def test_exposition_format():
+    registry = Registry()
+    requests = registry.counter("demo_requests", "Requests", ["outcome"])
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("demo_depth", "Depth", lambda: 3)
+    registry.gauge("demo_errors", "Errors", lambda: {"a": 1, "b": 2}, labelname="provider", kind="counter")
+
+    requests.inc(outcome="ok")
+    requests.inc(2, outcome="ok")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    # Counter families are named like their samples (_total)
+    assert "# HELP demo_requests_total Requests" in lines
+    assert "# TYPE demo_requests_total counter" in lines
+    assert 'demo_requests_total{outcome="ok"} 3' in lines
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in lines
+    assert "demo_seconds_count 3" in lines
+    assert "demo_depth 3" in lines
+    assert "# TYPE demo_errors_total counter" in lines
+    assert 'demo_errors_total{provider="b"} 2' in lines
+
+
+def test_broken_gauge_does_not_break_scrape():
+    registry = Registry()
+    registry.gauge("demo_broken", "Broken", lambda: 1 / 0)
+    registry.gauge("demo_fine", "Fine", lambda: 1)
+    assert "demo_fine 1" in registry.render().splitlines()
+
+
+def test_tool_and_stage_metrics_from_agent_run():
+    llm = FakeStreamingChatModel(responses=[tool_call("get_available_slots_tool"), "Tuesday at 10:00 AM works."])
+    executor = agent.build_agent_executor(llm)
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.invalidate()
+
+    tools_before = metrics.TOOL_CALLS.value(tool="get_available_slots_tool", status="ok")
+    llm_before = metrics.LLM_CALLS.value(status="ok")
+    first_token_before = metrics.STAGE_SECONDS.count(stage="first_token")
+
+    trace = {}
+
+    async def run():
+        return "".join([c async for c in agent.stream_agent(
+            [{"role": "user", "content": "Could you check the calendar for me?"}], trace=trace)])
+
+    assert asyncio.run(run()) == "Tuesday at 10:00 AM works."
+    assert trace["outcome"] == "agent"
+    assert metrics.TOOL_CALLS.value(tool="get_available_slots_tool", status="ok") == tools_before + 1
+    assert metrics.LLM_CALLS.value(status="ok") == llm_before + 2
+    assert metrics.STAGE_SECONDS.count(stage="first_token") == first_token_before + 1
+
+
+def test_metrics_endpoint():
+    llm = FakeStreamingChatModel(responses=["Thanks for reaching out!"])
+    executor = agent.build_agent_executor(llm)
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.invalidate()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/chat", json={"messages": [{"role": "user", "content": "hello there"}]})
+            return await client.get("/metrics")
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    for stage in ("request_parse", "admission_wait", "history_compact", "agent", "total"):
+        assert f'delta_chat_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'delta_chat_requests_total{mode="history",outcome="agent"}' in body
+    assert "delta_admission_in_flight 0" in body
+
+
+def test_recording_overhead_is_negligible():
+    histogram = Registry().histogram("demo_overhead_seconds", "Overhead", ["stage"])
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        histogram.observe(0.01, stage="agent")
+    per_call = (time.perf_counter() - start) / n
+    # A chat request records ~10 observations; this keeps them well under 0.1 ms total
+    assert per_call < 10e-6, f"{per_call * 1e6:.2f} µs per observation"
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_broken_gauge_does_not_break_scrape()
+    test_tool_and_stage_metrics_from_agent_run()
+    test_metrics_endpoint()
+    test_recording_overhead_is_negligible()
+    print("All metrics tests passed")
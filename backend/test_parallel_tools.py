@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Parallel tool call tests: independent calls from one model response run
+concurrently (wall time is the slowest call, not the sum), declared
+dependencies keep their order, and each step is timed.
+
+Runs offline against FakeStreamingChatModel: no API keys required.
+Usage: python -m pytest -q test_parallel_tools.py  (or: python test_parallel_tools.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain.tools import tool
+from langchain_core.messages import AIMessage
+
+import agent
+import metrics
+from fake_llm import FakeStreamingChatModel
+from steps import check_dependencies
+
+events = []
+
+
+async def _work(name: str, seconds: float) -> str:
+    events.append(("start", name))
+    await asyncio.sleep(seconds)
+    events.append(("end", name))
+    return f"{name} done"
+
+
+@tool
+async def slow_lead_tool() -> str:
+    """Saves a lead, slowly."""
+    return await _work("lead", 0.3)
+
+
+@tool
+async def slow_booking_tool() -> str:
+    """Books a call, slowly."""
+    return await _work("booking", 0.4)
+
+
+@tool
+async def slow_slots_tool() -> str:
+    """Lists slots, slowly."""
+    return await _work("slots", 0.2)
+
+
+def calls(*names):
+    """One model response asking for several tools at once."""
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": {}, "id": f"call_{i}"} for i, name in enumerate(names)
+    ])
+
+
+def run_turn(llm, **build_kwargs):
+    agent._agent_executor = agent.build_agent_executor(
+        llm, agent_tools=[slow_lead_tool, slow_booking_tool, slow_slots_tool], terminal_tools=(), **build_kwargs)
+    agent.response_cache.invalidate()
+    events.clear()
+
+    async def collect():
+        start = time.perf_counter()
+        reply = "".join([c async for c in agent.stream_agent([{"role": "user", "content": "Jane, jane@example.com, 10am"}])])
+        return reply, time.perf_counter() - start
+
+    return asyncio.run(collect())
+
+
+def test_independent_calls_run_concurrently():
+    steps = metrics.TOOL_STEP_SECONDS.count(calls="2")
+    llm = FakeStreamingChatModel(responses=[calls("slow_lead_tool", "slow_booking_tool"), "All set!"])
+    reply, elapsed = run_turn(llm, tool_dependencies={})
+    assert reply == "All set!"
+    # The slowest call (0.4s), not the sum (0.7s)
+    assert 0.4 <= elapsed < 0.6
+    assert events[:2] == [("start", "lead"), ("start", "booking")]
+    assert metrics.TOOL_STEP_SECONDS.count(calls="2") == steps + 1
+
+
+def test_dependencies_keep_their_order():
+    llm = FakeStreamingChatModel(responses=[calls("slow_slots_tool", "slow_booking_tool", "slow_lead_tool"), "Done."])
+    reply, elapsed = run_turn(llm, tool_dependencies={"slow_slots_tool": {"slow_booking_tool"}})
+    assert reply == "Done."
+    # slots waits for booking (0.4 + 0.2); lead runs alongside both
+    assert 0.6 <= elapsed < 0.8
+    assert events.index(("start", "slots")) > events.index(("end", "booking"))
+    assert events.index(("start", "lead")) < events.index(("end", "booking"))
+
+
+def test_dependency_cycles_are_rejected():
+    check_dependencies({"a": {"b"}, "b": {"c"}})
+    try:
+        check_dependencies({"a": {"b"}, "b": {"a"}})
+    except ValueError:
+        return
+    raise AssertionError("cycle accepted")
+
+
+if __name__ == "__main__":
+    test_independent_calls_run_concurrently()
+    test_dependencies_keep_their_order()
+    test_dependency_cycles_are_rejected()
+    print("All parallel tool tests passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Slot prefetch tests: saving a lead prefetches the slot list for that
+session, the next availability question is served from it, and stale or
+expired prefetches are never served and are counted as wasted.
+
+Runs offline against FakeStreamingChatModel: no API keys or database required.
+Usage: python -m pytest -q test_prefetch.py  (or: python test_prefetch.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+import database
+import tools
+from availability import booking_calendar
+from database import InMemoryRepository
+from fake_llm import FakeStreamingChatModel, tool_call
+from prefetch import SlotPrefetcher
+
+
+def test_prefetch_is_served_once_while_fresh():
+    now = [0.0]
+    version = [1]
+    computed = []
+
+    def compute():
+        computed.append(version[0])
+        return f"slots v{version[0]}"
+
+    prefetcher = SlotPrefetcher(compute, lambda: version[0], ttl=60, clock=lambda: now[0])
+
+    async def scenario():
+        prefetcher.schedule("a")
+        prefetcher.schedule("b")
+        prefetcher.schedule("c")
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert computed == [1, 1, 1] and len(prefetcher) == 3
+    assert prefetcher.take("a") == "slots v1"
+    assert prefetcher.take("a") is None           # consumed
+    version[0] = 2                                # a booking changed the index
+    assert prefetcher.take("b") is None
+    now[0] = 61
+    assert prefetcher.stats() == {"entries": 0, "prefetches": 3, "hits": 1, "misses": 2,
+                                  "wasted": 2, "hit_rate": 0.333}
+
+
+def run_turn(llm, text, session_id="s1"):
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+
+    async def collect():
+        return "".join([c async for c in agent.stream_agent([{"role": "user", "content": text}], session_id=session_id)])
+
+    return asyncio.run(collect())
+
+
+def test_lead_capture_prefetches_the_next_slot_list():
+    previous = database.get_repository()
+    database.set_repository(InMemoryRepository())
+    booking_calendar.load([])
+    llm = FakeStreamingChatModel(responses=[tool_call("save_lead_tool", name="Jane Doe", email="jane@example.com")])
+    hits, misses = tools.slot_prefetch.hits, tools.slot_prefetch.misses
+    try:
+        assert run_turn(llm, "I'm Jane Doe, jane@example.com").startswith("Thanks, Jane!")
+        expected = "Available slots:\n" + tools._slot_list()
+        # Answered by the intent router from the prefetched list
+        assert run_turn(llm, "What times are available?").startswith(expected)
+        assert tools.slot_prefetch.hits == hits + 1
+
+        # A booking made after the prefetch makes it stale: recomputed instead
+        run_turn(llm, "I'm Jane Doe, jane@example.com")
+        first = booking_calendar.free_slots(limit=1)[0]
+        assert booking_calendar.reserve(first)
+        reply = run_turn(llm, "What times are available?")
+        assert booking_calendar.slot_id(first) not in reply
+        assert tools.slot_prefetch.misses == misses + 1
+    finally:
+        booking_calendar.load([])
+        database.set_repository(previous)
+
+
+def test_full_history_turns_are_not_prefetched():
+    previous = database.get_repository()
+    database.set_repository(InMemoryRepository())
+    llm = FakeStreamingChatModel(responses=[tool_call("save_lead_tool", name="Jane Doe", email="jane@example.com")])
+    prefetches, entries = tools.slot_prefetch.prefetches, len(tools.slot_prefetch)
+    try:
+        run_turn(llm, "I'm Jane Doe, jane@example.com", session_id=None)
+    finally:
+        database.set_repository(previous)
+    assert tools.slot_prefetch.prefetches == prefetches and len(tools.slot_prefetch) == entries
+
+
+if __name__ == "__main__":
+    test_prefetch_is_served_once_while_fresh()
+    test_lead_capture_prefetches_the_next_slot_list()
+    test_full_history_turns_are_not_prefetched()
+    print("All prefetch tests passed")
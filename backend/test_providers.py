@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Provider pool tests: failover, hedging and latency tracking with local
+stub providers that inject latency and errors.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_providers.py  (or: python test_providers.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+import providers
+from fake_llm import FakeStreamingChatModel, tool_call
+from providers import ProviderPool
+
+
+def failing(messages):
+    raise RuntimeError("provider down")
+
+
+def stub(text, latency=0.0, token_delay=0.0):
+    return FakeStreamingChatModel(responses=[text], latency=latency, token_delay=token_delay)
+
+
+def test_failover_to_next_provider():
+    pool = ProviderPool(
+        providers=[FakeStreamingChatModel(responder=failing), stub("from backup")],
+        names=["fo-primary", "fo-backup"],
+    )
+    assert asyncio.run(pool.ainvoke("hi")).content == "from backup"
+    assert pool.invoke("hi").content == "from backup"
+
+    async def streamed():
+        return "".join([chunk.content async for chunk in pool.astream("hi")])
+
+    assert asyncio.run(streamed()) == "from backup"
+    assert providers.stats()["fo-primary"]["errors"] == 3
+    assert providers.stats()["fo-backup"]["successes"] == 3
+
+
+def test_all_providers_failing_raises():
+    pool = ProviderPool(
+        providers=[FakeStreamingChatModel(responder=failing)] * 2,
+        names=["dead-1", "dead-2"],
+    )
+    try:
+        asyncio.run(pool.ainvoke("hi"))
+        raise AssertionError("expected RuntimeError")
+    except RuntimeError as e:
+        assert "provider down" in str(e)
+
+
+def test_hedged_request_beats_slow_primary():
+    slow = stub("slow answer", latency=1.0)
+    fast = stub("fast answer", latency=0.02)
+    pool = ProviderPool(
+        providers=[slow, fast], names=["hedge-slow", "hedge-fast"],
+        hedge=True, hedge_default_delay=0.1,
+    )
+
+    async def run():
+        start = time.perf_counter()
+        message = await pool.ainvoke("hi")
+        non_streamed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text = "".join([chunk.content async for chunk in pool.astream("hi")])
+        return message.content, non_streamed, text, time.perf_counter() - start
+
+    content, non_streamed, text, streamed = asyncio.run(run())
+    assert content == text == "fast answer"
+    assert non_streamed < 0.5 and streamed < 0.5
+    stats = providers.stats()
+    assert stats["hedge-fast"]["hedges_fired"] == 2
+    assert stats["hedge-fast"]["hedges_won"] == 2
+
+
+def test_no_hedge_when_primary_is_fast():
+    pool = ProviderPool(
+        providers=[stub("primary", latency=0.01), stub("backup")],
+        names=["calm-primary", "calm-backup"],
+        hedge=True, hedge_default_delay=0.2,
+    )
+    assert asyncio.run(pool.ainvoke("hi")).content == "primary"
+    assert "calm-backup" not in providers.stats()
+
+
+def test_hedge_delay_follows_p95():
+    pool = ProviderPool(providers=[stub("a"), stub("b")], names=["p95-a", "p95-b"],
+                        hedge=True, hedge_min_delay=0.01, hedge_min_samples=20)
+    tracker = providers.tracker_for("p95-a")
+    assert pool._hedge_delay(0) == pool.hedge_default_delay
+    for i in range(100):
+        tracker.record(0.1 + i / 1000)
+    assert abs(pool._hedge_delay(0) - 0.195) < 1e-9
+
+
+def test_agent_streams_through_pool_without_duplicates():
+    pool = ProviderPool(
+        providers=[
+            FakeStreamingChatModel(responder=failing),
+            FakeStreamingChatModel(responses=[tool_call("get_available_slots_tool"), "Tomorrow at 10:00 AM is free."]),
+        ],
+        names=["agent-primary", "agent-backup"],
+    )
+    agent._agent_executor = agent.build_agent_executor(pool)
+    agent.response_cache.invalidate()
+    reply = asyncio.run(agent.run_agent([{"role": "user", "content": "Could you check the calendar?"}]))
+    assert reply == "Tomorrow at 10:00 AM is free."
+
+
+if __name__ == "__main__":
+    test_failover_to_next_provider()
+    test_all_providers_failing_raises()
+    test_hedged_request_beats_slow_primary()
+    test_no_hedge_when_primary_is_fast()
+    test_hedge_delay_follows_p95()
+    test_agent_streams_through_pool_without_duplicates()
+    print("All provider tests passed")
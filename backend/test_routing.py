@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Model routing tests: short and tool-like turns go to the fast tier, long
+multi-part briefs to the strong tier, and per-tier counters record turns,
+LLM calls, time and tokens.
+
+Runs offline against two FakeStreamingChatModels with different latencies.
+Usage: python -m pytest -q test_routing.py  (or: python test_routing.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from fake_llm import FakeStreamingChatModel
+from routing import FAST, STRONG, ModelRouter, ModelTier, choose_tier
+
+BRIEF = (
+    "We run a chain of 12 dental clinics and want an AI receptionist. It should answer "
+    "calls after hours, book and reschedule appointments in our practice software, send "
+    "SMS reminders and hand urgent cases to the on-call dentist.\n"
+    "What would the rollout look like? How do you handle patient data and HIPAA?\n"
+    "Could it also follow up on unpaid invoices, and what would all of this cost per month "
+    "for the first year, including setup and training for our front-desk staff?"
+)
+
+
+def test_choose_tier_from_local_features():
+    assert choose_tier("hi") == (FAST, "simple")
+    assert choose_tier("I'm Jane Doe, jane@example.com") == (FAST, "intent")
+    assert choose_tier("Tomorrow at 10am works for me") == (FAST, "tool")
+    assert choose_tier(BRIEF) == (STRONG, "complex")
+    # Routing off (no strong tier): everything stays on the fast model
+    assert ModelRouter(ModelTier(FAST, "flash")).choose(BRIEF) == (FAST, "single")
+
+
+def test_turns_run_on_the_chosen_tier():
+    fast = FakeStreamingChatModel(responses=["Hi! How can I help?"], latency=0.02)
+    strong = FakeStreamingChatModel(responses=["Here is how we would approach it."], latency=0.2)
+    previous = agent.model_router, agent._strong_executor
+    router = ModelRouter(ModelTier(FAST, "fast-stub"), ModelTier(STRONG, "strong-stub", cost_per_1k=0.01))
+    agent.model_router = router
+    agent._agent_executor = agent.build_agent_executor(fast)
+    agent._strong_executor = agent.build_agent_executor(strong)
+
+    async def turn(text):
+        agent.response_cache.invalidate()
+        trace = {}
+        reply = "".join([c async for c in agent.stream_agent([{"role": "user", "content": text}], trace=trace)])
+        return reply, trace["tier"]
+
+    try:
+        assert asyncio.run(turn("hello there")) == ("Hi! How can I help?", FAST)
+        assert asyncio.run(turn(BRIEF)) == ("Here is how we would approach it.", STRONG)
+    finally:
+        agent.model_router, agent._strong_executor = previous
+
+    assert fast.calls == 1 and strong.calls == 1
+    stats = router.stats()["tiers"]
+    assert stats[FAST]["turns"] == stats[STRONG]["turns"] == 1
+    assert stats[FAST]["llm_calls"] == stats[STRONG]["llm_calls"] == 1
+    assert stats[STRONG]["avg_turn_ms"] > stats[FAST]["avg_turn_ms"]
+    assert stats[STRONG]["input_tokens"] > stats[FAST]["input_tokens"] > 0
+    assert stats[STRONG]["est_cost_usd"] > 0 and stats[FAST]["est_cost_usd"] == 0
+    assert router.stats()["decisions"] == {"fast:simple": 1, "strong:complex": 1}
+
+
+if __name__ == "__main__":
+    test_choose_tier_from_local_features()
+    test_turns_run_on_the_chosen_tier()
+    print("All routing tests passed")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Session mode tests: server-side history, eviction, and the legacy
+full-history contract.
+
+Runs offline: no API keys required.
+Usage: python -m pytest -q test_sessions.py  (or: python test_sessions.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import main
+from fake_llm import FakeStreamingChatModel
+from sessions import InMemorySessionBackend, SessionStore
+
+
+def test_backend_evicts_lru_and_idle_sessions():
+    now = [0.0]
+    backend = InMemorySessionBackend(max_sessions=2, idle_ttl=60, clock=lambda: now[0])
+
+    async def scenario():
+        await backend.save("a", [{"role": "user", "content": "1"}])
+        await backend.save("b", [])
+        assert await backend.load("a") is not None   # a becomes most recent
+        await backend.save("c", [])                   # evicts b
+        assert await backend.load("b") is None
+        assert backend.evictions == 1
+
+        now[0] = 60.0
+        assert await backend.load("a") is None
+        assert backend.expirations == 1
+
+    asyncio.run(scenario())
+
+
+def test_store_appends_without_aliasing():
+    store = SessionStore(InMemorySessionBackend())
+
+    async def scenario():
+        history = await store.history("s")
+        history.append({"role": "user", "content": "not saved"})
+        await store.append("s", {"role": "user", "content": "hi"})
+        assert await store.history("s") == [{"role": "user", "content": "hi"}]
+
+    asyncio.run(scenario())
+
+
+def _install_echo_llm():
+    """LLM that reports how many messages (history + input) it was given."""
+    seen = []
+
+    def responder(messages):
+        seen.append(messages)
+        return f"turn {len(messages) - 1}"  # minus the system prompt
+
+    executor = agent.build_agent_executor(FakeStreamingChatModel(responder=responder))
+    executor.verbose = False
+    agent._agent_executor = executor
+    agent.response_cache.invalidate()
+    return seen
+
+
+async def _post(client, payload):
+    response = await client.post("/api/chat", json=payload)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_session_mode_keeps_history_on_server():
+    seen = _install_echo_llm()
+    main.sessions = SessionStore(InMemorySessionBackend())
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await _post(client, {"message": "Hi"})
+            session_id = first.headers["X-Session-Id"]
+            second = await _post(client, {"session_id": session_id, "message": "Pricing?"})
+            third = await _post(client, {"session_id": session_id, "message": "Thanks"})
+            return session_id, [first.text, second.text, third.text]
+
+    session_id, replies = asyncio.run(scenario())
+    assert replies == ["turn 1", "turn 3", "turn 5"]
+    # The final turn saw the full conversation rebuilt from the store
+    assert [m.content for m in seen[-1][1:]] == ["Hi", "turn 1", "Pricing?", "turn 3", "Thanks"]
+    history = asyncio.run(main.sessions.history(session_id))
+    assert len(history) == 6
+
+
+def test_unknown_session_is_not_a_fresh_start():
+    seen = _install_echo_llm()
+    now = [0.0]
+    main.sessions = SessionStore(InMemorySessionBackend(idle_ttl=60, clock=lambda: now[0]))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            unknown = await client.post("/api/chat", json={"session_id": "gone", "message": "10am works"})
+            first = await _post(client, {"message": "Hi"})
+            now[0] = 60.0  # idle past the TTL
+            expired = await client.post("/api/chat", json={
+                "session_id": first.headers["X-Session-Id"], "message": "10am works"})
+            return unknown, expired
+
+    unknown, expired = asyncio.run(scenario())
+    assert unknown.status_code == 404 and expired.status_code == 404
+    assert len(seen) == 1  # neither reached the agent with an empty history
+
+
+def test_full_history_mode_still_works():
+    _install_echo_llm()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await _post(client, {"messages": [
+                {"role": "user", "content": "Hi"},
+                {"role": "assistant", "content": "Hello!"},
+                {"role": "user", "content": "What do you do?"},
+            ]})
+            missing = await client.post("/api/chat", json={})
+            empty = await _post(client, {"messages": []})
+            return response, missing, empty
+
+    response, missing, empty = asyncio.run(scenario())
+    assert response.text == "turn 3"
+    assert "X-Session-Id" not in response.headers
+    assert missing.status_code == 400
+    # An empty conversation still gets the greeting
+    assert empty.text == agent.GREETING
+
+
+if __name__ == "__main__":
+    test_backend_evicts_lru_and_idle_sessions()
+    test_store_appends_without_aliasing()
+    test_session_mode_keeps_history_on_server()
+    test_unknown_session_is_not_a_fresh_start()
+    test_full_history_mode_still_works()
+    print("All session tests passed")
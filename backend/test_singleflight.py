@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Single-flight tests: concurrent identical chat requests share one agent run
+(one LLM call, one saved lead) and each gets the full streamed reply; the
+shared run is cancelled only once every request has gone away.
+
+Runs offline against FakeStreamingChatModel: no API keys or database required.
+Usage: python -m pytest -q test_singleflight.py  (or: python test_singleflight.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import database
+import main
+from database import InMemoryRepository
+from fake_llm import FakeStreamingChatModel, tool_call
+from singleflight import SingleFlight, request_key
+
+
+def test_duplicates_share_one_run():
+    repository = InMemoryRepository()
+    previous = database.get_repository()
+    database.set_repository(repository)
+    llm = FakeStreamingChatModel(
+        responses=[tool_call("save_lead_tool", name="Jane Doe", email="jane@example.com"), "Thanks, Jane!"],
+        latency=0.1,
+    )
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+    shared = main.single_flight.shared
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            payload = {"messages": [{"role": "user", "content": "Please keep me posted"}]}
+            return await asyncio.gather(*[client.post("/api/chat", json=payload) for _ in range(3)])
+
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        database.set_repository(previous)
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len({r.text for r in responses}) == 1 and responses[0].text.startswith("Thanks, Jane!")
+    assert llm.calls == 2
+    assert len(repository.leads) == 1
+    assert main.single_flight.shared == shared + 2
+    assert len(main.single_flight) == 0 and main.admission.in_flight == 0
+
+
+def test_run_is_cancelled_only_when_everyone_leaves():
+    finished = []
+
+    async def produce(trace):
+        for i in range(5):
+            await asyncio.sleep(0.02)
+            yield i
+        finished.append(True)
+
+    async def scenario():
+        flights = SingleFlight()
+        key = request_key("session", [{"role": "user", "content": "hi"}])
+        flight, leader = flights.join(key, produce)
+        follower, is_leader = flights.join(key, produce)
+        assert leader and not is_leader and follower is flight
+
+        first, second = flight.subscribe(), flight.subscribe()
+        assert await first.__anext__() == 0
+        assert await second.__anext__() == 0
+        await first.aclose()  # one request leaves; the other keeps the run going
+        assert [item async for item in second] == [1, 2, 3, 4]
+        assert finished and len(flights) == 0
+
+        cancelled, _ = flights.join(key, produce)
+        only = cancelled.subscribe()
+        await only.__anext__()
+        await only.aclose()
+        return cancelled
+
+    cancelled = asyncio.run(scenario())
+    assert cancelled.done and len(finished) == 1
+
+
+if __name__ == "__main__":
+    test_duplicates_share_one_run()
+    test_run_is_cancelled_only_when_everyone_leaves()
+    print("All single-flight tests passed")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Startup tests: the lifespan warm-up builds the agent before the first chat,
+and /ready only reports ready once it has finished.
+
+Runs offline: no API keys or database required.
+Usage: python -m pytest -q test_startup.py  (or: python test_startup.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+import agent
+import main
+from fake_llm import FakeStreamingChatModel
+
+
+async def _get_ready():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/ready")
+
+
+def _run_lifespan(mode):
+    """Return (/ready before startup, /ready after startup) for one lifespan with `mode`."""
+    previous = main.AGENT_WARMUP, dict(main.readiness)
+    main.AGENT_WARMUP = mode
+    main.readiness.clear()
+    main.readiness.update({"ready": False, "warmup": {}})
+
+    async def scenario():
+        before = await _get_ready()
+        async with main.lifespan(main.app):
+            after = await _get_ready()
+        return before, after
+
+    try:
+        return asyncio.run(scenario())
+    finally:
+        main.AGENT_WARMUP = previous[0]
+        main.readiness.clear()
+        main.readiness.update(previous[1])
+
+
+def test_warm_up_builds_and_connects_before_ready():
+    llm = FakeStreamingChatModel(responses=["OK"])
+    agent._agent_executor = None
+    original_build = agent.build_agent_executor
+    agent.build_agent_executor = lambda: original_build(llm)
+    try:
+        before, after = _run_lifespan("connect")
+    finally:
+        agent.build_agent_executor = original_build
+
+    assert before.status_code == 503 and before.json()["status"] == "starting"
+    assert after.status_code == 200 and after.json()["status"] == "ready"
+    assert set(after.json()["warmup"]) == {"build", "connect"}
+    # Built during startup, and the model was called once to open its connection
+    assert agent._agent_executor is not None
+    assert llm.calls == 1
+
+
+def test_warm_up_url_is_skipped_when_the_provider_does_not_use_the_pool():
+    llm = FakeStreamingChatModel(responses=["OK"])
+    agent._agent_executor = agent.build_agent_executor(llm)
+    timings = asyncio.run(agent.warm_up("connect", "http://127.0.0.1:9/unreachable"))
+    assert set(timings) == {"build"} and llm.calls == 0
+
+
+def test_failed_build_is_never_ready():
+    agent._agent_executor = None
+    original_build = agent.build_agent_executor
+
+    def broken():
+        raise ValueError("CRITICAL: GOOGLE_API_KEY is missing.")
+
+    agent.build_agent_executor = broken
+    try:
+        _, after = _run_lifespan("build")
+    finally:
+        agent.build_agent_executor = original_build
+    assert after.status_code == 503
+    assert "GOOGLE_API_KEY" in after.json()["error"]
+
+
+if __name__ == "__main__":
+    test_warm_up_builds_and_connects_before_ready()
+    test_warm_up_url_is_skipped_when_the_provider_does_not_use_the_pool()
+    test_failed_build_is_never_ready()
+    print("All startup tests passed")
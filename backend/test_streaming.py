@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Token streaming tests for /api/chat.
+
+Runs offline against FakeStreamingChatModel: no API keys required.
+Usage: python -m pytest -q test_streaming.py  (or: python test_streaming.py)
+"""
+import asyncio
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+import main
+from fake_llm import FakeStreamingChatModel, tool_call
+
+TOKEN_DELAY = 0.002
+
+
+def use_llm(llm):
+    agent._agent_executor = agent.build_agent_executor(llm)
+    agent.response_cache.invalidate()
+
+
+async def _timed_chat(content: str = "hi"):
+    """Return (time to first chunk, total time, body) for one /api/chat call."""
+    request = main.ChatRequest(messages=[main.Message(role="user", content=content)])
+    start = time.perf_counter()
+    response = await main.chat(request)
+    first_byte = None
+    body = []
+    async for chunk in response.body_iterator:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        body.append(chunk)
+    return first_byte, time.perf_counter() - start, "".join(body)
+
+
+def test_first_byte_independent_of_length():
+    # Warm up imports and pydantic schemas so they don't skew the first run
+    use_llm(FakeStreamingChatModel(responses=["warm up"]))
+    asyncio.run(_timed_chat())
+
+    timings = {}
+    for words in (5, 500):
+        text = " ".join(f"w{i}" for i in range(words))
+        use_llm(FakeStreamingChatModel(responses=[text], token_delay=TOKEN_DELAY))
+        # A full GC pass in a big test session can cost ~100ms; keep it out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            first_byte, total, body = asyncio.run(_timed_chat())
+        finally:
+            gc.enable()
+        assert body == text
+        timings[words] = (first_byte, total)
+
+    short_first, _ = timings[5]
+    long_first, long_total = timings[500]
+    print(f"TTFB short={short_first*1000:.1f}ms long={long_first*1000:.1f}ms "
+          f"(long total {long_total*1000:.0f}ms)")
+
+    # Total time scales with length, first byte does not
+    assert long_total > 500 * TOKEN_DELAY
+    assert long_first < long_total / 5
+    assert long_first < short_first + 0.1
+
+
+def test_tool_turn_streams_final_answer():
+    llm = FakeStreamingChatModel(responses=[
+        tool_call("get_available_slots_tool"),
+        "We have openings tomorrow at 10:00 AM.",
+    ])
+    use_llm(llm)
+    _, _, body = asyncio.run(_timed_chat("Could you check the calendar for me?"))
+    assert body == "We have openings tomorrow at 10:00 AM."
+    assert llm.calls == 2
+
+
+def test_run_agent_still_returns_full_text():
+    use_llm(FakeStreamingChatModel(responses=["Hello there, how can I help?"]))
+    reply = asyncio.run(agent.run_agent([{"role": "user", "content": "hey"}]))
+    assert reply == "Hello there, how can I help?"
+
+
+if __name__ == "__main__":
+    test_first_byte_independent_of_length()
+    test_tool_turn_streams_final_answer()
+    test_run_agent_still_returns_full_text()
+    print("All streaming tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Terminal tool tests: a successful booking ends the agent run with a
+templated reply instead of another LLM call.
+
+Runs offline against FakeStreamingChatModel: no API keys or database required.
+Usage: python -m pytest -q test_terminal.py  (or: python test_terminal.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent
+from availability import booking_calendar
+from fake_llm import FakeStreamingChatModel, tool_call
+from terminal import FinalResult
+
+FOLLOW_UP = "All set, anything else?"
+
+
+def run_turn(llm, text, **build_kwargs):
+    agent._agent_executor = agent.build_agent_executor(llm, **build_kwargs)
+    agent.response_cache.invalidate()
+    trace = {}
+
+    async def collect():
+        return "".join([chunk async for chunk in agent.stream_agent([{"role": "user", "content": text}], trace=trace)])
+
+    return asyncio.run(collect()), trace
+
+
+def test_booking_ends_without_a_second_llm_call():
+    booking_calendar.load([])
+    slot_id = booking_calendar.slot_id(booking_calendar.free_slots(limit=1)[0])
+    llm = FakeStreamingChatModel(responses=[
+        tool_call("book_call_tool", name="Jane Doe", email="jane@example.com", slot_id=slot_id),
+        FOLLOW_UP,
+    ])
+    try:
+        reply, trace = run_turn(llm, f"Book {slot_id} for Jane Doe, jane@example.com")
+    finally:
+        booking_calendar.load([])
+    assert llm.calls == 1
+    assert reply.startswith("You're booked, Jane!") and "Reference:" in reply
+    assert trace["tools"] == ["book_call_tool"] and trace["outcome"] == "agent"
+
+
+def test_errors_and_non_terminal_tools_go_back_to_the_model():
+    llm = FakeStreamingChatModel(responses=[
+        tool_call("book_call_tool", name="Jane Doe", email="jane@example.com", slot_id="whenever"),
+        FOLLOW_UP,
+    ])
+    reply, _ = run_turn(llm, "Book me in whenever")
+    assert llm.calls == 2 and reply == FOLLOW_UP
+
+    # save_lead is not terminal by default: the model still answers the rest
+    llm = FakeStreamingChatModel(responses=[
+        tool_call("save_lead_tool", name="Jane Doe", email="jane@example.com"),
+        FOLLOW_UP,
+    ])
+    reply, _ = run_turn(llm, "Please note down Jane Doe, jane@example.com - and what do you charge?")
+    assert llm.calls == 2 and reply == FOLLOW_UP
+
+    # Disabled: the booking result is phrased by the model again
+    booking_calendar.load([])
+    slot_id = booking_calendar.slot_id(booking_calendar.free_slots(limit=1)[0])
+    llm = FakeStreamingChatModel(responses=[
+        tool_call("book_call_tool", name="Jane Doe", email="jane@example.com", slot_id=slot_id),
+        FOLLOW_UP,
+    ])
+    try:
+        reply, _ = run_turn(llm, f"Book {slot_id} for Jane Doe, jane@example.com", terminal_tools=())
+    finally:
+        booking_calendar.load([])
+    assert llm.calls == 2 and reply == FOLLOW_UP
+
+
+def test_final_result_is_the_model_facing_string():
+    result = FinalResult("Successfully saved lead for Jane.", "Thanks, Jane!")
+    assert result == "Successfully saved lead for Jane." and result.reply == "Thanks, Jane!"
+    assert not result.startswith("Error")
+
+
+if __name__ == "__main__":
+    test_booking_ends_without_a_second_llm_call()
+    test_errors_and_non_terminal_tools_go_back_to_the_model()
+    test_final_result_is_the_model_facing_string()
+    print("All terminal tool tests passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Write-behind queue tests: size- and time-triggered batches, immediate
+acknowledgement, retries, backpressure and draining on shutdown.
+
+Runs offline against fake_db.StandInPool: no database required.
+Usage: python -m pytest -q test_writebehind.py  (or: python test_writebehind.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+from database import PostgresRepository
+from fake_db import StandInPool
+from writebehind import WriteBehindQueue
+
+
+def run_with_queue(pool, scenario, **queue_kwargs):
+    """Run `scenario(queue)` with save_lead/log_booking routed through a queue over `pool`."""
+    previous = database.get_repository()
+    repository = PostgresRepository(pool)
+    database.set_repository(repository)
+
+    async def main():
+        queue = WriteBehindQueue(repository.insert_many, **queue_kwargs)
+        database.start_write_queue(queue)
+        try:
+            return await scenario(queue)
+        finally:
+            await database.stop_write_queue()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        database.set_repository(previous)
+
+
+def test_acknowledges_before_the_write():
+    pool = StandInPool(rtt=0.05)
+
+    async def scenario(queue):
+        start = time.perf_counter()
+        result = await database.save_lead("Jane Doe", "jane@example.com", "Chatbot")
+        elapsed = time.perf_counter() - start
+        assert "leads" not in pool.tables  # not written yet
+        return result, elapsed
+
+    result, elapsed = run_with_queue(pool, scenario, flush_interval=0.01)
+    assert result["success"]
+    assert elapsed < 0.01, f"ack took {elapsed * 1000:.1f}ms"
+    # Drained on stop, with the pre-generated ID
+    assert pool.tables["leads"][0]["id"] == result["leadId"]
+
+
+def test_flushes_full_batches_with_copy():
+    pool = StandInPool(rtt=0.001)
+
+    async def scenario(queue):
+        for i in range(250):
+            await database.save_lead(f"Lead {i}", f"l{i}@example.com")
+        await asyncio.sleep(0.05)
+        return queue.stats()
+
+    stats = run_with_queue(pool, scenario, max_batch=100, flush_interval=10)
+    # Flushed because the batch filled up, long before the 10s interval
+    assert stats["flushed"] == 250 and stats["depth"] == 0
+    assert stats["batches"] == 3 and pool.copies == 3
+    assert len(pool.tables["leads"]) == 250
+    assert not any(query.startswith("INSERT") for query, _ in pool.queries)
+
+
+def test_flushes_partial_batch_after_interval():
+    pool = StandInPool()
+
+    async def scenario(queue):
+        await database.log_booking("Jane", "jane@example.com", "2025-03-04 at 10:00 AM", "Discovery Call")
+        await asyncio.sleep(0.1)
+        return len(pool.tables.get("call_requests", []))
+
+    assert run_with_queue(pool, scenario, max_batch=100, flush_interval=0.02) == 1
+
+
+def test_retries_failed_flush():
+    pool = StandInPool()
+    failures = {"left": 2}
+
+    async def flaky(table, rows):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise ConnectionError("connection reset")
+        async with pool.acquire() as conn:
+            await conn.copy_records_to_table(table, records=rows, columns=database.LEAD_COLUMNS)
+
+    async def main():
+        queue = WriteBehindQueue(flaky, flush_interval=0.01, retry_delay=0.001)
+        queue.start()
+        queue.submit("leads", ("id-1", "Jane", "jane@example.com", None))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert stats["flushed"] == 1 and stats["dropped"] == 0
+    assert pool.tables["leads"][0]["id"] == "id-1"
+
+
+def test_full_queue_falls_back_to_inline_writes():
+    pool = StandInPool()
+
+    async def scenario(queue):
+        results = [await database.save_lead(f"Lead {i}", f"l{i}@example.com") for i in range(5)]
+        return results, queue.stats()
+
+    results, stats = run_with_queue(pool, scenario, max_pending=3, flush_interval=10)
+    assert all(r["success"] for r in results)
+    assert stats["rejected"] == 2
+    assert len(pool.tables["leads"]) == 5
+
+
+if __name__ == "__main__":
+    test_acknowledges_before_the_write()
+    test_flushes_full_batches_with_copy()
+    test_flushes_partial_batch_after_interval()
+    test_retries_failed_flush()
+    test_full_queue_falls_back_to_inline_writes()
+    print("All write-behind tests passed")
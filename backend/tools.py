@@ -1,63 +1,138 @@
-from langchain.tools import tool
-from typing import Optional
+import asyncio
+import functools
+import os
+
+from langchain_core.tools import StructuredTool
+from typing import Any, Awaitable, Callable, Optional
 import logging
-import uuid
-import datetime
+
+from database import save_lead, log_booking
+from availability import booking_calendar, to_utc_naive
+from metrics import REGISTRY
+from prefetch import SlotPrefetcher
+from terminal import final_result
 
 logger = logging.getLogger(__name__)
 
-# --- Mock Database Functions ---
-def _db_save_lead(name: str, email: str, details: str):
-    lead_id = str(uuid.uuid4())
-    logger.info(f"DB SAVE: {name} | {email} | {details}")
-    return {"id": lead_id, "status": "saved"}
+def _slot_list() -> str:
+    slots = booking_calendar.free_slots()
+    if not slots:
+        return "No open slots in the booking window. Offer to have the team follow up by email."
+    lines = [
+        f"{booking_calendar.format_slot(slot)} (ID: {booking_calendar.slot_id(slot)})"
+        for slot in slots
+    ]
+    return "\n".join(lines) + f"\n(Times are {booking_calendar.tz_name}.)"
 
-def _db_log_booking(name: str, email: str, time: str, intent: str):
-    booking_id = str(uuid.uuid4())
-    logger.info(f"DB BOOK: {name} | {time} | {intent}")
-    return {"id": booking_id, "status": "confirmed"}
+# Slot lists computed right after a lead is saved, for the turn that asks for times
+slot_prefetch = SlotPrefetcher(
+    compute=_slot_list,
+    version=lambda: booking_calendar.version,
+    ttl=float(os.getenv("SLOT_PREFETCH_TTL", "120")),
+)
 
-# --- Exported Tools ---
+REGISTRY.gauge("delta_slot_prefetch_hits", "Slot list requests served from a prefetch",
+               lambda: slot_prefetch.hits, kind="counter")
+REGISTRY.gauge("delta_slot_prefetch_misses", "Slot list requests with nothing prefetched",
+               lambda: slot_prefetch.misses, kind="counter")
+REGISTRY.gauge("delta_slot_prefetch_wasted", "Prefetched slot lists never served (expired, stale or replaced)",
+               lambda: slot_prefetch.wasted, kind="counter")
+
+async def _store_booking(start, name: str, email: str, intent: str) -> dict:
+    """Write a reserved booking, releasing the slot if it can't be stored."""
+    try:
+        result = await log_booking(name, email, to_utc_naive(start), intent)
+    except BaseException:
+        booking_calendar.release(start)
+        raise
+    if not result["success"]:
+        booking_calendar.release(start)
+    return result
+
+def async_tool(coroutine: Callable[..., Awaitable[Any]], name: str) -> StructuredTool:
+    """
+    Tool whose implementation is `coroutine`. The agent awaits it on the
+    event loop; the sync entry point (`invoke`, scripts) is a thin wrapper
+    that runs the same coroutine, so no worker thread is held during I/O.
+    """
+    @functools.wraps(coroutine)
+    def run_sync(*args, **kwargs):
+        return asyncio.run(coroutine(*args, **kwargs))
 
-@tool
-def save_lead_tool(name: str, email: str, details: str = "General Inquiry") -> str:
+    return StructuredTool.from_function(func=run_sync, coroutine=coroutine, name=name)
+
+# --- Tool implementations ---
+
+async def _save_lead(name: str, email: str, details: str = "General Inquiry") -> str:
     """
     Saves a user's contact information (lead) to the database.
     Use this when the user provides their name and email address.
     """
     try:
-        result = _db_save_lead(name, email, details)
-        return f"Successfully saved lead for {name}. ID: {result['id']}"
+        # Shielded: the lead is stored even if the client disconnects mid-turn
+        result = await asyncio.shield(save_lead(name, email, details))
+        if not result["success"]:
+            return f"Error saving lead: {result['message']}"
+        # Times are usually the next thing asked for
+        slot_prefetch.schedule()
+        return final_result(
+            "save_lead_tool",
+            f"Successfully saved lead for {name}. ID: {result['leadId']}",
+            name=name,
+        )
     except Exception as e:
         return f"Error saving lead: {str(e)}"
 
-@tool
-def get_available_slots_tool() -> str:
+async def _get_available_slots() -> str:
     """
     Retrieves available discovery call time slots.
     Use this when the user asks about availability or wants to book.
     """
-    # Dynamic dates so it's always "in the future"
-    today = datetime.datetime.now()
-    slots = []
-    for i in range(1, 4):
-        date = (today + datetime.timedelta(days=i)).strftime("%Y-%m-%d")
-        slots.append(f"{date} at 10:00 AM")
-        slots.append(f"{date} at 2:00 PM")
-    
-    return "Available slots:\n" + "\n".join(slots)
+    listing = slot_prefetch.take()
+    return "Available slots:\n" + (listing if listing is not None else _slot_list())
 
-@tool
-def book_call_tool(name: str, email: str, selected_time: str, intent: str = "Discovery Call") -> str:
+async def _book_call(name: str, email: str, slot_id: str, intent: str = "Discovery Call") -> str:
     """
     Books a meeting. Use this ONLY after the user selects a specific time.
-    Requires name, email, and the chosen time string.
+    Requires name, email, and the ID of the chosen slot from
+    get_available_slots_tool (e.g. "VNHXR4").
     """
     try:
-        result = _db_log_booking(name, email, selected_time, intent)
-        return f"Booking confirmed for {name} at {selected_time}. Reference: {result['id']}"
+        start = booking_calendar.resolve(slot_id)
+    except ValueError:
+        return f"Error booking call: unknown slot '{slot_id}'. Available slots:\n{_slot_list()}"
+
+    # Claimed before the write so a concurrent turn can't take the same slot
+    if not booking_calendar.reserve(start):
+        when = booking_calendar.format_slot(start)
+        return f"Error booking call: {when} is not available. Available slots:\n{_slot_list()}"
+    try:
+        # Shielded: a disconnect mid-turn must not leave a reservation without its row
+        result = await asyncio.shield(_store_booking(start, name, email, intent))
+        if not result["success"]:
+            return f"Error booking call: {result['message']}"
+        when = booking_calendar.format_slot(start)
+        tz = booking_calendar.tz_name
+        return final_result(
+            "book_call_tool",
+            f"Booking confirmed for {name} at {when} ({tz}). Reference: {result['callRequestId']}",
+            name=name, email=email, intent=intent, when=when, tz=tz, reference=result["callRequestId"],
+        )
     except Exception as e:
         return f"Error booking call: {str(e)}"
 
+# --- Exported Tools ---
+
+save_lead_tool = async_tool(_save_lead, "save_lead_tool")
+get_available_slots_tool = async_tool(_get_available_slots, "get_available_slots_tool")
+book_call_tool = async_tool(_book_call, "book_call_tool")
+
 # Export list
-tools = [save_lead_tool, get_available_slots_tool, book_call_tool]
\ No newline at end of file
+tools = [save_lead_tool, get_available_slots_tool, book_call_tool]
+
+# Calls in one agent step run concurrently unless listed here: the tool on
+# the left waits for same-step calls to the tools on the right
+TOOL_DEPENDENCIES = {
+    # A slot list fetched alongside a booking must not offer the slot just taken
+    "get_available_slots_tool": frozenset({"book_call_tool"}),
+}
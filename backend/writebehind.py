@@ -0,0 +1,163 @@
+"""
+Write-behind batching for database inserts.
+
+`save_lead`/`log_booking` generate their row ID up front, hand the row to a
+`WriteBehindQueue` and return at once; a background task writes the rows in
+batches when `max_batch` rows are waiting or `flush_interval` seconds after
+the first one arrived, whichever comes first. `stop()` drains everything
+still queued, so rows survive a normal shutdown.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# flush(table, rows) writes one batch, e.g. with COPY or a multi-row INSERT
+Flush = Callable[[str, List[Sequence[Any]]], Awaitable[None]]
+
+FLUSH_SECONDS = REGISTRY.histogram("delta_db_flush_seconds", "Duration of write-behind batch flushes", ["table"])
+FLUSHED_ROWS = REGISTRY.counter("delta_db_flushed_rows", "Rows written by write-behind flushes", ["table"])
+DROPPED_ROWS = REGISTRY.counter("delta_db_dropped_rows", "Rows given up on after repeated flush failures", ["table"])
+
+
+class WriteBehindQueue:
+    """
+    Buffer rows per table and flush them in batches from a background task.
+
+    `max_pending` bounds the buffer: when it is full `submit` returns False
+    and the caller should write synchronously instead. A failing batch is
+    retried `retries` times with exponential backoff before it is dropped
+    (and its IDs logged).
+    """
+
+    def __init__(self, flush: Flush, max_batch: int = 100, flush_interval: float = 0.05,
+                 max_pending: int = 10000, retries: int = 3, retry_delay: float = 0.1):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self._pending: Dict[str, List[Sequence[Any]]] = defaultdict(list)
+        self._depth = 0
+        self._has_rows = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Counters
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Rows accepted but not yet written."""
+        return self._depth
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    def start(self) -> None:
+        """Start the flusher on the running event loop."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, table: str, row: Sequence[Any]) -> bool:
+        """Queue one row; False means the caller must write it itself."""
+        if not self.running or self._depth >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._pending[table].append(row)
+        self._depth += 1
+        self.submitted += 1
+        self._has_rows.set()
+        if self._depth >= self.max_batch:
+            self._batch_full.set()
+        return True
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._has_rows.set()
+        self._batch_full.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_rows.wait()
+            if not self._closing and self._depth < self.max_batch:
+                # Give the batch up to flush_interval to fill
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._has_rows.clear()
+            self._batch_full.clear()
+            await self._flush_pending()
+            if self._closing and not self._depth:
+                return
+            if self._depth:
+                self._has_rows.set()
+
+    async def _flush_pending(self) -> None:
+        for table in list(self._pending):
+            rows = self._pending.pop(table)
+            for start in range(0, len(rows), self.max_batch):
+                batch = rows[start:start + self.max_batch]
+                await self._flush_batch(table, batch)
+                self._depth -= len(batch)
+
+    async def _flush_batch(self, table: str, batch: List[Sequence[Any]]) -> None:
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                await self.flush(table, batch)
+            except Exception as e:
+                if attempt == self.retries:
+                    self.dropped += len(batch)
+                    DROPPED_ROWS.inc(len(batch), table=table)
+                    ids = ", ".join(str(row[0]) for row in batch)
+                    logger.error(f"Dropping {len(batch)} {table} rows after {attempt + 1} attempts: {e}. IDs: {ids}")
+                    return
+                logger.warning(f"Flush of {len(batch)} {table} rows failed ({e}); retrying")
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+                continue
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.flushed += len(batch)
+            self.flush_time_total += elapsed
+            self.flush_time_max = max(self.flush_time_max, elapsed)
+            FLUSH_SECONDS.observe(elapsed, table=table)
+            FLUSHED_ROWS.inc(len(batch), table=table)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "avg_batch": round(self.flushed / self.batches, 1) if self.batches else 0.0,
+            "flush_avg_ms": round(1000 * self.flush_time_total / max(self.batches, 1), 2),
+            "flush_max_ms": round(1000 * self.flush_time_max, 2),
+        }
@@ -49,6 +49,10 @@ export function DeltaBotWidget() {
   const toastIndexRef = useRef(0)
   const isRunningRef = useRef(false)
   const messagesEndRef = useRef<HTMLDivElement>(null)
+  // Server-side session: after the first reply only the new message is sent
+  const sessionIdRef = useRef<string | null>(null)
+  // Set once the server has lost our session: from then on send full history
+  const fullHistoryRef = useRef(false)
   const chatContainerRef = useRef<HTMLDivElement>(null)
 
   // Status rotation
@@ -85,21 +89,36 @@ export function DeltaBotWidget() {
     }])
 
     try {
-      const response = await fetch('/api/chat', {
+      const post = (body: object) => fetch('/api/chat', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          messages: [...messages, userMsg].map(m => ({ 
-            role: m.role, 
-            content: m.content 
-          })),
-        }),
+        body: JSON.stringify(body),
       })
+      const fullHistory = () => ({
+        messages: [...messages, userMsg].map(m => ({
+          role: m.role,
+          content: m.content
+        })),
+      })
+
+      let response = fullHistoryRef.current
+        ? await post(fullHistory())
+        : await post({ session_id: sessionIdRef.current, message: content })
+
+      if (response.status === 404 && sessionIdRef.current) {
+        // The server lost the session (restart, eviction, another worker):
+        // resend the whole conversation and stay in full-history mode
+        sessionIdRef.current = null
+        fullHistoryRef.current = true
+        response = await post(fullHistory())
+      }
 
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
 
+      sessionIdRef.current = response.headers.get('X-Session-Id') ?? sessionIdRef.current
+
       const fullText = await response.text()
       
       setMessages(prev => prev.map(msg =>